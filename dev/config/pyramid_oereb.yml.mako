@@ -102,6 +102,17 @@ pyramid_oereb:
     # more time to generate the PDF. If set to false, it will assume that only one TOC page exists, and this can
     # lead to wrong numbering in the TOC.
     compute_toc_pages: true
+    # Submit the PDF extracts as asynchronous jobs to MapFish Print instead of waiting for the pdf (defaults to
+    # false). The PDF extract request answers with the id of the job and the URLs to poll its status
+    # (/print/status/<id>) and to download the pdf (/print/report/<id>). The jobs are kept by a backend of the
+    # extract cache, use a FileBackend if the application runs in several processes.
+    # async:
+    #   enabled: true
+    #   backend:
+    #     class: pyramid_oereb.core.extract_cache.FileBackend
+    #     params:
+    #       path: /var/cache/pyramid_oereb/print_jobs
+    #       max_entries: 1000
     # Specify any additional URL parameters that the print shall use for WMS calls
     wms_url_params:
       TRANSPARENT: 'true'
@@ -148,6 +159,28 @@ pyramid_oereb:
     db_connection: &main_db_connection
       ${sqlalchemy_url}
 
+  # The optional "database_pool" property tunes the SQLAlchemy connection pools. The settings on the top level
+  # apply to all connections, entries in "connections" override them for the connection with the matching
+  # db_connection. Supported settings are pool_size, max_overflow, pool_timeout (seconds), pool_recycle
+  # (seconds, defaults to 3600), pool_pre_ping and statement_timeout (milliseconds, PostgreSQL only). Keep in
+  # mind that each process (e.g. gunicorn worker) has its own pools. The live pool statistics can be added to
+  # the response of the /health service (see health below).
+  # database_pool:
+  #   pool_size: 5
+  #   max_overflow: 10
+  #   pool_pre_ping: false
+  #   connections:
+  #     - db_connection: *main_db_connection
+  #       pool_size: 10
+  #       statement_timeout: 30000
+
+  # The /health service answers with status 200 if all databases can be reached and 503 otherwise. Its
+  # response only contains the "healthy" flag, unless details is enabled (defaults to false). The details are
+  # the health of each connection (with masked passwords) and the pool statistics, only enable them if the
+  # service is not publicly reachable.
+  # health:
+  #   details: false
+
   # Define the SRID which your server is representing. Note: Only one projection system is possible in the
   # application. It does not provide any reprojection nor data in different projection systems. Take care in
   # your importing process!
@@ -175,6 +208,22 @@ pyramid_oereb:
   # Configuration option for full extract: apply SLD on land register WMS (defaults to true)
   full_extract_use_sld: true
 
+  # Directory to write the compiled templates of the XML renderers to, so they are not compiled again after a
+  # restart of the application. The templates are compiled at startup and kept in memory anyway.
+  # template_module_directory: /tmp/pyramid_oereb_templates
+
+  # Cache of the legend entry images delivered by the symbol webservice. The images are kept in the memory of
+  # each process and sent with an ETag and Cache-Control header, so clients can revalidate them. Changed
+  # legend entries are delivered after at most ttl + max_age seconds.
+  # symbol_cache:
+  #   enabled: true
+  #   # Maximum number of cached images, the least recently used are removed first
+  #   max_entries: 1000
+  #   # Seconds a cached image is delivered before it is read again (default: 300)
+  #   ttl: 300
+  #   # Seconds clients may use an image without revalidating it (default: 300)
+  #   max_age: 300
+
   # Configuration for OEREBlex
   oereblex:
     # OEREBlex host
@@ -215,6 +264,29 @@ pyramid_oereb:
     #   url_param: 'oereb_id=5'
     # Optional parameter to use "prepubs" URL if law_status is not "inForce" (Default: False).
     use_prepubs: True
+    # Cache of the received documents shared by all requests. The documents are delivered without request
+    # for ttl seconds, afterwards they are revalidated with a conditional request to OEREBlex.
+    # cache:
+    #   enabled: true
+    #   # Seconds the documents are delivered without revalidation (default: 300)
+    #   ttl: 300
+    #   backend:
+    #     # MemoryBackend keeps the documents in the memory of each process, FileBackend in a directory
+    #     class: pyramid_oereb.core.extract_cache.FileBackend
+    #     params:
+    #       path: /var/cache/pyramid_oereb/oereblex
+    #       max_entries: 10000
+    # Downloads of the geoLinks. The geoLinks of all restrictions of a theme are downloaded in parallel through
+    # one pooled HTTP session shared by all requests.
+    # download:
+    #   # Maximum number of geoLinks downloaded at the same time (default: 8)
+    #   max_workers: 8
+    #   # Seconds to wait for OEREBlex to connect and to send data (default: 30)
+    #   timeout: 30
+    #   # Number of retries on connection errors and on the status codes 502, 503 and 504 (default: 2)
+    #   retries: 2
+    #   # Factor of the exponential delay between the retries in seconds (default: 0.2)
+    #   backoff_factor: 0.2
 
   # Defines the information of the oereb cadastre providing authority. Please change this to your data. This
   # will be directly used for producing the extract output.
@@ -276,6 +348,16 @@ pyramid_oereb:
         db_connection: *main_db_connection
         # The model which maps the real estate database table.
         model: pyramid_oereb.contrib.data_sources.standard.models.main.RealEstate
+        # Keep the real estates in an in-memory spatial index of each process, loaded on startup, to answer
+        # GetEGRID by coordinate without querying the database. Only the changed real estates are loaded
+        # again on a refresh.
+        # index:
+        #   enabled: true
+        #   # Seconds after which the index is refreshed in the background (default: never)
+        #   refresh_interval: 3600
+        #   # Column changing with every update of a real estate, used to find the changed ones on a refresh
+        #   # (default: the PostgreSQL system column xmin, set a column if the model maps a view)
+        #   version_column: xmin
 
   # The processor of the oereb project needs access to address data. In the standard configuration, this
   # is assumed to be read from a database. Hint: If you want to read the addresses out of an existing database
@@ -575,6 +657,39 @@ pyramid_oereb:
     # Redirect configuration for type URL. You can use any attribute of the real estate RealEstateRecord
     # (e.g. "{egrid}") to parameterize the URL.
     redirect: https://geoview.bl.ch/oereb/?egrid={egrid}
+    # Read the PLR sources of an extract concurrently instead of one after another (defaults to false). Every
+    # thread of the pool uses its own database connection, so make sure the connection pool is large enough.
+    # The pool is shared by all requests of a process.
+    # parallel_read:
+    #   enabled: true
+    #   # Maximum number of PLR sources read at the same time by all requests
+    #   max_workers: 8
+    #   # Seconds (counted from the start of reading) each PLR source may take before its theme is listed as
+    #   # theme without data
+    #   timeout: 30
+    # The WMS images of extracts with images are downloaded in parallel through a pooled HTTP session.
+    # wms_download:
+    #   # Maximum number of images downloaded at the same time (default: 8)
+    #   max_workers: 8
+    #   # Seconds to wait for the WMS to connect and to send data (default: 30)
+    #   timeout: 30
+    #   # Number of retries on connection errors and on the status codes 502, 503 and 504 (default: 2)
+    #   retries: 2
+    # Cache the rendered extracts (defaults to false). Use the script invalidate_extract_cache to remove the
+    # cached extracts of a theme or municipality after a data import.
+    # cache:
+    #   enabled: true
+    #   # Seconds a cached extract is delivered (default: no limit)
+    #   ttl: 86400
+    #   backend:
+    #     # MemoryBackend keeps the extracts in the memory of each process, FileBackend in a directory
+    #     class: pyramid_oereb.core.extract_cache.FileBackend
+    #     params:
+    #       path: /var/cache/pyramid_oereb/extracts
+    #       # Maximum number of cached extracts, the least recently used are removed first
+    #       max_entries: 10000
+    #       # FileBackend only: part of max_entries left when the least recently used are removed (default: 0.9)
+    #       eviction_ratio: 0.9
 
   # The processor of the oereb project needs access to availability data. In the standard configuration this
   # is assumed to be read from a database. Hint: If you want to read the availability out of an existing database
@@ -625,6 +740,10 @@ pyramid_oereb:
           # uncomment line above and comment line below to use integer type for primary keys
           model_factory: pyramid_oereb.contrib.data_sources.standard.models.theme.model_factory_string_pk
           schema_name: land_use_plans
+          # Let the database compute the intersection with the real estate, its area, length and number of
+          # points and apply the thresholds of the theme. Only the qualifying geometries are transferred.
+          # Useful for themes with many or large geometries. Requires PostGIS.
+          # measure_in_database: true
       hooks:
         get_symbol: pyramid_oereb.contrib.data_sources.standard.hook_methods.get_symbol
         get_symbol_ref: pyramid_oereb.core.hook_methods.get_symbol_ref
@@ -60,6 +60,11 @@ def includeme(config):
         'pyramid_oereb': Config.get_config()
     })
 
+    # Build readers and sources once per process instead of once per request and load the real estate
+    # index before the first request
+    from pyramid_oereb.core.processor import init_processor
+    init_processor().real_estate_reader.load_index()
+
     config.add_renderer('pyramid_oereb_extract_json', 'pyramid_oereb.core.renderer.extract.json_.Renderer')
     config.add_renderer('pyramid_oereb_extract_xml', 'pyramid_oereb.core.renderer.extract.xml_.Renderer')
     config.add_renderer('pyramid_oereb_extract_print', Config.get('print').get('renderer'))
@@ -68,4 +73,12 @@ def includeme(config):
                         'pyramid_oereb.core.renderer.capabilities.xml_.Renderer')
     config.add_renderer('pyramid_oereb_getegrid_xml', 'pyramid_oereb.core.renderer.getegrid.xml_.Renderer')
 
+    # Compile the templates of the XML renderers before the first request
+    from pyramid_oereb.core.renderer.template_lookup import preload_templates
+    preload_templates()
+
     config.include('pyramid_oereb.core.routes')
+
+    # Status and download of asynchronous print jobs
+    if (Config.get('print').get('async') or {}).get('enabled', False):
+        config.include('pyramid_oereb.contrib.print_proxy.mapfish_print.print_job')
@@ -3,10 +3,10 @@ import logging
 import importlib
 import binascii
 
-from geoalchemy2.shape import to_shape, from_shape
+from geoalchemy2.shape import to_shape
 from shapely.geometry import Point, LineString, Polygon, MultiPoint, MultiLineString, MultiPolygon, \
     GeometryCollection
-from sqlalchemy import or_
+from sqlalchemy import func, select, union_all
 from sqlalchemy.orm import selectinload
 
 from pyramid_oereb import Config
@@ -18,6 +18,10 @@ from pyramid_oereb.core.sources.plr import PlrBaseSource
 from pyramid_oereb.contrib.data_sources.interlis_2_3.interlis_2_3_utils import from_multilingual_text_to_dict
 from pyramid_oereb.contrib.data_sources.interlis_2_3.interlis_2_3_utils import from_multilingual_uri_to_dict
 from pyramid_oereb.contrib import eliminate_duplicated_document_records
+from pyramid_oereb.contrib.data_sources import model_registry
+from pyramid_oereb.contrib.data_sources.measurement import get_measurement_query, \
+    from_db_to_measured_geometry_records
+from pyramid_oereb.contrib.data_sources.prepared_geometry import get_prepared_geometry
 
 log = logging.getLogger(__name__)
 
@@ -57,8 +61,13 @@ class StandardThemeConfigParser(object):
         )
 
     def get_models(self):
-        model_factory = self.get_model_factory()
-        return model_factory(
+        """
+        Returns the models of the theme. They are built only once per process and shared between all
+        sources, hook methods and requests using them (see
+        :mod:`pyramid_oereb.contrib.data_sources.model_registry`).
+        """
+        return model_registry.get_models(
+            self.model_factory_path,
             self.schema_name,
             self.geometry_type,
             self.srid,
@@ -117,6 +126,9 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         self.datasource = []
 
         self._tolerance = self._plr_info.get('tolerance')
+        # the intersections with the real estate are measured by the database, see
+        # pyramid_oereb.contrib.data_sources.measurement
+        self._measure_in_database_ = kwargs.get('source').get('params').get('measure_in_database', False)
 
     def from_db_to_legend_entry_record(self, legend_entry_from_db):
         theme = Config.get_theme_by_code_sub_code(legend_entry_from_db.theme, legend_entry_from_db.sub_theme)
@@ -336,7 +348,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             ))
         return document_records
 
-    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db):
+    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db,
+                              geometry_records=None):
         thresholds = self._plr_info.get('thresholds')
         min_length = thresholds.get('length').get('limit')
         length_unit = thresholds.get('length').get('unit')
@@ -366,7 +379,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             theme.document_records,
             self.get_document_records(params, public_law_restriction_from_db)
         )
-        geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
+        if geometry_records is None:
+            geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
         law_status = Config.get_law_status_by_data_code(
             self._plr_info.get('code'),
             public_law_restriction_from_db.law_status
@@ -408,6 +422,43 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         document_records = self.from_db_to_document_records(documents_from_db)
         return document_records
 
+    def get_related_geometry_ids(self, geometry_to_check, tolerance=None):
+        """
+        Returns the query of the identifiers of the geometries of the topic having a spatial relation with the
+        passed geometry. The geometries are kept in three columns (point, line and surface) with a spatial
+        index each. The columns are queried in separate branches combined by UNION ALL, so the database can
+        use the index of every column, which it often does not for an OR of the spatial clauses.
+
+        Args:
+            geometry_to_check (shapely.geometry.base.BaseGeometry or
+                pyramid_oereb.contrib.data_sources.prepared_geometry.PreparedGeometry): geometry to be
+                queried
+            tolerance (float or None): The tolerance, the geometries intersect if it is None.
+
+        Returns:
+            sqlalchemy.sql.selectable.CompoundSelect: The query of the identifiers.
+        """
+        prepared = get_prepared_geometry(geometry_to_check)
+        return union_all(*[
+            select(self._model_.t_id).where(prepared.get_filter(column, tolerance))
+            for column in [self._model_.point, self._model_.line, self._model_.surface]
+        ])
+
+    def get_spatial_filter(self, geometry_to_check):
+        """
+        Returns the filter clause which selects the geometries of the topic having a spatial relation with the
+        passed geometry. The configured tolerance is taken into account.
+
+        Args:
+            geometry_to_check (shapely.geometry.base.BaseGeometry or
+                pyramid_oereb.contrib.data_sources.prepared_geometry.PreparedGeometry): geometry to be
+                queried
+
+        Returns:
+            sqlalchemy.sql.elements.ClauseElement: The filter clause.
+        """
+        return self._model_.t_id.in_(self.get_related_geometry_ids(geometry_to_check, self._tolerance))
+
     def collect_related_geometries_by_real_estate(self, session, real_estate):
         """
         Extracts all geometries in the topic which have spatial relation with the passed real estate
@@ -420,26 +471,7 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         Returns:
             list: The result of the related geometries unique by the public law restriction id
         """
-        if self._tolerance is None:
-            query = session.query(self._model_).filter(
-                or_(
-                    self._model_.point.ST_Intersects(from_shape(real_estate.limit, srid=Config.get('srid'))),
-                    self._model_.line.ST_Intersects(from_shape(real_estate.limit, srid=Config.get('srid'))),
-                    self._model_.surface.ST_Intersects(from_shape(real_estate.limit, srid=Config.get('srid')))
-                ))
-        else:
-            query = session.query(self._model_).filter(
-                or_(
-                    self._model_.point.ST_Distance(
-                        from_shape(real_estate.limit, srid=Config.get('srid'))
-                    ) < self._tolerance,
-                    self._model_.line.ST_Distance(
-                        from_shape(real_estate.limit, srid=Config.get('srid'))
-                    ) < self._tolerance,
-                    self._model_.surface.ST_Distance(
-                        from_shape(real_estate.limit, srid=Config.get('srid'))
-                    ) < self._tolerance
-                ))
+        query = session.query(self._model_).filter(self.get_spatial_filter(real_estate.limit))
         return query.distinct(self._model_.public_law_restriction_id).options(
             selectinload(self.models.Geometry.public_law_restriction)
             .selectinload(self.models.PublicLawRestriction.geometries),
@@ -460,6 +492,55 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             .selectinload(self.models.MultilingualUri.localised_uri)
         ).all()
 
+    def collect_measured_public_law_restrictions(self, session, real_estate, with_geometry):
+        """
+        Measures the geometries of the topic against the passed real estate in the database (see
+        :mod:`pyramid_oereb.contrib.data_sources.measurement`) and reads the public law restrictions having
+        qualifying geometries.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate in its record representation.
+            with_geometry (bool): True to transfer the geometries of the qualifying parts.
+
+        Returns:
+            tuple: The public law restrictions (list) and their measured geometry records (dict of list
+            by public law restriction id).
+        """
+        geometry_records = from_db_to_measured_geometry_records(
+            self._plr_info.get('code'),
+            get_measurement_query(
+                session,
+                self._model_,
+                func.coalesce(self._model_.point, self._model_.line, self._model_.surface),
+                self.get_spatial_filter(real_estate.limit),
+                real_estate,
+                self._tolerance,
+                self._plr_info.get('thresholds'),
+                with_geometry
+            ).all()
+        )
+        if len(geometry_records) == 0:
+            return [], geometry_records
+        plr_model = self.models.PublicLawRestriction
+        public_law_restrictions = session.query(plr_model).filter(
+            plr_model.t_id.in_(list(geometry_records.keys()))
+        ).order_by(plr_model.t_id).options(
+            selectinload(plr_model.legal_provisions)
+            .selectinload(self.models.PublicLawRestrictionDocument.document)
+            .selectinload(self.models.Document.multilingual_uri)
+            .selectinload(self.models.MultilingualUri.localised_uri),
+            selectinload(plr_model.legend_entry),
+            selectinload(plr_model.view_service)
+            .selectinload(self.models.ViewService.multilingual_uri)
+            .selectinload(self.models.MultilingualUri.localised_uri),
+            selectinload(plr_model.responsible_office)
+            .selectinload(self.models.Office.multilingual_uri)
+            .selectinload(self.models.MultilingualUri.localised_uri)
+        ).all()
+        return public_law_restrictions, geometry_records
+
     def collect_legend_entries_by_bbox(self, session, bbox, law_status):
         """
         Extracts all legend entries in the topic which have spatial relation with the passed bounding box of
@@ -473,23 +554,46 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         Returns:
             list: The result of the related geometries unique by the public law restriction id and law status
         """
-        distinct_legend_entry_ids = []
-        geometries = session.query(self._model_).filter(
-                      or_(
-                       self._model_.point.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
-                       self._model_.line.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
-                       self._model_.surface.ST_Intersects(from_shape(bbox, srid=Config.get('srid')))
-                      )).distinct(self._model_.public_law_restriction_id).options(
-                        selectinload(self.models.Geometry.public_law_restriction)
-                      ).all()
-
-        for geometry in geometries:
-            if geometry.public_law_restriction.legend_entry_id not in distinct_legend_entry_ids\
-                    and geometry.public_law_restriction.law_status == law_status:
-                distinct_legend_entry_ids.append(geometry.public_law_restriction.legend_entry_id)
-
-        return session.query(self.legend_entry_model).filter(
-            self.legend_entry_model.t_id.in_((distinct_legend_entry_ids))).all()
+        return self.collect_legend_entries_by_bbox_and_law_status(session, bbox, [law_status]).get(
+            law_status,
+            []
+        )
+
+    def collect_legend_entries_by_bbox_and_law_status(self, session, bbox, law_status_list):
+        """
+        Extracts all legend entries in the topic which have spatial relation with the passed bounding box of
+        visible extent for all passed law status at once. This is done with one single query, the geometries
+        are only joined in the database and not loaded.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+            law_status_list (list of str): The law status for which the legend entries should be queried.
+
+        Returns:
+            dict: The distinct legend entries (list) per law status.
+        """
+        plr_model = self.models.PublicLawRestriction
+        distinct_legend_entries = session.query(
+            plr_model.legend_entry_id,
+            plr_model.law_status
+        ).join(
+            self._model_, self._model_.public_law_restriction_id == plr_model.t_id
+        ).filter(
+            self._model_.t_id.in_(self.get_related_geometry_ids(bbox))
+        ).filter(
+            plr_model.law_status.in_(law_status_list)
+        ).distinct().subquery()
+        legend_entries_by_law_status = dict([(law_status, []) for law_status in law_status_list])
+        for legend_entry, law_status in session.query(
+            self.legend_entry_model,
+            distinct_legend_entries.c.law_status
+        ).join(
+            distinct_legend_entries,
+            distinct_legend_entries.c.legend_entry_id == self.legend_entry_model.t_id
+        ).all():
+            legend_entries_by_law_status[law_status].append(legend_entry)
+        return legend_entries_by_law_status
 
     def read(self, params, real_estate, bbox):
         """
@@ -506,7 +610,7 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         if Config.availability_by_theme_code_municipality_fosnr(self._plr_info['code'], real_estate.fosnr):
             session = self._adapter_.get_session(self._key_)
             try:
-                if session.query(self._model_).count() == 0:
+                if self.is_empty(session):
                     # We can stop here already because there are no items in the database
                     self.records = [EmptyPlrRecord(
                             Config.get_theme_by_code_sub_code(self._plr_info['code'])
@@ -515,10 +619,18 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
                     # We need to investigate more in detail
 
                     # Try to find geometries which have spatial relation with real estate
-                    geometry_results = self.collect_related_geometries_by_real_estate(
-                        session, real_estate
-                    )
-                    if len(geometry_results) == 0:
+                    if self._measure_in_database_:
+                        public_law_restrictions, geometry_records = \
+                            self.collect_measured_public_law_restrictions(
+                                session, real_estate, params.with_geometry
+                            )
+                    else:
+                        public_law_restrictions = [
+                            geometry_result.public_law_restriction for geometry_result in
+                            self.collect_related_geometries_by_real_estate(session, real_estate)
+                        ]
+                        geometry_records = None
+                    if len(public_law_restrictions) == 0:
                         # We checked if there are spatially related elements in database. But there is none.
                         # So we can stop here.
                         self.records = [EmptyPlrRecord(
@@ -529,27 +641,26 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
                         # information related to the found geometries.
                         law_status_of_geometry = []
                         # get distinct values of law_status for all geometries found
-                        for geometry in geometry_results:
-                            if(geometry.public_law_restriction.law_status not in law_status_of_geometry):
-                                law_status_of_geometry.append(geometry.public_law_restriction.law_status)
-
-                        legend_entries_from_db = []
-                        # get legend_entries per law_status
-                        for law_status in law_status_of_geometry:
-                            legend_entry_with_law_status = [
-                                self.collect_legend_entries_by_bbox(session, bbox, law_status),
-                                law_status
-                            ]
-                            legend_entries_from_db.append(legend_entry_with_law_status)
+                        for public_law_restriction in public_law_restrictions:
+                            if public_law_restriction.law_status not in law_status_of_geometry:
+                                law_status_of_geometry.append(public_law_restriction.law_status)
+
+                        # get legend_entries for all law_status at once
+                        legend_entries_from_db = self.collect_legend_entries_by_bbox_and_law_status(
+                            session,
+                            bbox,
+                            law_status_of_geometry
+                        )
 
                         self.records = []
-                        for geometry_result in geometry_results:
+                        for public_law_restriction in public_law_restrictions:
                             self.records.append(
                                 self.from_db_to_plr_record(
                                     params,
-                                    geometry_result.public_law_restriction,
-                                    next(elem for elem in legend_entries_from_db
-                                         if elem[1] == geometry_result.public_law_restriction.law_status)[0]
+                                    public_law_restriction,
+                                    legend_entries_from_db[public_law_restriction.law_status],
+                                    None if geometry_records is None else
+                                    geometry_records[public_law_restriction.t_id]
                                 )
                             )
 
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Measurement of the PLR geometries by the database. Instead of loading all geometries of the related public
+law restrictions and intersecting them with the real estate in Python, the database computes the
+intersection, the area, the length and the number of points per geometry, applies the thresholds of the
+theme and only returns the qualifying geometries with their shares.
+
+The mode is enabled per theme by the `measure_in_database` parameter of the source:
+
+.. code-block:: yaml
+
+    source:
+      class: pyramid_oereb.contrib.data_sources.standard.sources.plr.DatabaseSource
+      params:
+        db_connection: ...
+        model_factory: ...
+        schema_name: land_use_plans
+        measure_in_database: true
+
+The computation follows :meth:`pyramid_oereb.core.records.geometry.GeometryRecord.calculate`: multi
+geometries are split into their parts, the limit is buffered by the tolerance (with the same number of
+segments per quarter circle as Shapely) and only the parts of the intersection with the dimension of the
+geometry are measured. The geometries are only transferred if the extract is requested with geometries.
+"""
+import logging
+
+from shapely import wkb
+from shapely.geometry import LineString, Point, Polygon
+from sqlalchemy import and_, func, null, or_
+
+from pyramid_oereb import Config
+from pyramid_oereb.core.records.geometry import MeasuredGeometryRecord
+from pyramid_oereb.contrib.data_sources.prepared_geometry import get_prepared_geometry
+
+log = logging.getLogger(__name__)
+
+EMPTY_GEOMETRIES = {
+    0: Point,
+    1: LineString,
+    2: Polygon
+}
+
+
+def get_measurement_query(session, model, geometry, spatial_filter, real_estate, tolerance, thresholds,
+                          with_geometry):
+    """
+    Returns the query measuring the geometries of a theme against a real estate.
+
+    Args:
+        session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+        model (sqlalchemy.ext.declarative.DeclarativeMeta): The geometry model of the theme.
+        geometry (sqlalchemy.sql.expression.ColumnElement): The geometry column (or expression) of the
+            model.
+        spatial_filter (sqlalchemy.sql.elements.ClauseElement): The filter selecting the geometries related
+            with the real estate.
+        real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate.
+        tolerance (float or None): The tolerance of the theme.
+        thresholds (dict): The thresholds of the theme.
+        with_geometry (bool): True to transfer the geometries of the qualifying parts.
+
+    Returns:
+        sqlalchemy.orm.Query: The query returning `public_law_restriction_id`, `law_status`,
+        `published_from`, `published_until`, `geo_metadata`, `dimension`, `area`, `length`, `nr_of_points`
+        and `geom` (WKB or None) of the qualifying parts ordered by the public law restriction.
+    """
+    # The spatial filter binds the same prepared limit, so the statement contains it once
+    limit = get_prepared_geometry(real_estate.limit).bind()
+    if tolerance is not None:
+        limit = func.ST_Buffer(limit, tolerance, 'quad_segs=16')
+    parts = session.query(
+        model.public_law_restriction_id.label('public_law_restriction_id'),
+        model.law_status.label('law_status'),
+        model.published_from.label('published_from'),
+        model.published_until.label('published_until'),
+        model.geo_metadata.label('geo_metadata'),
+        func.ST_Dump(geometry).geom.label('geom')
+    ).filter(spatial_filter).subquery()
+    dimension = func.ST_Dimension(parts.c.geom)
+    measured = session.query(
+        parts,
+        dimension.label('dimension'),
+        func.ST_CollectionExtract(func.ST_Intersection(parts.c.geom, limit), dimension + 1).label(
+            'intersection'
+        )
+    ).subquery()
+    area = func.ST_Area(measured.c.intersection)
+    length = func.ST_Length(measured.c.intersection)
+    return session.query(
+        measured.c.public_law_restriction_id,
+        measured.c.law_status,
+        measured.c.published_from,
+        measured.c.published_until,
+        measured.c.geo_metadata,
+        measured.c.dimension,
+        area.label('area'),
+        length.label('length'),
+        func.ST_NumGeometries(measured.c.intersection).label('nr_of_points'),
+        (func.ST_AsBinary(measured.c.geom) if with_geometry else null()).label('geom')
+    ).filter(
+        ~func.ST_IsEmpty(measured.c.intersection)
+    ).filter(
+        or_(
+            measured.c.dimension == 0,
+            and_(measured.c.dimension == 1, length >= thresholds.get('length').get('limit')),
+            and_(
+                measured.c.dimension == 2,
+                area / real_estate.areas_ratio >= thresholds.get('area').get('limit')
+            )
+        )
+    ).order_by(measured.c.public_law_restriction_id)
+
+
+def from_db_to_measured_geometry_records(theme_code, measured_geometries):
+    """
+    Creates the geometry records from the result of the measurement query.
+
+    Args:
+        theme_code (str): The code of the theme.
+        measured_geometries (list): The rows returned by the query of :func:`get_measurement_query`.
+
+    Returns:
+        dict: The list of :class:`pyramid_oereb.core.records.geometry.MeasuredGeometryRecord` per public
+        law restriction id, in the order of the rows.
+    """
+    geometry_records = dict()
+    for row in measured_geometries:
+        if row.geom is None:
+            geom = EMPTY_GEOMETRIES[row.dimension]()
+        else:
+            geom = wkb.loads(bytes(row.geom))
+        geometry_records.setdefault(row.public_law_restriction_id, []).append(MeasuredGeometryRecord(
+            Config.get_law_status_by_data_code(theme_code, row.law_status),
+            row.published_from,
+            row.published_until,
+            geom,
+            row.geo_metadata,
+            dimension=row.dimension,
+            area=row.area,
+            length=row.length,
+            nr_of_points=row.nr_of_points
+        ))
+    return geometry_records
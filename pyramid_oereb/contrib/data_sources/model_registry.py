@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+A process wide registry for the sets of SQLAlchemy models which are produced by the model factories of the
+data sources (e.g. :func:`pyramid_oereb.contrib.data_sources.standard.models.theme.model_factory_string_pk`).
+
+Every call of a model factory creates a new declarative base and maps all its classes again. This is
+expensive and leads to several classes mapped on the same table. The registry builds each set of models
+only once and hands out the same instance to all sources, hook methods and requests asking for it.
+"""
+import logging
+import threading
+import tracemalloc
+
+from timeit import default_timer as timer
+
+from pyramid.path import DottedNameResolver
+from sqlalchemy.orm import configure_mappers
+
+log = logging.getLogger(__name__)
+
+_models = dict()
+_statistics = dict()
+_lock = threading.Lock()
+
+
+def get_models(model_factory_path, schema_name, geometry_type, srid, db_connection):
+    """
+    Returns the set of models produced by the model factory for the passed arguments. The models are built
+    only on the first call for a distinct combination of the arguments, every following call returns the
+    already built instance.
+
+    Args:
+        model_factory_path (str): The dotted path to the model factory function.
+        schema_name (str): The name of the database schema where the models belong to.
+        geometry_type (str): The geoalchemy geometry type defined as well known string.
+        srid (int): The SRID defining the projection of the geometries.
+        db_connection (str): The db connection string.
+
+    Returns:
+        object: The produced set of models (e.g.
+        pyramid_oereb.contrib.data_sources.standard.models.theme.Models).
+    """
+    key = (model_factory_path, schema_name, geometry_type, srid, db_connection)
+    models = _models.get(key)
+    if models is None:
+        with _lock:
+            models = _models.get(key)
+            if models is None:
+                models = _build_models(key)
+                _models[key] = models
+    return models
+
+
+def _build_models(key):
+    """
+    Builds the set of models for the passed registry key and configures its mappers. The time and the
+    memory spent are kept as statistics and logged.
+
+    Args:
+        key (tuple): The registry key in the form (model_factory_path, schema_name, geometry_type, srid,
+            db_connection).
+
+    Returns:
+        object: The produced set of models.
+    """
+    model_factory_path, schema_name, geometry_type, srid, db_connection = key
+    model_factory = DottedNameResolver().resolve(model_factory_path)
+
+    trace_memory = not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    start_time = timer()
+    models = model_factory(schema_name, geometry_type, srid, db_connection)
+    build_time = timer()
+    configure_mappers()
+    end_time = timer()
+    memory = tracemalloc.get_traced_memory()[0] - memory_before
+    if trace_memory:
+        tracemalloc.stop()
+
+    _statistics[key] = {
+        'build_time': build_time - start_time,
+        'mapper_configuration_time': end_time - build_time,
+        'memory': memory
+    }
+    log.info(
+        'Built models of schema "{}" with {}: {:.3f}s for building, {:.3f}s for mapper configuration, '
+        '{:.1f} KiB of memory'.format(
+            schema_name,
+            model_factory_path,
+            build_time - start_time,
+            end_time - build_time,
+            memory / 1024.0
+        )
+    )
+    return models
+
+
+def get_statistics():
+    """
+    Returns the statistics gathered while building the models.
+
+    Returns:
+        dict: The statistics keyed like the registry. Every entry contains the `build_time` and
+        `mapper_configuration_time` in seconds and the `memory` allocated in bytes.
+    """
+    return dict(_statistics)
+
+
+def clear():
+    """
+    Removes all models and statistics from the registry. The models itself are not disposed, sources
+    which hold them keep working.
+    """
+    with _lock:
+        _models.clear()
+        _statistics.clear()
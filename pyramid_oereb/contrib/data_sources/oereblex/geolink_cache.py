@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+An optional cache for the documents received from OEREBlex. Without it, every extract requests and parses the
+geoLinks of all its restrictions again, even if they were just requested for the previous extract.
+
+The parsed documents are cached by the URL of the geoLink (containing its ID, the service depending on the
+law status and the additional URL parameters) and the requested language. They are delivered without
+request for `ttl` seconds. Afterwards the geoLink is revalidated with a conditional request
+(`If-None-Match` / `If-Modified-Since`), the cached documents are kept if OEREBlex answers with
+`304 Not Modified`.
+
+The documents are kept by a backend of the extract cache (see :mod:`pyramid_oereb.core.extract_cache`), the
+:class:`pyramid_oereb.core.extract_cache.FileBackend` keeps them in a local directory which survives
+restarts and can be shared by several processes.
+
+.. code-block:: yaml
+
+    oereblex:
+      cache:
+        enabled: true
+        # Seconds the documents are delivered without revalidation (default: 300)
+        ttl: 300
+        backend:
+          class: pyramid_oereb.core.extract_cache.FileBackend
+          params:
+            path: /var/cache/pyramid_oereb/oereblex
+            max_entries: 10000
+"""
+import logging
+import threading
+import time
+
+import requests
+from pyramid.path import DottedNameResolver
+
+from pyramid_oereb.core.tracing import trace
+
+log = logging.getLogger(__name__)
+
+
+class GeolinkCache(object):
+    """
+    Caches the parsed documents of the OEREBlex geoLinks.
+    """
+
+    def __init__(self, backend, ttl=300):
+        """
+        Args:
+            backend (pyramid_oereb.core.extract_cache.BaseBackend): The backend keeping the documents.
+            ttl (int): The seconds the documents are delivered without revalidation.
+        """
+        self._backend_ = backend
+        self._ttl_ = ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(url, language):
+        """
+        Returns the cache key of a geoLink.
+
+        Args:
+            url (str): The URL of the geoLink.
+            language (str): The requested language.
+
+        Returns:
+            str: The cache key.
+        """
+        return repr((url, language))
+
+    def get_documents(self, parse, url, language, get=requests.get, **kwargs):
+        """
+        Returns the parsed documents of a geoLink, from the cache if possible.
+
+        Args:
+            parse (callable): Parses the received content to the list of documents, e.g.
+                :meth:`geolink_formatter.XML.from_string`.
+            url (str): The URL of the geoLink.
+            language (str): The requested language.
+            get (callable): Sends the GET request, :func:`requests.get` or the one of a session.
+            **kwargs: Optional arguments passed to `get`, e.g. `proxies` or `auth`.
+
+        Returns:
+            list of geolink_formatter.entity.Document: The parsed documents.
+
+        Raises:
+            requests.HTTPError: Raised on failed HTTP request.
+        """
+        key = self.get_key(url, language)
+        entry = self._backend_.get(key)
+        if entry is not None and time.time() - entry['created'] <= self._ttl_:
+            self.hits += 1
+            trace(log, 'Delivering cached geoLink', key=key)
+            return entry['documents']
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        response = get(url, params={'locale': language}, headers=headers, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.revalidations += 1
+            trace(log, 'Revalidated cached geoLink', key=key)
+            documents = entry['documents']
+        elif response.status_code == 200:
+            self.misses += 1
+            documents = parse(response.content)
+        else:
+            response.raise_for_status()
+            return []
+        self._backend_.set(key, {
+            'documents': documents,
+            'etag': response.headers.get('ETag') or (entry or {}).get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or (entry or {}).get('last_modified'),
+            'tags': {},
+            'created': time.time()
+        })
+        return documents
+
+    def get_statistics(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: The number of `hits`, `revalidations`, `misses`, `evictions` and cached `entries` and the
+            `hit_rate`, the share of the geoLinks delivered without downloading them again.
+        """
+        requests_count = self.hits + self.revalidations + self.misses
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.revalidations) / requests_count if requests_count else None,
+            'evictions': self._backend_.evictions,
+            'entries': len(self._backend_)
+        }
+
+
+def create_geolink_cache(cache_config):
+    """
+    Creates the geoLink cache from its configuration.
+
+    Args:
+        cache_config (dict): The `cache` settings of the `oereblex` section.
+
+    Returns:
+        GeolinkCache: The geoLink cache.
+    """
+    backend_config = cache_config.get('backend') or {}
+    backend_class = DottedNameResolver().maybe_resolve(
+        backend_config.get('class', 'pyramid_oereb.core.extract_cache.MemoryBackend')
+    )
+    backend = backend_class(**(backend_config.get('params') or {}))
+    return GeolinkCache(backend, ttl=cache_config.get('ttl', 300))
+
+
+_geolink_cache = None
+_geolink_cache_lock = threading.Lock()
+
+
+def get_geolink_cache(cache_config):
+    """
+    Returns the process wide geoLink cache.
+
+    Args:
+        cache_config (dict or None): The `cache` settings of the `oereblex` section.
+
+    Returns:
+        GeolinkCache or None: The geoLink cache or None if it is not enabled.
+    """
+    global _geolink_cache
+    if not (cache_config or {}).get('enabled', False):
+        return None
+    if _geolink_cache is None:
+        with _geolink_cache_lock:
+            if _geolink_cache is None:
+                _geolink_cache = create_geolink_cache(cache_config)
+    return _geolink_cache
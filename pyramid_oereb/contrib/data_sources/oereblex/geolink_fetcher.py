@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Downloads the OEREBlex geoLinks. All downloads of the application share one pooled HTTP session, so the
+connections to OEREBlex are kept alive and reused. The geoLinks of all restrictions of a theme are collected
+before the restrictions are read and downloaded in parallel, so the latency of OEREBlex is added once per
+theme and not once per restriction.
+
+The download can be configured in the `oereblex` section of the configuration:
+
+.. code-block:: yaml
+
+    oereblex:
+      download:
+        # Maximum number of geoLinks downloaded at the same time (default: 8)
+        max_workers: 8
+        # Seconds to wait for OEREBlex to connect and to send data (default: 30)
+        timeout: 30
+        # Number of retries on connection errors and on the status codes 502, 503 and 504 (default: 2)
+        retries: 2
+        # Factor of the exponential delay between the retries in seconds (default: 0.2)
+        backoff_factor: 0.2
+"""
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger(__name__)
+
+
+class GeolinkFetcher(object):
+    """
+    Downloads geoLinks through a pooled HTTP session.
+
+    Attributes:
+        RETRY_STATUS_CODES (tuple of int): The HTTP status codes which are retried.
+    """
+
+    RETRY_STATUS_CODES = (502, 503, 504)
+
+    def __init__(self, max_workers=8, timeout=30, retries=2, backoff_factor=0.2):
+        """
+        Args:
+            max_workers (int): The maximum number of parallel downloads. It is also the size of the
+                connection pool per host.
+            timeout (float): The seconds to wait for OEREBlex to connect and to send data.
+            retries (int): The number of retries on connection errors and retried status codes.
+            backoff_factor (float): The factor of the exponential delay between the retries.
+        """
+        self._timeout_ = timeout
+        self._session_ = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=self.RETRY_STATUS_CODES,
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+        )
+        self._session_.mount('http://', adapter)
+        self._session_.mount('https://', adapter)
+        self._executor_ = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='pyramid_oereb_oereblex'
+        )
+
+    def get(self, url, **kwargs):
+        """
+        Sends a GET request through the pooled session, with the configured timeout.
+
+        Args:
+            url (str): The URL.
+            **kwargs: Optional arguments of :meth:`requests.Session.get`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs.setdefault('timeout', self._timeout_)
+        return self._session_.get(url, **kwargs)
+
+    def get_documents(self, parse, url, language, **kwargs):
+        """
+        Downloads and parses a geoLink, like :meth:`geolink_formatter.XML.from_url`.
+
+        Args:
+            parse (callable): Parses the received content to the list of documents.
+            url (str): The URL of the geoLink.
+            language (str): The requested language.
+            **kwargs: Optional arguments of :meth:`requests.Session.get`, e.g. `proxies` or `auth`.
+
+        Returns:
+            list of geolink_formatter.entity.Document: The parsed documents.
+
+        Raises:
+            requests.HTTPError: Raised on failed HTTP request.
+        """
+        response = self.get(url, params={'locale': language}, **kwargs)
+        if response.status_code == 200:
+            return parse(response.content)
+        response.raise_for_status()
+        return []
+
+    def map(self, function, items):
+        """
+        Calls the passed function for all items in parallel.
+
+        Args:
+            function (callable): The function called with every item.
+            items (list): The distinct items.
+
+        Returns:
+            dict: The result or the raised exception for every item.
+        """
+        if len(items) < 2:
+            futures = None
+        else:
+            futures = {item: self._executor_.submit(function, item) for item in items}
+        results = dict()
+        for item in items:
+            try:
+                results[item] = function(item) if futures is None else futures[item].result()
+            except Exception as e:
+                results[item] = e
+        return results
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher(settings=None):
+    """
+    Returns the process wide geoLink fetcher. It is created on the first call using the passed settings.
+
+    Args:
+        settings (dict or None): The `download` settings of the `oereblex` section.
+
+    Returns:
+        GeolinkFetcher: The geoLink fetcher.
+    """
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                settings = settings or {}
+                _fetcher = GeolinkFetcher(
+                    max_workers=settings.get('max_workers', 8),
+                    timeout=settings.get('timeout', 30),
+                    retries=settings.get('retries', 2),
+                    backoff_factor=settings.get('backoff_factor', 0.2)
+                )
+    return _fetcher
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
 
 import datetime
 from pyramid_oereb.core.config import Config
 from geolink_formatter import XML
 from requests.auth import HTTPBasicAuth
 
+from pyramid_oereb.contrib.data_sources.oereblex.geolink_cache import get_geolink_cache
+from pyramid_oereb.contrib.data_sources.oereblex.geolink_fetcher import get_fetcher
 from pyramid_oereb.core.records.documents import DocumentRecord
 from pyramid_oereb.core.records.office import OfficeRecord
 from pyramid_oereb.core.sources import Base
+from pyramid_oereb.core.tracing import trace
 
 
 log = logging.getLogger(__name__)
@@ -40,6 +44,10 @@ class OEREBlexSource(Base):
             code (str): The official code. Regarding to the federal specifications.
             use_prepubs (bool): If true and the law status is not "inForce", the prepubs URL will be
                 used. Default is false.
+            cache (dict): Optional configuration of the cache shared by all sources, see
+                :mod:`pyramid_oereb.contrib.data_sources.oereblex.geolink_cache`.
+            download (dict): Optional configuration of the downloads shared by all sources, see
+                :mod:`pyramid_oereb.contrib.data_sources.oereblex.geolink_fetcher`.
 
         """
         super(OEREBlexSource, self).__init__()
@@ -53,6 +61,9 @@ class OEREBlexSource(Base):
         self._proxies = kwargs.get('proxy')
         self._code = kwargs.get('code')
         self._use_prepubs = kwargs.get('use_prepubs')
+        self._cache = get_geolink_cache(kwargs.get('cache'))
+        self._fetcher = get_fetcher(kwargs.get('download'))
+        self._prefetched = {}
 
         log.debug('Use prepubs: {0}'.format(self._use_prepubs))
 
@@ -81,6 +92,8 @@ class OEREBlexSource(Base):
         else:
             xsd_validation = True
         self._parser = XML(host_url=kwargs.get('host'), version=self._version, xsd_validation=xsd_validation)
+        # The downloads run in parallel, the XML schema of the parser must not be used by several threads
+        self._parser_lock = threading.Lock()
         if self._parser.host_url is None:
             raise AssertionError('host_url has to be defined')
 
@@ -94,18 +107,29 @@ class OEREBlexSource(Base):
                     raise AssertionError('url_param_config list entry is of wrong type {},'
                                          ' should be dictionary'.format(type(list_entry)))
 
-    def read(self, params, geolink_id, law_status, oereblex_params=None):
+    def copy_for_request(self):
         """
-        Requests the geoLink for the specified ID and returns records for the received documents.
+        Returns a request bound copy of this source, without the prefetched documents.
+
+        Returns:
+            OEREBlexSource: The request bound copy of this source.
+        """
+        source = super(OEREBlexSource, self).copy_for_request()
+        source._prefetched = {}
+        return source
+
+    def get_url(self, geolink_id, law_status, oereblex_params=None):
+        """
+        Returns the URL of a geoLink.
 
         Args:
-            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
             geolink_id (int): The geoLink ID.
             law_status (pyramid_oereb.core.records.lawstatus.LawStatusRecord): The restriction's law status.
             oereblex_params (string or None): Any additional parameters to pass to Oereblex
-        """
-        log.debug("read() start for geolink_id {}, oereblex_params {}".format(geolink_id, oereblex_params))
 
+        Returns:
+            str: The URL.
+        """
         if self._use_prepubs and law_status.code != 'inForce':
             service = 'prepubs'
         else:
@@ -115,8 +139,7 @@ class OEREBlexSource(Base):
         if oereblex_params:
             url_base = url_base + '?' + oereblex_params
 
-        # Request documents
-        url = url_base.format(
+        return url_base.format(
             host=self._parser.host_url,
             version=self._version + '/' if self._pass_version else '',
             service=service,
@@ -124,12 +147,61 @@ class OEREBlexSource(Base):
             url_params=oereblex_params
         )
 
+    def prefetch(self, params, geolinks):
+        """
+        Downloads the passed geoLinks in parallel, they are used by the following calls of :meth:`read`.
+        Every distinct geoLink is downloaded only once.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            geolinks (list of tuple): The geoLink ID, the law status and the additional parameters
+                (see :meth:`read`) of the geoLinks to download.
+        """
+        language = params.language or self._language
+        urls = []
+        for geolink_id, law_status, oereblex_params in geolinks:
+            url = self.get_url(geolink_id, law_status, oereblex_params)
+            if url not in urls:
+                urls.append(url)
+        trace(log, 'prefetch() start', count=len(urls))
+        self._prefetched = self._fetcher.map(lambda url: self._get_documents(url, language), urls)
+        log.debug('prefetch() done.')
+
+    def _get_documents(self, url, language):
+        if self._cache is None:
+            return self._fetcher.get_documents(
+                self._parse, url, language, proxies=self._proxies, auth=self._auth
+            )
+        return self._cache.get_documents(
+            self._parse, url, language, get=self._fetcher.get, proxies=self._proxies, auth=self._auth
+        )
+
+    def _parse(self, content):
+        with self._parser_lock:
+            return self._parser.from_string(content)
+
+    def read(self, params, geolink_id, law_status, oereblex_params=None):
+        """
+        Requests the geoLink for the specified ID and returns records for the received documents.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            geolink_id (int): The geoLink ID.
+            law_status (pyramid_oereb.core.records.lawstatus.LawStatusRecord): The restriction's law status.
+            oereblex_params (string or None): Any additional parameters to pass to Oereblex
+        """
+        trace(log, 'read() start', geolink_id=geolink_id, oereblex_params=oereblex_params)
+
+        # Request documents
+        url = self.get_url(geolink_id, law_status, oereblex_params)
         language = params.language or self._language
-        request_params = {
-            'locale': language
-        }
-        log.debug("read() getting documents, url: {}, parser: {}".format(url, self._parser))
-        documents = self._parser.from_url(url, request_params, proxies=self._proxies, auth=self._auth)
+        if url in self._prefetched:
+            documents = self._prefetched[url]
+            if isinstance(documents, Exception):
+                raise documents
+        else:
+            trace(log, 'read() getting documents', url=url, parser=self._parser)
+            documents = self._get_documents(url, language)
         log.debug("read() got documents")
 
         # Convert to records
@@ -4,6 +4,7 @@ import logging
 from pyramid_oereb import Config
 from pyramid_oereb.contrib.data_sources.oereblex.sources.document import OEREBlexSource
 from pyramid_oereb.contrib.data_sources.standard.sources.plr import DatabaseSource
+from pyramid_oereb.core.tracing import trace
 from sqlalchemy.orm import selectinload
 
 log = logging.getLogger(__name__)
@@ -41,6 +42,19 @@ class DatabaseOEREBlexSource(DatabaseSource):
         self._oereblex_source = OEREBlexSource(**config)
         self._queried_geolinks = {}
 
+    def copy_for_request(self):
+        """
+        Returns a request bound copy of this source. The OEREBlex document source and the already queried
+        geoLinks are request related and therefore not shared with the copy.
+
+        Returns:
+            DatabaseOEREBlexSource: The request bound copy of this source.
+        """
+        source = super(DatabaseOEREBlexSource, self).copy_for_request()
+        source._oereblex_source = self._oereblex_source.copy_for_request()
+        source._queried_geolinks = {}
+        return source
+
     @staticmethod
     def get_config_value_for_plr_code(url_param_config, plr_code):
         """
@@ -67,18 +81,51 @@ class DatabaseOEREBlexSource(DatabaseSource):
             list of pyramid_oereb.core.records.documents.DocumentRecord: The documents created from
                 the parsed OEREBlex response.
         """
-        oereblex_params = None
-        url_param_config = self._oereblex_source._url_param_config
-        plr_code = self._plr_info.get('code')
-        if url_param_config:
-            oereblex_params = DatabaseOEREBlexSource.get_config_value_for_plr_code(url_param_config, plr_code)
+        oereblex_params = self.get_oereblex_params()
         law_status = Config.get_law_status_by_data_code(
-            plr_code,
+            self._plr_info.get('code'),
             public_law_restriction_from_db.law_status
         )
         return self.document_records_from_oereblex(params, public_law_restriction_from_db.geolink,
                                                    law_status, oereblex_params)
 
+    def get_oereblex_params(self):
+        """
+        Returns the additional URL parameters configured for the topic of this source.
+
+        Returns:
+            str or None: The URL parameters to add to the OEREBlex request.
+        """
+        url_param_config = self._oereblex_source._url_param_config
+        if url_param_config:
+            return DatabaseOEREBlexSource.get_config_value_for_plr_code(
+                url_param_config,
+                self._plr_info.get('code')
+            )
+        return None
+
+    def prefetch_documents(self, params, public_law_restrictions):
+        """
+        Downloads the geoLinks of all passed public law restrictions in parallel, except the ones queried
+        for this request already.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            public_law_restrictions (list): The public law restrictions in their database representation.
+        """
+        oereblex_params = self.get_oereblex_params()
+        geolinks = []
+        for public_law_restriction in public_law_restrictions:
+            law_status = Config.get_law_status_by_data_code(
+                self._plr_info.get('code'),
+                public_law_restriction.law_status
+            )
+            identifier = '{}{}{}'.format(public_law_restriction.geolink, law_status.code, params.language)
+            if identifier not in self._queried_geolinks:
+                geolinks.append((public_law_restriction.geolink, law_status, oereblex_params))
+        if len(geolinks) > 0:
+            self._oereblex_source.prefetch(params, geolinks)
+
     def document_records_from_oereblex(self, params, geolink, law_status, oereblex_params):
         """
         Create document records parsed from the OEREBlex response with the specified geoLink ID and appends
@@ -94,32 +141,30 @@ class DatabaseOEREBlexSource(DatabaseSource):
             list of pyramid_oereb.core.records.documents.DocumentRecord:
                 The documents created from the parsed OEREBlex response.
         """
-        log.debug("document_records_from_oereblex() start, GEO-Link {}, law status {}, oereblex_params {}"
-                  .format(geolink, law_status.code, oereblex_params))
+        trace(log, 'document_records_from_oereblex() start', geolink=geolink, law_status=law_status.code,
+              oereblex_params=oereblex_params)
         identifier = '{}{}{}'.format(geolink, law_status.code, params.language)
         if identifier in self._queried_geolinks:
-            log.debug('skip querying this geolink "{}" because it was fetched already.'.format(identifier))
-            log.debug('use already queried instead')
+            trace(log, 'skip querying this geolink because it was fetched already', identifier=identifier)
         else:
             self._oereblex_source.read(params, geolink, law_status, oereblex_params)
-            log.debug("document_records_from_oereblex() returning {} records"
-                      .format(len(self._oereblex_source.records)))
+            trace(log, 'document_records_from_oereblex() returning records',
+                  count=len(self._oereblex_source.records))
             self._queried_geolinks[identifier] = self._oereblex_source.records
         return self._queried_geolinks[identifier]
 
-    def collect_related_geometries_by_real_estate(self, session, real_estate):
+    def collect_related_geometries_by_limit(self, session, limit):
         """
-        Extracts all geometries in the topic which have spatial relation with the passed real estate
+        Extracts all geometries in the topic which have spatial relation with the passed limit
 
         Args:
             session (sqlalchemy.orm.Session): The requested clean session instance ready for use
-            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
-                estate in its record representation.
+            limit (shapely.geometry.base.BaseGeometry): The geometry used as spatial filter.
 
         Returns:
             list: The result of the related geometries unique by the public law restriction id
         """
-        return self.handle_collection(session, real_estate.limit).distinct(
+        return self.handle_collection(session, limit).distinct(
             self._model_.public_law_restriction_id
         ).options(
             selectinload(self.models.Geometry.public_law_restriction)
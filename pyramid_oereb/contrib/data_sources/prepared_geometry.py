@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Preparation of the geometries used as spatial filter in the database queries of the sources, usually the
+limit of the real estate. Parcels like forests, lakes or roads can have tens of thousands of vertices and
+are used in the queries of every theme, so the geometry is:
+
+* serialized once to WKB and shared by the queries of all themes,
+* bound as parameter instead of being inlined into the SQL text (the size of the statements does not
+  depend on the complexity of the geometry),
+* combined with a bounding box prefilter (`&&`) in every spatial clause, which lets the database use the
+  spatial index also for clauses on expressions of the column (e.g. `ST_CollectionExtract`).
+
+.. code-block:: python
+
+    prepared = get_prepared_geometry(real_estate.limit)
+    session.query(model).filter(prepared.get_filter(model.geom, tolerance))
+"""
+import logging
+import threading
+
+from collections import OrderedDict
+
+from sqlalchemy import LargeBinary, and_, bindparam, func
+
+from pyramid_oereb import Config
+
+log = logging.getLogger(__name__)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = 16
+
+
+class PreparedGeometry(object):
+    """
+    A geometry serialized to WKB to be bound in spatial clauses.
+    """
+
+    def __init__(self, geometry, srid):
+        """
+        Args:
+            geometry (shapely.geometry.base.BaseGeometry): The geometry.
+            srid (int): The spatial reference system of the geometry.
+        """
+        self.geometry = geometry
+        self.srid = srid
+        self.wkb = geometry.wkb
+        self.bounds = geometry.bounds
+
+    def bind(self, name='geometry'):
+        """
+        Returns the geometry as bound parameter. All clauses of a statement binding the geometry under the
+        same name share one parameter, different geometries in the same statement need different names.
+
+        Args:
+            name (str): The name of the parameter.
+
+        Returns:
+            sqlalchemy.sql.functions.Function: The geometry expression.
+        """
+        return func.ST_GeomFromWKB(bindparam(name, self.wkb, type_=LargeBinary), self.srid)
+
+    def get_envelope(self, tolerance=None):
+        """
+        Returns the bounding box of the geometry, expanded by the tolerance.
+
+        Args:
+            tolerance (float or None): The tolerance.
+
+        Returns:
+            sqlalchemy.sql.functions.Function: The envelope expression.
+        """
+        expansion = tolerance or 0
+        min_x, min_y, max_x, max_y = self.bounds
+        return func.ST_MakeEnvelope(
+            min_x - expansion, min_y - expansion, max_x + expansion, max_y + expansion, self.srid
+        )
+
+    def get_prefilter(self, column, tolerance=None):
+        """
+        Returns the bounding box prefilter of the passed geometry column.
+
+        Args:
+            column (sqlalchemy.sql.expression.ColumnElement): The geometry column.
+            tolerance (float or None): The tolerance.
+
+        Returns:
+            sqlalchemy.sql.elements.BinaryExpression: The `&&` clause.
+        """
+        return column.op('&&')(self.get_envelope(tolerance))
+
+    def get_relation(self, geometry, tolerance=None, name='geometry'):
+        """
+        Returns the exact spatial relation of the passed geometry expression with the prepared geometry,
+        without prefilter.
+
+        Args:
+            geometry (sqlalchemy.sql.expression.ColumnElement): The geometry expression.
+            tolerance (float or None): The tolerance, the geometries intersect if it is None, otherwise
+                they are within the tolerance distance.
+            name (str): The name of the parameter of the prepared geometry.
+
+        Returns:
+            sqlalchemy.sql.elements.ClauseElement: The clause.
+        """
+        if tolerance is None:
+            return func.ST_Intersects(geometry, self.bind(name))
+        # Unlike a comparison of ST_Distance, ST_DWithin can be answered by the spatial index
+        return func.ST_DWithin(geometry, self.bind(name), tolerance)
+
+    def get_filter(self, column, tolerance=None, name='geometry'):
+        """
+        Returns the spatial filter of the passed geometry column, consisting of the bounding box prefilter
+        and the exact spatial relation.
+
+        Args:
+            column (sqlalchemy.sql.expression.ColumnElement): The geometry column.
+            tolerance (float or None): The tolerance, the geometries intersect if it is None.
+            name (str): The name of the parameter of the prepared geometry.
+
+        Returns:
+            sqlalchemy.sql.elements.BooleanClauseList: The clause.
+        """
+        return and_(
+            self.get_prefilter(column, tolerance),
+            self.get_relation(column, tolerance, name)
+        )
+
+
+def get_prepared_geometry(geometry, srid=None):
+    """
+    Returns the prepared form of the passed geometry. The last prepared geometries are kept, so the queries
+    of all themes for the same real estate share it.
+
+    Args:
+        geometry (shapely.geometry.base.BaseGeometry or PreparedGeometry): The geometry.
+        srid (int or None): The spatial reference system, defaults to the configured one.
+
+    Returns:
+        PreparedGeometry: The prepared geometry.
+    """
+    if isinstance(geometry, PreparedGeometry):
+        return geometry
+    if srid is None:
+        srid = Config.get('srid')
+    # The cache holds a reference to the geometry, so its id can not be reused while it is cached
+    key = (id(geometry), srid)
+    with _cache_lock:
+        prepared = _cache.get(key)
+        if prepared is not None and prepared.geometry is geometry:
+            _cache.move_to_end(key)
+            return prepared
+    prepared = PreparedGeometry(geometry, srid)
+    with _cache_lock:
+        _cache[key] = prepared
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return prepared
@@ -2,10 +2,12 @@
 import logging
 import importlib
 
-from geoalchemy2.shape import to_shape, from_shape
+from geoalchemy2.shape import to_shape
 from shapely.geometry import Point, LineString, Polygon, MultiPoint, MultiLineString, MultiPolygon, \
     GeometryCollection
-from sqlalchemy import text, or_
+from shapely.ops import unary_union
+from shapely.prepared import prep
+from sqlalchemy import and_, func, literal_column, or_
 from sqlalchemy.orm import selectinload
 
 from pyramid_oereb import Config
@@ -15,6 +17,10 @@ from pyramid_oereb.core.records.plr import EmptyPlrRecord
 from pyramid_oereb.core.sources import BaseDatabaseSource
 from pyramid_oereb.core.sources.plr import PlrBaseSource
 from pyramid_oereb.contrib import eliminate_duplicated_document_records
+from pyramid_oereb.contrib.data_sources import model_registry
+from pyramid_oereb.contrib.data_sources.measurement import get_measurement_query, \
+    from_db_to_measured_geometry_records
+from pyramid_oereb.contrib.data_sources.prepared_geometry import get_prepared_geometry
 
 log = logging.getLogger(__name__)
 
@@ -54,8 +60,13 @@ class StandardThemeConfigParser(object):
         )
 
     def get_models(self):
-        model_factory = self.get_model_factory()
-        return model_factory(
+        """
+        Returns the models of the theme. They are built only once per process and shared between all
+        sources, hook methods and requests using them (see
+        :mod:`pyramid_oereb.contrib.data_sources.model_registry`).
+        """
+        return model_registry.get_models(
+            self.model_factory_path,
             self.schema_name,
             self.geometry_type,
             self.srid,
@@ -113,6 +124,12 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         self.legend_entry_model = self.models.LegendEntry
 
         self._tolerance = self._plr_info.get('tolerance')
+        # the intersections with the real estate are measured by the database, see
+        # pyramid_oereb.contrib.data_sources.measurement
+        self._measure_in_database_ = kwargs.get('source').get('params').get('measure_in_database', False)
+
+        # geometries read in advance for several real estates, see prefetch
+        self._prefetched_ = None
 
     def from_db_to_legend_entry_record(self, legend_entry_from_db):
         theme = Config.get_theme_by_code_sub_code(legend_entry_from_db.theme)
@@ -302,7 +319,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             ))
         return document_records
 
-    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db):
+    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db,
+                              geometry_records=None):
         thresholds = self._plr_info.get('thresholds')
         min_length = thresholds.get('length').get('limit')
         length_unit = thresholds.get('length').get('unit')
@@ -326,7 +344,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             legend_entry_record.theme.document_records,
             self.get_document_records(params, public_law_restriction_from_db)
         )
-        geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
+        if geometry_records is None:
+            geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
         law_status = Config.get_law_status_by_data_code(
             self._plr_info.get('code'),
             public_law_restriction_from_db.law_status
@@ -372,6 +391,18 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         document_records = self.from_db_to_document_records(documents_from_db)
         return document_records
 
+    def prefetch_documents(self, params, public_law_restrictions):
+        """
+        Called with all public law restrictions found for the real estate before their records are created.
+        Sources reading the documents from a remote service can override it to request them at once, the
+        documents of the database are loaded with the public law restrictions already.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            public_law_restrictions (list): The public law restrictions in their database representation.
+        """
+        pass
+
     @staticmethod
     def extract_geometry_collection_db(db_path, real_estate_geometry, tolerance=None):
         """
@@ -382,42 +413,36 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         Args:
             db_path (str): The point separated string of schema_name.table_name.column_name from
                 which we can construct a correct SQL statement.
-            real_estate_geometry (shapely.geometry.base.BaseGeometry): The shapely geometry
-                representation which is used for comparison.
+            real_estate_geometry (shapely.geometry.base.BaseGeometry or
+                pyramid_oereb.contrib.data_sources.prepared_geometry.PreparedGeometry): The geometry
+                which is used for comparison.
+            tolerance (float or None): The tolerance.
 
         Returns:
             sqlalchemy.sql.elements.BooleanClauseList: The clause element.
-
-        Raises:
-            HTTPBadRequest
         """
-        srid = Config.get('srid')
-        extract_point = f"ST_CollectionExtract({db_path}, 1)"
-        extract_line = f"ST_CollectionExtract({db_path}, 2)"
-        extract_polygon = f"ST_CollectionExtract({db_path}, 3)"
-        geometry_string = f'ST_GeomFromText(\'{real_estate_geometry.wkt}\', {srid})'
-        if tolerance is None:
-            clause_blocks = [
-                text(f'ST_Intersects({extract}, {geometry_string})')
-                for extract in [extract_point, extract_line, extract_polygon]
-            ]
-        else:
-            clause_blocks = [
-                text(f'ST_Distance({extract}, {geometry_string}) < {tolerance}')
-                for extract in [extract_point, extract_line, extract_polygon]
-            ]
-        return or_(*clause_blocks)
+        prepared = get_prepared_geometry(real_estate_geometry)
+        column = literal_column(db_path)
+        return and_(
+            prepared.get_prefilter(column, tolerance),
+            or_(*[
+                prepared.get_relation(func.ST_CollectionExtract(column, geometry_type), tolerance)
+                for geometry_type in [1, 2, 3]
+            ])
+        )
 
-    def handle_collection(self, session, geometry_to_check):
+    def get_spatial_filter(self, geometry_to_check):
         """
-        Handles geometry collection in the geometry query if needed.
+        Returns the filter clause which selects the geometries of the topic having a spatial relation with the
+        passed geometry. Geometry collections and the configured tolerance are taken into account.
 
         Args:
-            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
-            geometry_to_check (GeometryRecord): geometry to be queried
+            geometry_to_check (shapely.geometry.base.BaseGeometry or
+                pyramid_oereb.contrib.data_sources.prepared_geometry.PreparedGeometry): geometry to be
+                queried
 
         Returns:
-            sqlalchemy.orm.Query : the query based on the geometry_to_check
+            sqlalchemy.sql.elements.ClauseElement: The filter clause.
         """
         geometry_types = Config.get('geometry_types')
         collection_types = geometry_types.get('collection').get('types')
@@ -425,32 +450,36 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         if self._plr_info.get('geometry_type') in [x.upper() for x in collection_types]:
 
             # The PLR is defined as a collection type. We need to do a special handling
-            query = session.query(self._model_).filter(
-                self.extract_geometry_collection_db(
-                    '{schema}.{table}.geom'.format(
-                        schema=self._model_.__table__.schema,
-                        table=self._model_.__table__.name
-                    ),
-                    geometry_to_check,
-                    self._tolerance
-                )
+            return self.extract_geometry_collection_db(
+                '{schema}.{table}.geom'.format(
+                    schema=self._model_.__table__.schema,
+                    table=self._model_.__table__.name
+                ),
+                geometry_to_check,
+                self._tolerance
             )
 
-        else:
-            # The PLR is not problematic at all cause we do not have a collection type here
-            if self._tolerance is None:
-                query = session.query(self._model_).filter(self._model_.geom.ST_Intersects(
-                    from_shape(geometry_to_check, srid=Config.get('srid'))
-                ))
-            else:
-                query = session.query(self._model_).filter(self._model_.geom.ST_Distance(
-                    from_shape(geometry_to_check, srid=Config.get('srid'))
-                ) < self._tolerance)
-        return query
+        # The PLR is not problematic at all cause we do not have a collection type here
+        return get_prepared_geometry(geometry_to_check).get_filter(self._model_.geom, self._tolerance)
+
+    def handle_collection(self, session, geometry_to_check):
+        """
+        Handles geometry collection in the geometry query if needed.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            geometry_to_check (GeometryRecord): geometry to be queried
+
+        Returns:
+            sqlalchemy.orm.Query : the query based on the geometry_to_check
+        """
+        return session.query(self._model_).filter(self.get_spatial_filter(geometry_to_check))
 
     def collect_related_geometries_by_real_estate(self, session, real_estate):
         """
-        Extracts all geometries in the topic which have spatial relation with the passed real estate
+        Extracts all geometries in the topic which have spatial relation with the passed real estate. If the
+        geometries were read in advance for this real estate (see :meth:`prefetch`), the database is not
+        queried again.
 
         Args:
             session (sqlalchemy.orm.Session): The requested clean session instance ready for use
@@ -460,14 +489,30 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         Returns:
             list: The result of the related geometries unique by the public law restriction id
         """
-        return self.handle_collection(session, real_estate.limit).distinct(
+        if self._prefetched_ is not None and real_estate.egrid in self._prefetched_.get('egrids'):
+            return self.filter_prefetched_geometries(real_estate.limit)
+        return self.collect_related_geometries_by_limit(session, real_estate.limit)
+
+    def collect_related_geometries_by_limit(self, session, limit):
+        """
+        Extracts all geometries in the topic which have spatial relation with the passed limit.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            limit (shapely.geometry.base.BaseGeometry): The geometry used as spatial filter.
+
+        Returns:
+            list: The result of the related geometries unique by the public law restriction id
+        """
+        return self.handle_collection(session, limit).distinct(
             self._model_.public_law_restriction_id
         ).options(
             selectinload(self.models.Geometry.public_law_restriction)
             .selectinload(self.models.PublicLawRestriction.geometries),
             selectinload(self.models.Geometry.public_law_restriction)
             .selectinload(self.models.PublicLawRestriction.legal_provisions)
-            .selectinload(self.models.PublicLawRestrictionDocument.document),
+            .selectinload(self.models.PublicLawRestrictionDocument.document)
+            .selectinload(self.models.Document.responsible_office),
             selectinload(self.models.Geometry.public_law_restriction)
             .selectinload(self.models.PublicLawRestriction.legend_entry),
             selectinload(self.models.Geometry.public_law_restriction)
@@ -476,6 +521,112 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             .selectinload(self.models.PublicLawRestriction.responsible_office),
         ).all()
 
+    def prefetch(self, real_estates):
+        """
+        Reads the geometries related to all passed real estates with one single spatial query. The
+        following reads for one of these real estates filter the prefetched geometries in memory instead of
+        querying the database. All related public law restrictions, documents and offices are loaded
+        eagerly, so they are shared between the extracts of the real estates.
+
+        The prefetched geometries are bound to this (request bound) copy of the source and to all copies
+        made from it.
+
+        Args:
+            real_estates (list of pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estates in their record representation.
+        """
+        session = self.get_session()
+        try:
+            if self.is_empty(session):
+                geometry_results = []
+            else:
+                geometry_results = self.collect_related_geometries_by_limit(
+                    session,
+                    unary_union([real_estate.limit for real_estate in real_estates])
+                )
+            self._prefetched_ = {
+                'egrids': set([real_estate.egrid for real_estate in real_estates]),
+                'geometries': [
+                    (
+                        geometry_result,
+                        [
+                            to_shape(geometry.geom)
+                            for geometry in geometry_result.public_law_restriction.geometries
+                        ]
+                    )
+                    for geometry_result in geometry_results
+                ]
+            }
+        finally:
+            session.close()
+
+    def filter_prefetched_geometries(self, limit):
+        """
+        Returns the prefetched geometries (see :meth:`prefetch`) whose public law restriction has a spatial
+        relation with the passed limit. The relation is evaluated the same way the database does in
+        :meth:`get_spatial_filter`.
+
+        Args:
+            limit (shapely.geometry.base.BaseGeometry): The geometry used as spatial filter.
+
+        Returns:
+            list: The related geometries unique by the public law restriction id
+        """
+        prepared_limit = prep(limit)
+        result = []
+        for geometry_result, shapes in self._prefetched_.get('geometries'):
+            if self._tolerance is None:
+                related = any(prepared_limit.intersects(shape) for shape in shapes)
+            else:
+                related = any(limit.distance(shape) <= self._tolerance for shape in shapes)
+            if related:
+                result.append(geometry_result)
+        return result
+
+    def collect_measured_public_law_restrictions(self, session, real_estate, with_geometry):
+        """
+        Measures the geometries of the topic against the passed real estate in the database (see
+        :mod:`pyramid_oereb.contrib.data_sources.measurement`) and reads the public law restrictions having
+        qualifying geometries. The geometries read in advance by :meth:`prefetch` are not used.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate in its record representation.
+            with_geometry (bool): True to transfer the geometries of the qualifying parts.
+
+        Returns:
+            tuple: The public law restrictions (list) and their measured geometry records (dict of list
+            by public law restriction id).
+        """
+        geometry_records = from_db_to_measured_geometry_records(
+            self._plr_info.get('code'),
+            get_measurement_query(
+                session,
+                self._model_,
+                self._model_.geom,
+                self.get_spatial_filter(real_estate.limit),
+                real_estate,
+                self._tolerance,
+                self._plr_info.get('thresholds'),
+                with_geometry
+            ).all()
+        )
+        if len(geometry_records) == 0:
+            return [], geometry_records
+        plr_model = self.models.PublicLawRestriction
+        public_law_restrictions = session.query(plr_model).filter(
+            plr_model.id.in_(list(geometry_records.keys()))
+        ).order_by(plr_model.id).options(
+            selectinload(plr_model.legal_provisions)
+            .selectinload(self.models.PublicLawRestrictionDocument.document)
+            .selectinload(self.models.Document.responsible_office),
+            selectinload(plr_model.legend_entry),
+            selectinload(plr_model.view_service),
+            selectinload(plr_model.responsible_office),
+        ).all()
+        return public_law_restrictions, geometry_records
+
     def collect_legend_entries_by_bbox(self, session, bbox, law_status):
         """
         Extracts all legend entries in the topic which have spatial relation with the passed bounding box of
@@ -489,17 +640,45 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         Returns:
             list: The result of the related geometries unique by the public law restriction id and law status
         """
+        return self.collect_legend_entries_by_bbox_and_law_status(session, bbox, [law_status]).get(
+            law_status,
+            []
+        )
 
-        distinct_legend_entry_ids = []
-        geometries = self.handle_collection(session, bbox).options(
-            selectinload(self.models.Geometry.public_law_restriction)
-        ).all()
-        for geometry in geometries:
-            if geometry.public_law_restriction.legend_entry_id not in distinct_legend_entry_ids \
-                    and geometry.public_law_restriction.law_status == law_status:
-                distinct_legend_entry_ids.append(geometry.public_law_restriction.legend_entry_id)
-        return session.query(self.legend_entry_model).filter(
-            self.legend_entry_model.id.in_((distinct_legend_entry_ids))).all()
+    def collect_legend_entries_by_bbox_and_law_status(self, session, bbox, law_status_list):
+        """
+        Extracts all legend entries in the topic which have spatial relation with the passed bounding box of
+        visible extent for all passed law status at once. This is done with one single query.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+            law_status_list (list of str): The law status for which the legend entries should be queried.
+
+        Returns:
+            dict: The distinct legend entries (list) per law status.
+        """
+        plr_model = self.models.PublicLawRestriction
+        distinct_legend_entries = session.query(
+            plr_model.legend_entry_id,
+            plr_model.law_status
+        ).join(
+            self._model_, self._model_.public_law_restriction_id == plr_model.id
+        ).filter(
+            self.get_spatial_filter(bbox)
+        ).filter(
+            plr_model.law_status.in_(law_status_list)
+        ).distinct().subquery()
+        legend_entries_by_law_status = dict([(law_status, []) for law_status in law_status_list])
+        for legend_entry, law_status in session.query(
+            self.legend_entry_model,
+            distinct_legend_entries.c.law_status
+        ).join(
+            distinct_legend_entries,
+            distinct_legend_entries.c.legend_entry_id == self.legend_entry_model.id
+        ).all():
+            legend_entries_by_law_status[law_status].append(legend_entry)
+        return legend_entries_by_law_status
 
     def read(self, params, real_estate, bbox):  # pylint: disable=W:0221
         """
@@ -516,17 +695,25 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             session = self.get_session()
 
             try:
-                if session.query(self._model_).count() == 0:
+                if self.is_empty(session):
                     # We can stop here already because there are no items in the database
                     self.records = [EmptyPlrRecord(Config.get_theme_by_code_sub_code(self._plr_info['code']))]
                 else:
                     # We need to investigate more in detail
 
                     # Try to find geometries which have spatial relation with real estate
-                    geometry_results = self.collect_related_geometries_by_real_estate(
-                        session, real_estate
-                    )
-                    if len(geometry_results) == 0:
+                    if self._measure_in_database_:
+                        public_law_restrictions, geometry_records = \
+                            self.collect_measured_public_law_restrictions(
+                                session, real_estate, params.with_geometry
+                            )
+                    else:
+                        public_law_restrictions = [
+                            geometry_result.public_law_restriction for geometry_result in
+                            self.collect_related_geometries_by_real_estate(session, real_estate)
+                        ]
+                        geometry_records = None
+                    if len(public_law_restrictions) == 0:
                         # We checked if there are spatially related elements in database. But there is none.
                         # So we can stop here.
                         self.records = [EmptyPlrRecord(
@@ -538,27 +725,27 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
 
                         law_status_of_geometry = []
                         # get distinct values of law_status for all geometries found
-                        for geometry in geometry_results:
-                            if(geometry.public_law_restriction.law_status not in law_status_of_geometry):
-                                law_status_of_geometry.append(geometry.public_law_restriction.law_status)
-
-                        legend_entries_from_db = []
-                        # get legend_entries per law_status
-                        for law_status in law_status_of_geometry:
-                            legend_entry_with_law_status = [
-                                self.collect_legend_entries_by_bbox(session, bbox, law_status),
-                                law_status
-                            ]
-                            legend_entries_from_db.append(legend_entry_with_law_status)
-
+                        for public_law_restriction in public_law_restrictions:
+                            if public_law_restriction.law_status not in law_status_of_geometry:
+                                law_status_of_geometry.append(public_law_restriction.law_status)
+
+                        # get legend_entries for all law_status at once
+                        legend_entries_from_db = self.collect_legend_entries_by_bbox_and_law_status(
+                            session,
+                            bbox,
+                            law_status_of_geometry
+                        )
+
+                        self.prefetch_documents(params, public_law_restrictions)
                         self.records = []
-                        for geometry_result in geometry_results:
+                        for public_law_restriction in public_law_restrictions:
                             self.records.append(
                                 self.from_db_to_plr_record(
                                     params,
-                                    geometry_result.public_law_restriction,
-                                    next(elem for elem in legend_entries_from_db
-                                         if elem[1] == geometry_result.public_law_restriction.law_status)[0]
+                                    public_law_restriction,
+                                    legend_entries_from_db[public_law_restriction.law_status],
+                                    None if geometry_records is None else
+                                    geometry_records[public_law_restriction.id]
                                 )
                             )
 
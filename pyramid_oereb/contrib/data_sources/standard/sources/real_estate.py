@@ -1,13 +1,184 @@
 # -*- coding: utf-8 -*-
+import logging
+import sys
+import threading
+from collections import namedtuple
+
 from geoalchemy2.elements import _SpatialElement
+from shapely import wkt
+from sqlalchemy import Text, cast, literal_column
 
+from pyramid_oereb.core.real_estate_index import RealEstateIndex
 from pyramid_oereb.core.sources import BaseDatabaseSource
 from geoalchemy2.shape import to_shape
 
 from pyramid_oereb.core.sources.real_estate import RealEstateBaseSource
 
+log = logging.getLogger(__name__)
+
+IndexedRealEstate = namedtuple('IndexedRealEstate', [
+    'type',
+    'canton',
+    'municipality',
+    'fosnr',
+    'land_registry_area',
+    'metadata_of_geographical_base_data',
+    'number',
+    'identdn',
+    'egrid',
+    'subunit_of_land_register',
+    'subunit_of_land_register_designation'
+])
+"""The attributes of a real estate kept by the index."""
+
 
 class DatabaseSource(BaseDatabaseSource, RealEstateBaseSource):
+    """
+    The real estate source reading from a database.
+
+    Attributes:
+        INDEX_CHUNK_SIZE (int): The number of changed real estates loaded at once on a refresh of the index.
+    """
+
+    INDEX_CHUNK_SIZE = 1000
+
+    # Attributes shared by many real estates, the index keeps every distinct value once
+    _shared_attributes_ = (
+        'type',
+        'canton',
+        'municipality',
+        'metadata_of_geographical_base_data',
+        'subunit_of_land_register',
+        'subunit_of_land_register_designation'
+    )
+
+    def __init__(self, **kwargs):
+        """
+        Keyword Args:
+            db_connection (str): A rfc1738 conform database connection string in the form of:
+                ``<driver_name>://<username>:<password>@<database_host>:<port>/<database_name>``
+            model (str): A valid dotted name string which leads to an importable representation of
+                sqlalchemy.ext.declarative.DeclarativeMeta or the real class itself.
+            index (dict): Optional configuration of the in-memory index used to read the real estates by
+                geometry, see :mod:`pyramid_oereb.core.real_estate_index`. If `enabled` is true, it is
+                loaded by :meth:`load_index` and refreshed in the background after `refresh_interval`
+                seconds if set. The changed real estates are found by the `version_column`, which has to
+                change with every update of a row. It defaults to the system column `xmin` of PostgreSQL,
+                which does not exist for views.
+        """
+        super(DatabaseSource, self).__init__(**kwargs)
+        index_config = kwargs.get('index') or {}
+        if index_config.get('enabled', False):
+            # Shared by all request bound copies of this source
+            self._index_ = RealEstateIndex(refresh_interval=index_config.get('refresh_interval'))
+            self._index_version_column_ = index_config.get('version_column', 'xmin')
+        else:
+            self._index_ = None
+
+    def load_index(self):
+        """
+        Loads the index if it is enabled and was not loaded yet. This happens on the startup of the web
+        application, otherwise the first read by geometry loads it.
+        """
+        if self._index_ is None:
+            return
+        with self._index_.refresh_lock:
+            if self._index_.updated is None:
+                self._load_index_()
+
+    def refresh_index(self, blocking=True):
+        """
+        Loads the new and changed real estates into the index and removes the deleted ones. The real estates
+        are compared by their version column, so only the changed rows are read.
+
+        Args:
+            blocking (bool): False to skip the refresh if it is running in another thread already.
+        """
+        if not self._index_.refresh_lock.acquire(blocking):
+            return
+        try:
+            self._load_index_()
+        finally:
+            self._index_.refresh_lock.release()
+
+    def refresh_index_in_background(self):
+        """
+        Starts the refresh of the index in a background thread, unless one is running already. The index
+        is used unchanged until the refresh has finished.
+
+        Returns:
+            threading.Thread or None: The started thread, None if a refresh is running already.
+        """
+        if not self._index_.refresh_lock.acquire(False):
+            return None
+        thread = threading.Thread(
+            target=self._refresh_index_in_background_,
+            name='pyramid_oereb_real_estate_index',
+            daemon=True
+        )
+        try:
+            thread.start()
+        except Exception:
+            self._index_.refresh_lock.release()
+            raise
+        return thread
+
+    def _refresh_index_in_background_(self):
+        try:
+            self._load_index_()
+        except Exception:
+            # The former index is kept, the refresh is tried again on the next lookup
+            log.exception('Refreshing the real estate index failed')
+        finally:
+            self._index_.refresh_lock.release()
+
+    def _load_index_(self):
+        session = self.get_session()
+        try:
+            versions = dict(session.query(
+                self._model_.id,
+                cast(literal_column(self._index_version_column_), Text)
+            ).filter(self._model_.limit.isnot(None)).all())
+            indexed_versions = self._index_.get_versions()
+            changed = [key for key, version in versions.items() if indexed_versions.get(key) != version]
+            removed = [key for key in indexed_versions if key not in versions]
+            entries = {}
+            for i in range(0, len(changed), self.INDEX_CHUNK_SIZE):
+                results = session.query(self._model_).filter(
+                    self._model_.id.in_(changed[i:i + self.INDEX_CHUNK_SIZE])
+                ).all()
+                for result in results:
+                    entries[result.id] = (
+                        versions[result.id],
+                        self._get_indexed_real_estate(result),
+                        to_shape(result.limit).wkb
+                    )
+            self._index_.update(entries, removed)
+        finally:
+            session.close()
+
+    def _get_indexed_real_estate(self, result):
+        values = dict((field, getattr(result, field)) for field in IndexedRealEstate._fields)
+        for field in self._shared_attributes_:
+            if isinstance(values[field], str):
+                values[field] = sys.intern(values[field])
+        return IndexedRealEstate(**values)
+
+    def _create_record(self, result, limit):
+        return self._record_class_(
+            result.type,
+            result.canton,
+            result.municipality,
+            result.fosnr,
+            result.land_registry_area,
+            limit,
+            metadata_of_geographical_base_data=result.metadata_of_geographical_base_data,
+            number=result.number,
+            identdn=result.identdn,
+            egrid=result.egrid,
+            subunit_of_land_register=result.subunit_of_land_register,
+            subunit_of_land_register_designation=result.subunit_of_land_register_designation
+        )
 
     def read(self, params, nb_ident=None, number=None, egrid=None, geometry=None):
         """
@@ -24,8 +195,20 @@ class DatabaseSource(BaseDatabaseSource, RealEstateBaseSource):
             (str or None): The unique identifier of the desired real estate. This will deliver
                 only one result or crashes.
             geometry (str or None): A geometry as WKT string which is used to obtain intersected real
-                estates. This may deliver several results.
+                estates. This may deliver several results. They are read from the index if it is enabled.
         """
+        if not (nb_ident and number) and not egrid and geometry and self._index_ is not None:
+            if self._index_.updated is None:
+                self.load_index()
+            elif self._index_.is_outdated():
+                self.refresh_index_in_background()
+            # Strip the SRID of an extended WKT, the index uses the SRID of the database
+            self.records = [
+                self._create_record(result, limit)
+                for result, limit in self._index_.query(wkt.loads(geometry.split(';')[-1]))
+            ]
+            return
+
         session = self._adapter_.get_session(self._key_)
         try:
             query = session.query(self._model_)
@@ -40,19 +223,9 @@ class DatabaseSource(BaseDatabaseSource, RealEstateBaseSource):
 
             self.records = list()
             for result in results:
-                self.records.append(self._record_class_(
-                    result.type,
-                    result.canton,
-                    result.municipality,
-                    result.fosnr,
-                    result.land_registry_area,
-                    to_shape(result.limit) if isinstance(result.limit, _SpatialElement) else None,
-                    metadata_of_geographical_base_data=result.metadata_of_geographical_base_data,
-                    number=result.number,
-                    identdn=result.identdn,
-                    egrid=result.egrid,
-                    subunit_of_land_register=result.subunit_of_land_register,
-                    subunit_of_land_register_designation=result.subunit_of_land_register_designation
+                self.records.append(self._create_record(
+                    result,
+                    to_shape(result.limit) if isinstance(result.limit, _SpatialElement) else None
                 ))
 
         finally:
@@ -10,11 +10,12 @@ from urllib import parse as urlparse
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid_oereb import Config
 from pyramid_oereb.core.renderer.extract.json_ import Renderer as JsonRenderer
+from pyramid_oereb.core.tracing import trace
 from pyramid_oereb.core.url import parse_url
 from pyramid.httpexceptions import HTTPInternalServerError
 from PyPDF2 import PdfFileReader
 from PyPDF2.utils import PdfReadError
-from pyramid_oereb.contrib.print_proxy.mapfish_print.toc_pages import TocPages
+from pyramid_oereb.contrib.print_proxy.mapfish_print.toc_pages import TocPages, record_prediction
 
 
 log = logging.getLogger(__name__)
@@ -55,7 +56,7 @@ class Renderer(JsonRenderer):
         Returns:
             buffer: The pdf content as received from configured mapfish print instance url.
         """
-        log.debug("Parameter webservice is {}".format(value[1]))
+        trace(log, 'Parameter webservice', params=value[1])
 
         if value[1].images:
             raise HTTPBadRequest('With image is not allowed in the print')
@@ -111,7 +112,14 @@ class Renderer(JsonRenderer):
         if self._request.GET.get('getspec', 'no') != 'no':
             response.headers['Content-Type'] = 'application/json; charset=UTF-8'
             return json.dumps(spec, sort_keys=True, indent=4)
-        pdf_url = urlparse.urljoin(Config.get('print', {})['base_url'] + '/', 'buildreport.pdf')
+
+        if (print_config.get('async') or {}).get('enabled', False):
+            from pyramid_oereb.contrib.print_proxy.mapfish_print.print_job import submit_print_job
+            response.status_code = 202
+            response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+            return json.dumps(submit_print_job(self._request, spec, extract_as_dict))
+
+        pdf_url = self.get_print_url('buildreport.pdf')
         pdf_headers = Config.get('print', {})['headers']
         print_result = requests.post(
             pdf_url,
@@ -120,25 +128,16 @@ class Renderer(JsonRenderer):
         )
         try:
             if Config.get('print', {}).get('compute_toc_pages', False):
-                with io.BytesIO() as pdf:
-                    pdf.write(print_result.content)
-                    pdf_reader = PdfFileReader(pdf)
-                    x = []
-                    for i in range(len(pdf_reader.getOutlines())):
-                        x.append(pdf_reader.getOutlines()[i]['/Page']['/StructParents'])
-                    try:
-                        true_nb_of_toc = min(x)-1
-                    except ValueError:
-                        true_nb_of_toc = 1
-
-                    if true_nb_of_toc != extract_as_dict['nbTocPages']:
-                        log.warning('nbTocPages in result pdf: {} are not equal to the one predicted : {}, request new pdf'.format(true_nb_of_toc,extract_as_dict['nbTocPages'])) # noqa
-                        extract_as_dict['nbTocPages'] = true_nb_of_toc
-                        print_result = requests.post(
-                            pdf_url,
-                            headers=pdf_headers,
-                            data=json.dumps(spec)
-                        )
+                true_nb_of_toc = self.get_nb_toc_pages(print_result.content)
+                record_prediction(extract_as_dict['nbTocPages'], true_nb_of_toc)
+                if true_nb_of_toc != extract_as_dict['nbTocPages']:
+                    log.warning('nbTocPages in result pdf: {} are not equal to the one predicted : {}, request new pdf'.format(true_nb_of_toc,extract_as_dict['nbTocPages'])) # noqa
+                    extract_as_dict['nbTocPages'] = true_nb_of_toc
+                    print_result = requests.post(
+                        pdf_url,
+                        headers=pdf_headers,
+                        data=json.dumps(spec)
+                    )
         except PdfReadError as e:
             err_msg = 'a problem occurred while generating the pdf file'
             log.error(err_msg + ': ' + str(e))
@@ -164,6 +163,45 @@ class Renderer(JsonRenderer):
             del response.headers['Connection']
         return content
 
+    @staticmethod
+    def get_print_url(path):
+        """
+        Returns the URL of a service of the configured print server.
+
+        Args:
+            path (str): The path of the service relative to the base URL of the print server.
+
+        Returns:
+            str: The URL of the service.
+        """
+        return urlparse.urljoin(Config.get('print', {})['base_url'] + '/', path)
+
+    @staticmethod
+    def get_nb_toc_pages(content):
+        """
+        Returns the number of table of contents pages of a printed extract. It is read from the outlines of
+        the pdf.
+
+        Args:
+            content (bytes): The pdf.
+
+        Returns:
+            int: The number of table of contents pages.
+
+        Raises:
+            PyPDF2.utils.PdfReadError: If the pdf cannot be read.
+        """
+        with io.BytesIO() as pdf:
+            pdf.write(content)
+            pdf_reader = PdfFileReader(pdf)
+            x = []
+            for i in range(len(pdf_reader.getOutlines())):
+                x.append(pdf_reader.getOutlines()[i]['/Page']['/StructParents'])
+            try:
+                return min(x)-1
+            except ValueError:
+                return 1
+
     @staticmethod
     def archive_pdf_file(pdf_archive_path, binary_content, extract_as_dict):
         pdf_archive_path = pdf_archive_path if pdf_archive_path[-1:] == '/' else pdf_archive_path + '/'
@@ -195,7 +233,7 @@ class Renderer(JsonRenderer):
         result = {}
         wms_url_params = Config.get('print', {}).get('wms_url_params', False)
         if wms_url_params:
-            log.debug("get_wms_url_params() read configuration {}".format(wms_url_params))
+            trace(log, 'get_wms_url_params() read configuration', wms_url_params=wms_url_params)
             if isinstance(wms_url_params, dict):
                 result = wms_url_params
             else:
@@ -216,8 +254,7 @@ class Renderer(JsonRenderer):
             feature_geometry: the geometry for this extract, will get added to the extract information
         """
 
-        log.debug("Starting transformation, extract_dict is {}".format(extract_dict))
-        log.debug("Parameter feature_geometry is {}".format(feature_geometry))
+        trace(log, 'Starting transformation', extract_dict=extract_dict, feature_geometry=feature_geometry)
 
         creation_date = datetime.strptime(extract_dict['CreationDate'], '%Y-%m-%dT%H:%M:%S')
         extract_dict['Footer'] = '   '.join([
@@ -549,7 +586,7 @@ class Renderer(JsonRenderer):
 
         extract_dict['PrintCantonLogo'] = Config.get('print', {}).get('print_canton_logo', True)
 
-        log.debug("After transformation, extract_dict is {}".format(json.dumps(extract_dict, indent=4)))
+        trace(log, 'After transformation', extract_dict=lambda: json.dumps(extract_dict, indent=4))
         return extract_dict
 
     @staticmethod
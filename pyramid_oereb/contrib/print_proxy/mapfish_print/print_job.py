@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous print jobs for the MapFish Print proxy. Instead of waiting for the pdf, a PDF extract request
+submits the job to the `report.pdf` service of MapFish Print and answers with status 202 and the id of the
+job:
+
+.. code-block:: json
+
+    {
+        "ref": "<job id>",
+        "statusURL": "<application>/print/status/<job id>",
+        "downloadURL": "<application>/print/report/<job id>"
+    }
+
+The client polls the status URL until the job is `done` and downloads the pdf from the download URL. If the
+number of table of contents pages was predicted wrong, the job is printed once again with the correct number
+when its status is requested for the first time after it finished. This happens on the print server, no
+worker of the application waits for it. Only one of several concurrent status requests checks and reprints
+the job, the others answer that it is still running.
+
+The jobs are kept by a backend of the extract cache (see :mod:`pyramid_oereb.core.extract_cache`). If the
+application runs in several processes, use a :class:`pyramid_oereb.core.extract_cache.FileBackend` shared by
+all of them.
+
+.. code-block:: yaml
+
+    print:
+      async:
+        enabled: true
+        backend:
+          class: pyramid_oereb.core.extract_cache.FileBackend
+          params:
+            path: /var/cache/pyramid_oereb/print_jobs
+            max_entries: 1000
+"""
+import json
+import logging
+import threading
+import time
+
+import requests
+from pyramid.httpexceptions import HTTPInternalServerError, HTTPNotFound
+from pyramid.path import DottedNameResolver
+from PyPDF2.utils import PdfReadError
+
+from pyramid_oereb import Config, route_prefix
+from pyramid_oereb.contrib.print_proxy.mapfish_print.mapfish_print import Renderer
+from pyramid_oereb.contrib.print_proxy.mapfish_print.toc_pages import record_prediction
+
+log = logging.getLogger(__name__)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_print_job_backend():
+    """
+    Returns the process wide backend keeping the print jobs.
+
+    Returns:
+        pyramid_oereb.core.extract_cache.BaseBackend: The backend.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_config = (Config.get('print', {}).get('async') or {}).get('backend') or {}
+                backend_class = DottedNameResolver().maybe_resolve(
+                    backend_config.get('class', 'pyramid_oereb.core.extract_cache.MemoryBackend')
+                )
+                _backend = backend_class(**(backend_config.get('params') or {}))
+    return _backend
+
+
+def submit_print_job(request, spec, extract_as_dict):
+    """
+    Submits a print job to MapFish Print.
+
+    Args:
+        request (pyramid.request.Request): The request of the PDF extract.
+        spec (dict): The print specification.
+        extract_as_dict (dict): The printable extract.
+
+    Returns:
+        dict: The id of the job (`ref`) and the URLs to get its status and to download the pdf.
+    """
+    ref = post_print_job(spec)
+    compute_toc_pages = Config.get('print', {}).get('compute_toc_pages', False)
+    get_print_job_backend().set(ref, {
+        'ref': ref,
+        # The specification is only kept as long as the job may have to be printed again
+        'spec': spec if compute_toc_pages else None,
+        'archive': {
+            key: extract_as_dict.get(key)
+            for key in ['RealEstate_EGRID', 'RealEstate_IdentDN', 'RealEstate_Number']
+        },
+        'tags': {}
+    })
+    return {
+        'ref': ref,
+        'statusURL': request.route_url('{0}/print/status'.format(route_prefix), ref=ref),
+        'downloadURL': request.route_url('{0}/print/report'.format(route_prefix), ref=ref)
+    }
+
+
+def post_print_job(spec):
+    """
+    Posts a print job to the `report.pdf` service of MapFish Print.
+
+    Args:
+        spec (dict): The print specification.
+
+    Returns:
+        str: The reference of the job at MapFish Print.
+
+    Raises:
+        pyramid.httpexceptions.HTTPInternalServerError: If the job was not accepted.
+    """
+    print_result = requests.post(
+        Renderer.get_print_url('report.pdf'),
+        headers=Config.get('print', {})['headers'],
+        data=json.dumps(spec)
+    )
+    if print_result.status_code != 200:
+        log.error('The print job was not accepted, status {0}: {1}'.format(
+            print_result.status_code,
+            print_result.text
+        ))
+        raise HTTPInternalServerError('The print job was not accepted')
+    return print_result.json()['ref']
+
+
+class PrintJob(object):
+    """
+    Webservice to get the status of asynchronous print jobs and to download their pdf.
+
+    Attributes:
+        REPRINT_TIMEOUT (int): The seconds after which the check of a finished job by another request is
+            considered as failed and the job may be checked again.
+    """
+
+    REPRINT_TIMEOUT = 300
+
+    def __init__(self, request):
+        """
+        Args:
+            request (pyramid.request.Request or pyramid.testing.DummyRequest): The pyramid request instance.
+        """
+        self._request_ = request
+
+    def _get_job(self):
+        job_id = self._request_.matchdict.get('ref')
+        job = get_print_job_backend().get(job_id)
+        if job is None:
+            raise HTTPNotFound('Print job {0} not found'.format(job_id))
+        return job_id, job
+
+    def get_status(self):
+        """
+        Returns the status of the print job. If the number of table of contents pages of the finished pdf
+        differs from the predicted one, the job is printed again.
+
+        Returns:
+            pyramid.response.Response: The status as JSON.
+        """
+        job_id, job = self._get_job()
+        status_result = requests.get(Renderer.get_print_url('status/{0}.json'.format(job['ref'])))
+        if status_result.status_code != 200:
+            raise HTTPInternalServerError('The status of print job {0} is not available'.format(job_id))
+        status = status_result.json()
+        done = status.get('done', False)
+        if done and status.get('status') == 'finished' and job['spec'] is not None:
+            if not self._check_once(job_id, job['ref']):
+                done = False
+                status = {'status': 'running'}
+        response = self._request_.response
+        response.json_body = {
+            'ref': job_id,
+            'done': done,
+            'status': status.get('status'),
+            'error': status.get('error'),
+            'downloadURL': self._request_.route_url(
+                '{0}/print/report'.format(route_prefix),
+                ref=job_id
+            ) if done else None
+        }
+        return response
+
+    def _check_once(self, job_id, ref):
+        """
+        Checks the finished job and prints it again if required, unless another request is doing it.
+
+        Args:
+            job_id (str): The id of the job.
+            ref (str): The reference of the finished job at MapFish Print.
+
+        Returns:
+            bool: True if the finished job is the final one, False if it is printed again or checked by
+            another request.
+        """
+        backend = get_print_job_backend()
+        lock_key = '{0}.reprint'.format(job_id)
+        lock = backend.get(lock_key)
+        if lock is not None and time.time() - lock['created'] > self.REPRINT_TIMEOUT:
+            backend.delete(lock_key)
+        if not backend.add(lock_key, {'created': time.time(), 'tags': {}}):
+            return False
+        try:
+            # The job may have been checked since it was read
+            job = backend.get(job_id)
+            if job is None or job['ref'] != ref:
+                return False
+            if job['spec'] is None:
+                return True
+            spec = job['spec']
+            job['spec'] = None
+            reprinted = self._reprint(job, spec)
+            backend.set(job_id, job)
+            return not reprinted
+        finally:
+            backend.delete(lock_key)
+
+    @staticmethod
+    def _reprint(job, spec):
+        """
+        Checks the number of table of contents pages of a finished job and submits the job once again if it
+        was predicted wrong.
+
+        Args:
+            job (dict): The print job, its reference is updated if the job is submitted again.
+            spec (dict): The print specification of the job.
+
+        Returns:
+            bool: True if the job was submitted again.
+        """
+        report_result = requests.get(Renderer.get_print_url('report/{0}'.format(job['ref'])))
+        try:
+            true_nb_of_toc = Renderer.get_nb_toc_pages(report_result.content)
+        except PdfReadError as e:
+            log.error('a problem occurred while reading the pdf file: ' + str(e))
+            return False
+        predicted_nb_of_toc = spec['attributes']['nbTocPages']
+        record_prediction(predicted_nb_of_toc, true_nb_of_toc)
+        if true_nb_of_toc == predicted_nb_of_toc:
+            return False
+        log.warning(
+            'nbTocPages in result pdf: {} are not equal to the one predicted : {}, request new pdf'.format(
+                true_nb_of_toc,
+                predicted_nb_of_toc
+            )
+        )
+        spec['attributes']['nbTocPages'] = true_nb_of_toc
+        job['ref'] = post_print_job(spec)
+        return True
+
+    def get_report(self):
+        """
+        Returns the pdf of the finished print job. The pdf is archived with its first download.
+
+        Returns:
+            pyramid.response.Response: The pdf.
+        """
+        job_id, job = self._get_job()
+        print_result = requests.get(Renderer.get_print_url('report/{0}'.format(job['ref'])))
+        response = self._request_.response
+        response.status_code = print_result.status_code
+        for header in ['Content-Type', 'Content-Disposition']:
+            if header in print_result.headers:
+                response.headers[header] = print_result.headers[header]
+        response.body = print_result.content
+        pdf_archive_path = Config.get('print', {}).get('pdf_archive_path', None)
+        archived = job.get('archived', False)
+        if print_result.status_code == 200 and pdf_archive_path is not None and not archived:
+            self._archive_once(job_id, pdf_archive_path, print_result.content)
+        return response
+
+    @staticmethod
+    def _archive_once(job_id, pdf_archive_path, content):
+        """
+        Archives the pdf of the job, unless another download did it.
+
+        Args:
+            job_id (str): The id of the job.
+            pdf_archive_path (str): The directory of the archived pdf files.
+            content (bytes): The pdf.
+        """
+        backend = get_print_job_backend()
+        archived_key = '{0}.archived'.format(job_id)
+        if not backend.add(archived_key, {'created': time.time(), 'tags': {}}):
+            return
+        job = backend.get(job_id)
+        try:
+            Renderer.archive_pdf_file(pdf_archive_path, content, job['archive'])
+        except Exception:
+            backend.delete(archived_key)
+            raise
+        job['archived'] = True
+        backend.set(job_id, job)
+
+
+def includeme(config):  # pragma: no cover
+    """
+    Creates the routes and views for the status and the download of asynchronous print jobs.
+
+    Args:
+        config (pyramid.config.Configurator): The application's configurator instance.
+    """
+    config.add_route('{0}/print/status'.format(route_prefix), '/print/status/{ref}')
+    config.add_view(PrintJob, attr='get_status', route_name='{0}/print/status'.format(route_prefix),
+                    request_method='GET')
+    config.add_route('{0}/print/report'.format(route_prefix), '/print/report/{ref}')
+    config.add_view(PrintJob, attr='get_report', route_name='{0}/print/report'.format(route_prefix),
+                    request_method='GET')
@@ -1,9 +1,44 @@
 # -*- coding: utf-8 -*-
 import logging
 import textwrap
+import threading
+
+from pyramid_oereb.core.tracing import trace
 
 log = logging.getLogger(__name__)
 
+_statistics = {'predictions': 0, 'mispredictions': 0}
+_statistics_lock = threading.Lock()
+
+
+def record_prediction(predicted, actual):
+    """
+    Records whether the number of table of contents pages was predicted right. A wrong prediction means the
+    extract has to be printed twice.
+
+    Args:
+        predicted (int): The predicted number of pages.
+        actual (int): The number of pages of the printed extract.
+    """
+    with _statistics_lock:
+        _statistics['predictions'] += 1
+        if predicted != actual:
+            _statistics['mispredictions'] += 1
+
+
+def get_statistics():
+    """
+    Returns the statistics of the table of contents page predictions of this process.
+
+    Returns:
+        dict: The number of `predictions` and `mispredictions` and the `misprediction_rate`.
+    """
+    with _statistics_lock:
+        statistics = dict(_statistics)
+    statistics['misprediction_rate'] = statistics['mispredictions'] / statistics['predictions'] \
+        if statistics['predictions'] > 0 else 0.0
+    return statistics
+
 
 class TocPages():
 
@@ -67,7 +102,7 @@ class TocPages():
             total_size += self.compute_length_of_wrapped_text(i[0]['Text'],
                                                               78,
                                                               10)
-        log.debug('d6 left total_size : {}'.format(total_size))
+        trace(log, 'd6 left', total_size=total_size)
         if total_size > content_min_size:
             return total_size
         else:
@@ -93,7 +128,7 @@ class TocPages():
             total_size += self.compute_length_of_wrapped_text(i['Content'][0]['Text'],
                                                               78,
                                                               10)
-        log.debug('d6 ritght total_size : {}'.format(total_size))
+        trace(log, 'd6 right', total_size=total_size)
         if total_size > content_min_size:
             return total_size
         else:
@@ -113,7 +148,7 @@ class TocPages():
             self.compute_d4() + \
             self.compute_d5() + \
             self.compute_d6()
-        log.debug('TOC total page length : {}'.format(x))
+        trace(log, 'TOC total page length', total_size=x)
         return x
 
     def getNbPages(self):
@@ -6,6 +6,8 @@ from pyramid.exceptions import ConfigurationError
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid_oereb import Config
 from pyramid_oereb.core.renderer.extract.xml_ import Renderer as XmlRenderer
+from pyramid_oereb.core.renderer.streaming import MultipartBody, iter_file
+from pyramid_oereb.core.tracing import trace
 
 
 log = logging.getLogger(__name__)
@@ -48,7 +50,7 @@ class Renderer(XmlRenderer):
             'usewms': print_config.get('use_wms', 'false'),
         }
 
-        log.debug("Parameter webservice is {}".format(value[1]))
+        trace(log, 'Parameter webservice', params=value[1])
 
         if value[1].images:
             raise HTTPBadRequest('With image is not allowed in the print')
@@ -61,24 +63,32 @@ class Renderer(XmlRenderer):
         self.parameters['language'] = self._language
         self.parameters['flavour'] = self._request.matchdict['flavour']
 
-        # Based on extract record and webservice parameter, render the extract data as JSON
+        # Based on extract record and webservice parameter, render the extract data as XML into a temporary
+        # file, which is streamed to the client or the print service
         extract_record = value[0]
-        extract_as_xml = self._render(extract_record, value[1])
+        extract_as_xml = self._stream(extract_record, value[1])
 
         response = self.get_response(system)
 
         if self._request.GET.get('getspec', 'no') != 'no':
             response.headers['Content-Type'] = 'application/xml; charset=UTF-8'
-            return extract_as_xml
+            return iter_file(extract_as_xml)
 
-        prepared_extraxt_as_xml = self.prepare_xml(extract_as_xml)
-        print_result = self.request_pdf(
-            print_service_url,
-            prepared_extraxt_as_xml,
-            self.headers,
-            self.parameters,
-            verify_certificate
-        )
+        try:
+            if type(self).prepare_xml is not Renderer.prepare_xml:
+                # The hook is overridden and works on the complete XML
+                prepared_extraxt_as_xml = self.prepare_xml(extract_as_xml.read())
+            else:
+                prepared_extraxt_as_xml = extract_as_xml
+            print_result = self.request_pdf(
+                print_service_url,
+                prepared_extraxt_as_xml,
+                self.headers,
+                self.parameters,
+                verify_certificate
+            )
+        finally:
+            extract_as_xml.close()
 
         response.status_code = print_result.status_code
         response.headers = print_result.headers
@@ -95,7 +105,8 @@ class Renderer(XmlRenderer):
 
         Args:
             url (str): URl to the print webservice.
-            data_extract (xml): The rendered xml extract.
+            data_extract (bytes or file): The rendered xml extract. A file is read in chunks while it is
+                sent.
             headers (dict): Request headers for print request.
             parameters (dict): Additional print parameters, such as language or flavour.
             verify_certificate (boolean): Define if certificate should be verified.
@@ -106,14 +117,24 @@ class Renderer(XmlRenderer):
         Raises:
             Exception: Request failed.
         """
+        if hasattr(data_extract, 'read'):
+            body = MultipartBody(parameters, 'file', 'xml', data_extract, 'text/xml')
+            upload = {
+                'headers': dict(headers, **{'Content-Type': body.get_content_type()}),
+                'data': body
+            }
+        else:
+            upload = {
+                'headers': headers,
+                'files': {'file': ('xml', data_extract, 'text/xml')},
+                'data': parameters
+            }
         try:
             backend_answer = requests.post(
                 url,
                 verify=verify_certificate,
-                headers=headers,
-                files={'file': ('xml', data_extract, 'text/xml')},
-                data=parameters,
-                proxies=Config.get('proxies')
+                proxies=Config.get('proxies'),
+                **upload
             )
             if backend_answer.status_code != requests.codes.ok:
                 log.warning("request_pdf failed for url {}, data_extract was {}".format(url, data_extract))
@@ -1,42 +1,249 @@
 # -*- coding: utf-8 -*-
 import logging
 import os
+import threading
+import time
 
 from io import open
-from sqlalchemy import create_engine, orm
+from timeit import default_timer as timer
+from pyramid.config import ConfigurationError
+from sqlalchemy import create_engine, event, orm, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
 
 
 log = logging.getLogger(__name__)
 
 
+class TimedQueuePool(QueuePool):
+    """
+    A :class:`sqlalchemy.pool.QueuePool` which measures the time spent waiting for a connection. The
+    measured time is passed to the :class:`PoolStatistics` attached to the pool.
+    """
+
+    statistics = None
+
+    def connect(self):
+        start_time = timer()
+        connection = super(TimedQueuePool, self).connect()
+        if self.statistics is not None:
+            self.statistics.add_wait_time(timer() - start_time)
+        return connection
+
+    def recreate(self):
+        pool = super(TimedQueuePool, self).recreate()
+        pool.statistics = self.statistics
+        return pool
+
+
+class PoolStatistics(object):
+    """
+    Collects live statistics of the connection pool of an engine using the pool events.
+    """
+
+    def __init__(self, engine):
+        """
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine whose pool should be observed.
+        """
+        self._engine_ = engine
+        self._lock_ = threading.Lock()
+        self._connects_ = 0
+        self._checkouts_ = 0
+        self._checkins_ = 0
+        self._reconnects_ = 0
+        self._wait_time_total_ = 0.0
+        self._wait_time_max_ = 0.0
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.statistics = self
+        event.listen(engine.pool, 'connect', self._on_connect_)
+        event.listen(engine.pool, 'checkout', self._on_checkout_)
+        event.listen(engine.pool, 'checkin', self._on_checkin_)
+        event.listen(engine.pool, 'invalidate', self._on_invalidate_)
+        event.listen(engine.pool, 'soft_invalidate', self._on_invalidate_)
+
+    def _on_connect_(self, dbapi_connection, connection_record):
+        with self._lock_:
+            self._connects_ += 1
+
+    def _on_checkout_(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock_:
+            self._checkouts_ += 1
+
+    def _on_checkin_(self, dbapi_connection, connection_record):
+        with self._lock_:
+            self._checkins_ += 1
+
+    def _on_invalidate_(self, dbapi_connection, connection_record, exception):
+        with self._lock_:
+            self._reconnects_ += 1
+
+    def add_wait_time(self, wait_time):
+        """
+        Adds the time spent waiting for a connection of the pool.
+
+        Args:
+            wait_time (float): The time spent in seconds.
+        """
+        with self._lock_:
+            self._wait_time_total_ += wait_time
+            self._wait_time_max_ = max(self._wait_time_max_, wait_time)
+
+    def as_dict(self):
+        """
+        Returns the current statistics.
+
+        Returns:
+            dict: The statistics containing the number of `connects` (new database connections),
+            `checkouts`, `checkins` and `reconnects` (invalidated connections), the currently
+            `checked_out` connections, the `wait_time_total`, `wait_time_average` and
+            `wait_time_max` in seconds and, for queue pools, the `pool_size`, `checked_in` and
+            `overflow`.
+        """
+        pool = self._engine_.pool
+        with self._lock_:
+            result = {
+                'connects': self._connects_,
+                'checkouts': self._checkouts_,
+                'checkins': self._checkins_,
+                'reconnects': self._reconnects_,
+                'checked_out': self._checkouts_ - self._checkins_,
+                'wait_time_total': self._wait_time_total_,
+                'wait_time_average': self._wait_time_total_ / self._checkouts_ if self._checkouts_ else 0.0,
+                'wait_time_max': self._wait_time_max_
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow()
+            })
+        return result
+
+
 class DatabaseAdapter(object):
+    """
+    Attributes:
+        HEALTH_TTL (int): Seconds a checked health status of a connection is considered up to date.
+        HEALTH_TIMEOUT (int): Seconds the health check of a PostgreSQL connection may take to connect and
+            to run its statement.
+        HEALTH_SLEEP_PERIOD (float): Seconds to sleep between two checks while waiting for a database.
+        POOL_DEFAULTS (dict): The pool settings used if not configured otherwise in `database_pool`.
+        POOL_SETTINGS (tuple): The supported pool settings.
+    """
+
+    POOL_DEFAULTS = {
+        'pool_recycle': 3600
+    }
+    POOL_SETTINGS = (
+        'pool_size',
+        'max_overflow',
+        'pool_timeout',
+        'pool_recycle',
+        'pool_pre_ping',
+        'statement_timeout'
+    )
+
+    HEALTH_TTL = 30
+    HEALTH_TIMEOUT = 5
+    HEALTH_SLEEP_PERIOD = 1.0
+
     _connections_ = dict()
+    _health_ = dict()
+    _health_lock_ = threading.Lock()
 
     def __init__(self):
         """
         This Class provides a bucket for database connection handling. It uses SQLalchemy for database talk.
         It enables distinct session sharing on the rfc1738 URL string. This reduces the amount of used
         sessions drastically.
+
+        It also keeps track of the health of each distinct connection. The health is checked with a
+        connection outside of the pool and cached for :attr:`HEALTH_TTL` seconds.
         """
         pass
 
     def add_connection(self, connection_string):
         """
         Adds a new connection to this object. Also creates the necessary engine and session object.
+        The engine's pool is set up with the settings returned by
+        :meth:`pyramid_oereb.core.config.Config.get_database_pool_config` and observed by a
+        :class:`PoolStatistics` instance.
 
         Args:
             connection_string (str): The rfc1738 URL string which defines the database
                 connection
         """
         if connection_string not in self._connections_:
-            engine = create_engine(connection_string, pool_recycle=30)
+            engine = create_engine(connection_string, **self.get_engine_kwargs(connection_string))
             session = orm.scoped_session(orm.sessionmaker(bind=engine))
             self._connections_[connection_string] = {
                 'engine': engine,
-                'session': session
+                'session': session,
+                'statistics': PoolStatistics(engine),
+                'health_engine': self.create_health_engine(connection_string)
             }
         else:
-            log.info('Connection already exists: {0}'.format(connection_string))
+            log.info('Connection already exists: {0}'.format(self.mask_key(connection_string)))
+
+    def get_engine_kwargs(self, connection_string):
+        """
+        Returns the keyword arguments used to create the engine of the connection.
+
+        Args:
+            connection_string (str): The rfc1738 URL string which defines the database
+                connection
+
+        Returns:
+            dict: The keyword arguments for :func:`sqlalchemy.create_engine`.
+
+        Raises:
+            pyramid.config.ConfigurationError: If an unsupported pool setting is configured.
+        """
+        from pyramid_oereb.core.config import Config
+
+        pool_config = dict(self.POOL_DEFAULTS)
+        pool_config.update(Config.get_database_pool_config(connection_string))
+        for key in pool_config:
+            if key not in self.POOL_SETTINGS:
+                raise ConfigurationError('Unsupported database pool setting "{0}", use one of: {1}'.format(
+                    key,
+                    ', '.join(self.POOL_SETTINGS)
+                ))
+        kwargs = dict([(k, v) for k, v in pool_config.items() if v is not None])
+        statement_timeout = kwargs.pop('statement_timeout', None)
+        url = make_url(connection_string)
+        if statement_timeout is not None:
+            if url.get_backend_name() != 'postgresql':
+                raise ConfigurationError('The setting "statement_timeout" is only supported for PostgreSQL')
+            kwargs['connect_args'] = {
+                'options': '-c statement_timeout={0}'.format(int(statement_timeout))
+            }
+        if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+            kwargs['poolclass'] = TimedQueuePool
+        return kwargs
+
+    def create_health_engine(self, connection_string):
+        """
+        Creates the engine used to check the health of a PostgreSQL connection. It opens a new connection
+        for each check, which neither waits for a free connection of the pool nor longer than
+        :attr:`HEALTH_TIMEOUT` seconds for the database.
+
+        Args:
+            connection_string (str): The rfc1738 URL string which defines the database
+                connection
+
+        Returns:
+            sqlalchemy.engine.Engine or None: The engine or None if the connection is not a PostgreSQL one,
+            its health is checked with a pooled connection then.
+        """
+        if make_url(connection_string).get_backend_name() != 'postgresql':
+            return None
+        return create_engine(connection_string, poolclass=NullPool, connect_args={
+            'connect_timeout': self.HEALTH_TIMEOUT,
+            'options': '-c statement_timeout={0}'.format(self.HEALTH_TIMEOUT * 1000)
+        })
 
     def get_connections(self):
         """
@@ -72,6 +279,140 @@ class DatabaseAdapter(object):
             log.info('Connection does not exist, implicitly creating it: {0}'.format(key))
             return self.get_session(key, request=request)
 
+    def check_health(self, key):
+        """
+        Checks the health of the connection by running ``SELECT 1`` (see :meth:`create_health_engine`).
+        The connection is added implicitly if it does not exist yet. The result is cached and can be
+        obtained with :meth:`get_health` afterwards.
+
+        Args:
+            key (str): The key to identify the desired connection in the pool of available
+                connections.
+
+        Returns:
+            bool: True if the database could be reached, False otherwise.
+        """
+        if key not in self._connections_:
+            self.add_connection(key)
+        connection_config = self._connections_.get(key)
+        engine = connection_config.get('health_engine') or connection_config.get('engine')
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            healthy = True
+            error = None
+        except Exception as e:
+            log.debug('Health check failed for {0}: {1}'.format(self.mask_key(key), e))
+            healthy = False
+            error = e.__class__.__name__
+        self._health_[key] = {
+            'healthy': healthy,
+            'checked': time.time(),
+            'error': error
+        }
+        return healthy
+
+    def get_health(self, key, ttl=None):
+        """
+        Returns the cached health of the connection. The database is only asked again if the cached
+        status is older than the passed time to live.
+
+        Args:
+            key (str): The key to identify the desired connection in the pool of available
+                connections.
+            ttl (int or None): The time to live of the cached status in seconds. Defaults to
+                :attr:`HEALTH_TTL`.
+
+        Returns:
+            bool: True if the database could be reached, False otherwise.
+        """
+        if ttl is None:
+            ttl = self.HEALTH_TTL
+        status = self._health_.get(key)
+        if status is None or time.time() - status.get('checked') > ttl:
+            return self.check_health(key)
+        return status.get('healthy')
+
+    def wait_until_healthy(self, key, timeout):
+        """
+        Waits until the database of the connection can be reached. Once a connection was found healthy
+        this returns immediately without touching the database again, so the waiting happens only once
+        per distinct connection and process (typically on application startup).
+
+        Args:
+            key (str): The key to identify the desired connection in the pool of available
+                connections.
+            timeout (int): Seconds to wait for the database.
+
+        Returns:
+            bool: True if the database could be reached within the timeout, False otherwise.
+        """
+        status = self._health_.get(key)
+        if status is not None and status.get('healthy'):
+            return True
+        with self._health_lock_:
+            status = self._health_.get(key)
+            if status is not None and status.get('healthy'):
+                return True
+            timeout_target = time.time() + timeout
+            while not self.check_health(key):
+                remaining = timeout_target - time.time()
+                if remaining <= 0:
+                    return False
+                log.info('Waiting for the database {0:.0f} more seconds ({1})'.format(
+                    remaining,
+                    self.mask_key(key)
+                ))
+                time.sleep(min(self.HEALTH_SLEEP_PERIOD, remaining))
+            return True
+
+    def get_health_status(self, ttl=None):
+        """
+        Returns the health of all available connections. Statuses older than the time to live are
+        checked again. The connection strings are returned with masked passwords.
+
+        Args:
+            ttl (int or None): The time to live of the cached statuses in seconds. Defaults to
+                :attr:`HEALTH_TTL`.
+
+        Returns:
+            dict: The health status (`healthy`, `checked` and `error`) for each connection.
+        """
+        result = dict()
+        for key in list(self._connections_.keys()):
+            self.get_health(key, ttl=ttl)
+            result[self.mask_key(key)] = dict(self._health_.get(key))
+        return result
+
+    def get_pool_statistics(self):
+        """
+        Returns the live pool statistics of all available connections. The connection strings are
+        returned with masked passwords.
+
+        Returns:
+            dict: The statistics (see :meth:`PoolStatistics.as_dict`) for each connection.
+        """
+        result = dict()
+        for key, connection in list(self._connections_.items()):
+            result[self.mask_key(key)] = connection.get('statistics').as_dict()
+        return result
+
+    @staticmethod
+    def mask_key(key):
+        """
+        Returns the connection string with a masked password to be used in logs and public output.
+
+        Args:
+            key (str): The rfc1738 URL string which defines the database connection.
+
+        Returns:
+            str: The connection string without password.
+        """
+        try:
+            return repr(make_url(key))
+        except Exception:
+            return '***'
+
 
 class FileAdapter(object):
 
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Produces the extracts of many real estates in one run, e.g. to regenerate the extracts of all real estates
+of a municipality. The real estates are grouped by spatial proximity. Every public law restriction source
+reads the data of a whole group at once (see
+:meth:`pyramid_oereb.core.sources.plr.PlrBaseSource.prefetch`), so the spatial queries and the lookups of
+legend entries, documents and offices are shared by the extracts of the group. The rendered extracts are
+written to disk one by one.
+"""
+import logging
+import optparse
+import os
+
+from timeit import default_timer as timer
+
+from pyramid.paster import bootstrap, setup_logging
+from pyramid.renderers import render
+from pyramid.request import Request
+
+import pyramid_oereb
+from pyramid_oereb.core.processor import create_processor
+from pyramid_oereb.core.views.webservice import Parameter
+
+log = logging.getLogger(__name__)
+
+
+def morton_code(x, y):
+    """
+    Calculates the position of a grid cell on the Z-order curve. Cells which are near to each other in
+    space mostly are near to each other on the curve.
+
+    Args:
+        x (int): The column of the cell (16 bit).
+        y (int): The row of the cell (16 bit).
+
+    Returns:
+        int: The position on the Z-order curve.
+    """
+    code = 0
+    for i in range(16):
+        code |= ((x >> i) & 1) << (2 * i)
+        code |= ((y >> i) & 1) << (2 * i + 1)
+    return code
+
+
+def group_real_estates(real_estates, group_size):
+    """
+    Groups the real estates by spatial proximity. The real estates are sorted along the Z-order curve of
+    their centroids and split into groups of the passed size.
+
+    Args:
+        real_estates (list of pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estates
+            to group.
+        group_size (int): The maximum number of real estates in one group.
+
+    Returns:
+        list of list of pyramid_oereb.lib.records.real_estate.RealEstateRecord: The groups.
+    """
+    if len(real_estates) == 0:
+        return []
+    centroids = [real_estate.limit.centroid for real_estate in real_estates]
+    min_x = min(centroid.x for centroid in centroids)
+    min_y = min(centroid.y for centroid in centroids)
+    extent = max(
+        max(centroid.x for centroid in centroids) - min_x,
+        max(centroid.y for centroid in centroids) - min_y
+    )
+    scale = 0xFFFF / extent if extent > 0 else 0
+    codes = [
+        morton_code(int((centroid.x - min_x) * scale), int((centroid.y - min_y) * scale))
+        for centroid in centroids
+    ]
+    ordered = [real_estates[i] for i in sorted(range(len(real_estates)), key=lambda i: codes[i])]
+    return [ordered[i:i + group_size] for i in range(0, len(ordered), group_size)]
+
+
+class BulkExtract(object):
+    """
+    Produces the extracts for a list of EGRIDs and writes them to files named `<EGRID>.<format>` in the
+    output directory.
+
+    Attributes:
+        FORMATS (tuple of str): The supported extract formats.
+    """
+
+    FORMATS = ('json', 'xml')
+
+    def __init__(self, request, output_path, response_format='json', group_size=50, language=None,
+                 with_geometry=False, images=False):
+        """
+        Args:
+            request (pyramid.request.Request): A request of the application. It is used to create the URLs
+                contained in the extracts.
+            output_path (str): The directory the extracts are written to. It is created if it does not
+                exist.
+            response_format (str): The extract format, one of :attr:`FORMATS`.
+            group_size (int): The maximum number of neighbouring real estates processed together.
+            language (str or None): The language of the extracts. Defaults to the configured default
+                language.
+            with_geometry (bool): Extracts with/without geometry.
+            images (bool): Extracts with/without images.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if response_format not in self.FORMATS:
+            raise ValueError('The format "{0}" is not supported for bulk extracts, use one of: {1}'.format(
+                response_format,
+                ', '.join(self.FORMATS)
+            ))
+        self._request_ = request
+        self._output_path_ = output_path
+        self._format_ = response_format
+        self._group_size_ = group_size
+        self._language_ = language
+        self._with_geometry_ = with_geometry
+        self._images_ = images
+
+    def get_params(self, egrid):
+        """
+        Returns the parameters of the extract for the passed EGRID the same way the webservice would
+        create them for a GetExtractById request.
+
+        Args:
+            egrid (str): The EGRID of the real estate.
+
+        Returns:
+            pyramid_oereb.views.webservice.Parameter: The parameters of the extract.
+        """
+        route_prefix = pyramid_oereb.route_prefix
+        extract_url = self._request_.route_url(
+            '{0}/extract'.format(route_prefix),
+            format=self._format_,
+            _query={'EGRID': egrid}
+        )
+        params = Parameter(
+            self._format_,
+            with_geometry=self._with_geometry_,
+            images=self._images_,
+            extract_url=extract_url,
+            qr_code_ref=self._request_.route_url(
+                '{0}/image/qrcode'.format(route_prefix),
+                _query={'extract_url': extract_url}
+            )
+        )
+        params.set_egrid(egrid)
+        if self._language_:
+            params.set_language(self._language_)
+        return params
+
+    def read_real_estates(self, egrids):
+        """
+        Reads the real estates of the passed EGRIDs. EGRIDs without a distinct real estate are skipped.
+
+        Args:
+            egrids (list of str): The EGRIDs of the real estates.
+
+        Returns:
+            list of pyramid_oereb.lib.records.real_estate.RealEstateRecord: The found real estates.
+        """
+        real_estate_reader = create_processor().real_estate_reader
+        real_estates = []
+        for egrid in egrids:
+            records = real_estate_reader.read(self.get_params(egrid), egrid=egrid)
+            if len(records) == 1:
+                real_estates.append(records[0])
+            else:
+                log.warning('Skipped EGRID {0}, {1} real estates found'.format(egrid, len(records)))
+        return real_estates
+
+    def write(self, extract, params):
+        """
+        Renders the extract and writes it to the output directory.
+
+        Args:
+            extract (pyramid_oereb.lib.records.extract.ExtractRecord): The extract to write.
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract.
+
+        Returns:
+            str: The path of the written file.
+        """
+        content = render(
+            'pyramid_oereb_extract_{0}'.format(self._format_),
+            (extract, params),
+            request=self._request_
+        )
+        # Renderers may return the content as an iterable of chunks to stream it
+        if isinstance(content, (bytes, str)):
+            content = [content]
+        path = os.path.join(self._output_path_, '{0}.{1}'.format(params.egrid, self._format_))
+        try:
+            with open(path, 'wb') as f:
+                for chunk in content:
+                    f.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+        except Exception:
+            # Do not leave an incomplete extract
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def run(self, egrids):
+        """
+        Produces and writes the extracts of the passed EGRIDs.
+
+        Args:
+            egrids (list of str): The EGRIDs of the real estates.
+
+        Returns:
+            dict: The statistics of the run: the number of `requested`, `written` and `failed` extracts,
+            the `time` spent in seconds and the throughput in `extracts_per_second`.
+        """
+        start_time = timer()
+        if not os.path.isdir(self._output_path_):
+            os.makedirs(self._output_path_)
+        real_estates = self.read_real_estates(egrids)
+        sld_url = self._request_.route_url('{0}/sld'.format(pyramid_oereb.route_prefix))
+        written = 0
+        failed = 0
+        for group in group_real_estates(real_estates, self._group_size_):
+            group_start_time = timer()
+            group_processor = create_processor()
+            for plr_source in group_processor.plr_sources:
+                plr_source.prefetch(group)
+            for real_estate in group:
+                params = self.get_params(real_estate.egrid)
+                try:
+                    extract = group_processor.copy_for_request().process(real_estate, params, sld_url)
+                    self.write(extract, params)
+                    written += 1
+                except Exception:
+                    log.exception('Extract for EGRID {0} failed'.format(real_estate.egrid))
+                    failed += 1
+            log.debug('DONE with group of {0} real estates, time spent: {1} seconds'.format(
+                len(group),
+                timer() - group_start_time
+            ))
+        end_time = timer()
+        statistics = {
+            'requested': len(egrids),
+            'written': written,
+            'failed': failed,
+            'time': end_time - start_time,
+            'extracts_per_second': written / (end_time - start_time) if end_time > start_time else 0.0
+        }
+        log.info('Wrote {written} of {requested} extracts ({failed} failed) in {time:.1f} seconds, '
+                 '{extracts_per_second:.2f} extracts per second'.format(**statistics))
+        return statistics
+
+
+def run():
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options] [EGRID ...]',
+        description='Create the extracts for the passed EGRIDs and write them to a directory.'
+    )
+    parser.add_option(
+        '-i', '--ini',
+        dest='ini',
+        metavar='INI',
+        type='string',
+        help='The path to the ini file of the application (e.g. development.ini).'
+    )
+    parser.add_option(
+        '-e', '--egrids',
+        dest='egrids',
+        metavar='FILE',
+        type='string',
+        help='A file containing one EGRID per line. Additional EGRIDs can be passed as arguments.'
+    )
+    parser.add_option(
+        '-o', '--output',
+        dest='output',
+        metavar='DIRECTORY',
+        type='string',
+        default='extracts',
+        help='The directory the extracts are written to (default is: extracts).'
+    )
+    parser.add_option(
+        '-f', '--format',
+        dest='format',
+        type='choice',
+        choices=BulkExtract.FORMATS,
+        default='json',
+        help='The format of the extracts: json or xml (default is: json).'
+    )
+    parser.add_option(
+        '-g', '--group-size',
+        dest='group_size',
+        type='int',
+        default=50,
+        help='The number of neighbouring real estates processed together (default is: 50).'
+    )
+    parser.add_option(
+        '-l', '--language',
+        dest='language',
+        type='string',
+        default=None,
+        help='The language of the extracts (default is the configured default language).'
+    )
+    parser.add_option(
+        '-b', '--base-url',
+        dest='base_url',
+        type='string',
+        default='http://localhost',
+        help='The base URL of the application used for the links in the extracts '
+             '(default is: http://localhost).'
+    )
+    parser.add_option(
+        '--with-geometry',
+        dest='with_geometry',
+        action='store_true',
+        default=False,
+        help='Include the geometries in the extracts.'
+    )
+    parser.add_option(
+        '--with-images',
+        dest='images',
+        action='store_true',
+        default=False,
+        help='Embed the images in the extracts.'
+    )
+    options, args = parser.parse_args()
+    if not options.ini:
+        parser.error('No ini file specified')
+    egrids = list(args)
+    if options.egrids:
+        with open(options.egrids) as f:
+            egrids.extend([line.strip() for line in f if line.strip()])
+    if len(egrids) == 0:
+        parser.error('No EGRIDs specified')
+
+    setup_logging(options.ini)
+    env = bootstrap(options.ini, request=Request.blank('/', base_url=options.base_url))
+    try:
+        BulkExtract(
+            env['request'],
+            options.output,
+            response_format=options.format,
+            group_size=options.group_size,
+            language=options.language,
+            with_geometry=options.with_geometry,
+            images=options.images
+        ).run(egrids)
+    finally:
+        env['closer']()
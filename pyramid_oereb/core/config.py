@@ -24,6 +24,7 @@ from pyramid_oereb.core.readers.document import DocumentReader
 from pyramid_oereb.core.readers.office import OfficeReader
 from pyramid_oereb.core.readers.general_information import GeneralInformationReader
 from pyramid_oereb.core.readers.map_layering import MapLayeringReader
+from pyramid_oereb.core.tracing import trace
 from sqlalchemy.exc import ProgrammingError
 
 log = logging.getLogger(__name__)
@@ -51,6 +52,7 @@ class Config(object):
     glossaries = None
     disclaimers = None
     municipalities = None
+    _indexes = dict()
 
     @staticmethod
     def init(configfile, configsection, c2ctemplate_style=False, init_data=False):
@@ -67,6 +69,7 @@ class Config(object):
 
         assert Config._config is None
 
+        Config._indexes.clear()
         Config._config = _parse(configfile, configsection, c2ctemplate_style)
         if init_data:
             Config.init_law_status()
@@ -84,6 +87,176 @@ class Config(object):
             Config.init_glossaries()
             Config.init_disclaimers()
             Config.init_municipalities()
+            Config.init_indexes()
+
+    @staticmethod
+    def init_indexes():
+        """
+        Builds the indexes used to resolve themes, law status, document types, municipalities and
+        availabilities. The indexes are built lazily on first use anyway, this just moves the work to the
+        start of the application.
+        """
+        Config._get_theme_config_index()
+        if Config.themes is not None:
+            Config._get_theme_index()
+        if Config.law_status is not None:
+            Config._get_law_status_index()
+        if Config.document_types is not None:
+            Config._get_document_type_index()
+        if Config.availabilities is not None:
+            Config._get_availability_index()
+        if Config.municipalities is not None:
+            Config._get_municipality_index()
+
+    @staticmethod
+    def _get_index(name, sources, build):
+        """
+        Returns the index with the passed name. The index is built from the passed sources and kept until
+        one of the sources is replaced by another object (e.g. after reading the data again).
+
+        Args:
+            name (str or tuple): The name of the index.
+            sources (tuple): The objects the index is built from.
+            build (callable): Builds the index, it is called with the sources as arguments.
+
+        Returns:
+            dict: The index.
+        """
+        entry = Config._indexes.get(name)
+        if entry is None or any(cached is not source for cached, source in zip(entry[0], sources)):
+            entry = (sources, build(*sources))
+            Config._indexes[name] = entry
+        return entry[1]
+
+    @staticmethod
+    def _index_by(items, key):
+        """
+        Indexes the passed items. Like a linear search, the first item wins if several have the same key.
+
+        Args:
+            items (list): The items to index.
+            key (callable): Returns the key of an item.
+
+        Returns:
+            dict: The items by key.
+        """
+        index = dict()
+        for item in items:
+            index.setdefault(key(item), item)
+        return index
+
+    @staticmethod
+    def _get_theme_index():
+        return Config._get_index(
+            'themes',
+            (Config.themes,),
+            lambda themes: Config._index_by(themes, lambda theme: (theme.code, theme.sub_code))
+        )
+
+    @staticmethod
+    def _get_theme_config_index():
+        plrs = Config._config.get('plrs')
+        if not isinstance(plrs, list):
+            plrs = []
+        return Config._get_index(
+            'theme_configs',
+            (plrs,),
+            lambda themes: Config._index_by(themes, lambda theme: theme.get('code').lower())
+        )
+
+    @staticmethod
+    def _get_law_status_index():
+        return Config._get_index(
+            'law_status',
+            (Config.law_status,),
+            lambda law_status: Config._index_by(law_status, lambda record: record.code)
+        )
+
+    @staticmethod
+    def _get_document_type_index():
+        return Config._get_index(
+            'document_types',
+            (Config.document_types,),
+            lambda document_types: Config._index_by(document_types, lambda record: record.code)
+        )
+
+    @staticmethod
+    def _get_availability_index():
+        return Config._get_index(
+            'availabilities',
+            (Config.availabilities,),
+            lambda availabilities: Config._index_by(
+                availabilities,
+                lambda availability: (int(availability.fosnr), availability.theme_code)
+            )
+        )
+
+    @staticmethod
+    def _get_municipality_index():
+        return Config._get_index(
+            'municipalities',
+            (Config.municipalities,),
+            lambda municipalities: Config._index_by(municipalities, lambda record: record.fosnr)
+        )
+
+    @staticmethod
+    def _get_lookup(lookups, key, code):
+        """
+        Returns the lookup of the passed lookups which has the passed code for the passed key.
+
+        Args:
+            lookups (list of dict): The configured lookups.
+            key (str): The key of the lookup pair.
+            code (str): The value of the lookup pair.
+
+        Returns:
+            dict or None: The lookup or None if there is none with this code.
+        """
+        index = Config._get_index(
+            ('lookups', id(lookups), key),
+            (lookups,),
+            lambda items: Config._index_by(items, lambda lookup: lookup[key])
+        )
+        return index.get(code)
+
+    @staticmethod
+    def _get_translated_record(lookup, records, record_class):
+        """
+        Returns the record with the extract code of the passed lookup and the title of the record with its
+        transfer code. The translated records are created once and shared by all callers, they must not
+        be modified.
+
+        Args:
+            lookup (dict): The lookup of the data code.
+            records (list): The configured records (law status or document types) to get the title from.
+            record_class (type): The class of the translated record.
+
+        Returns:
+            pyramid_oereb.core.records.law_status.LawStatusRecord or
+            pyramid_oereb.core.records.document_types.DocumentTypeRecord: The translated record.
+        """
+        translated_records = Config._get_index(
+            ('translated', record_class.__name__),
+            (records,),
+            lambda items: dict()
+        )
+        key = (lookup['data_code'], lookup['transfer_code'], lookup['extract_code'])
+        translated_record = translated_records.get(key)
+        if translated_record is None:
+            if record_class is LawStatusRecord:
+                record = Config.get_law_status_by_code(lookup['transfer_code'])
+            else:
+                record = Config.get_document_type_by_code(lookup['transfer_code'])
+            trace(
+                log,
+                'Translating code',
+                data_code=lookup['data_code'],
+                extract_code=lookup['extract_code'],
+                title=record.title
+            )
+            translated_record = record_class(lookup['extract_code'], record.title)
+            translated_records[key] = translated_record
+        return translated_record
 
     @staticmethod
     def get_config():
@@ -519,9 +692,9 @@ class Config(object):
 
         if Config.themes is None:
             raise ConfigurationError("Themes have not been initialized")
-        theme_result = [theme for theme in Config.themes if theme.sub_code == sub_code and theme.code == code]
-        if len(theme_result) > 0:
-            return theme_result[0]
+        theme = Config._get_theme_index().get((code, sub_code))
+        if theme is not None:
+            return theme
         else:
             raise ConfigurationError(
                 f"Theme {code} with sub-code {sub_code} not found in the application configuration"
@@ -947,10 +1120,9 @@ class Config(object):
             ConfigurationError
         """
 
-        lookups = Config.get_document_types_lookups(theme_code)
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup(Config.get_document_types_lookups(theme_code), key, code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup for theme {} with key "{}" and code "{}" is not '
             'defined in configuration!'.format(theme_code, key, code)
@@ -990,14 +1162,7 @@ class Config(object):
         """
 
         lookup = Config.get_document_type_lookup_by_data_code(theme_code, data_code)
-        record = Config.get_document_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = DocumentTypeRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(lookup, Config.document_types, DocumentTypeRecord)
 
     @staticmethod
     def get_main_document_types_lookups():
@@ -1034,10 +1199,9 @@ class Config(object):
             ConfigurationError
         """
 
-        lookups = Config.get_main_document_types_lookups()
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup(Config.get_main_document_types_lookups(), key, code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup with key "{}" and code "{}" is not '
             'defined in configuration!'.format(key, code)
@@ -1074,14 +1238,7 @@ class Config(object):
         """
 
         lookup = Config.get_main_document_type_lookup_by_data_code(data_code)
-        record = Config.get_document_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = DocumentTypeRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(lookup, Config.document_types, DocumentTypeRecord)
 
     @staticmethod
     def get_document_type_by_code(code):
@@ -1102,9 +1259,9 @@ class Config(object):
         if Config.document_types is None:
             raise ConfigurationError("The document types have not been initialized")
 
-        for document_type in Config.document_types:
-            if document_type.code == code:
-                return document_type
+        document_type = Config._get_document_type_index().get(code)
+        if document_type is not None:
+            return document_type
         raise ConfigurationError(f"Document type {code} not found in the application configuration")
 
     @staticmethod
@@ -1477,6 +1634,29 @@ class Config(object):
 
         return Config._config.get('oereblex')
 
+    @staticmethod
+    def get_database_pool_config(db_connection):
+        """
+        Returns the pool settings for the passed database connection. These are the defaults defined in
+        `database_pool` updated with the settings of the matching entry in `database_pool.connections`.
+
+        Args:
+            db_connection (str): The rfc1738 URL string which defines the database connection.
+
+        Returns:
+            dict: The pool settings for the connection. An empty dictionary if nothing is configured.
+        """
+
+        if Config._config is None:
+            return dict()
+
+        pool_config = Config._config.get('database_pool') or dict()
+        result = dict([(k, v) for k, v in pool_config.items() if k != 'connections'])
+        for connection in pool_config.get('connections') or list():
+            if connection.get('db_connection') == db_connection:
+                result.update(dict([(k, v) for k, v in connection.items() if k != 'db_connection']))
+        return result
+
     @staticmethod
     def get(key, default=None):
         """
@@ -1597,10 +1777,9 @@ class Config(object):
             ConfigurationError
         """
 
-        lookups = Config.get_law_status_lookups(theme_code)
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup(Config.get_law_status_lookups(theme_code), key, code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Law status lookup for theme {} with key "{}" and code "{}" is not '
             'defined in configuration!'.format(theme_code, key, code)
@@ -1638,14 +1817,7 @@ class Config(object):
 
         """
         lookup = Config.get_law_status_lookup_by_data_code(theme_code, data_code)
-        record = Config.get_law_status_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = LawStatusRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(lookup, Config.law_status, LawStatusRecord)
 
     @staticmethod
     def get_main_law_status_lookups():
@@ -1681,10 +1853,9 @@ class Config(object):
             ConfigurationError
         """
 
-        lookups = Config.get_main_law_status_lookups()
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup(Config.get_main_law_status_lookups(), key, code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup with key "{}" and code "{}" is not'
             'defined in configuration!'.format(key, code)
@@ -1720,14 +1891,7 @@ class Config(object):
         """
 
         lookup = Config.get_main_law_status_lookup_by_data_code(data_code)
-        record = Config.get_law_status_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = LawStatusRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(lookup, Config.law_status, LawStatusRecord)
 
     @staticmethod
     def get_law_status_by_code(law_status_code):
@@ -1744,9 +1908,9 @@ class Config(object):
         if Config.law_status is None:
             raise ConfigurationError("The law status have not been initialized")
 
-        for record in Config.law_status:
-            if record.code == law_status_code:
-                return record
+        record = Config._get_law_status_index().get(law_status_code)
+        if record is not None:
+            return record
         raise ConfigurationError(f"Law status {law_status_code} not found in the application configuration")
 
     @staticmethod
@@ -1762,12 +1926,7 @@ class Config(object):
         """
 
         assert Config._config is not None
-        themes = Config._config.get('plrs')
-        if themes and isinstance(themes, list):
-            for theme in themes:
-                if theme.get('code').lower() == theme_code.lower():
-                    return theme
-        return None
+        return Config._get_theme_config_index().get(theme_code.lower())
 
     @staticmethod
     def get_layer_config(theme_code):
@@ -1871,10 +2030,12 @@ class Config(object):
         """
         lookup = Config.get_real_estate_type_lookup_by_data_code(data_code)
         record = Config.get_real_estate_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                data_code, lookup['extract_code'], record.title
-            )
+        trace(
+            log,
+            'Translating code',
+            data_code=data_code,
+            extract_code=lookup['extract_code'],
+            title=record.title
         )
         translated_record = RealEstateTypeRecord(lookup['extract_code'], record.title)
         return translated_record
@@ -2030,9 +2191,9 @@ class Config(object):
         """
         if Config.availabilities is None:
             raise ConfigurationError("The availabilities have not been initialized")
-        for availability in Config.availabilities:
-            if int(fosnr) == int(availability.fosnr) and theme_code == availability.theme_code:
-                return availability.available
+        availability = Config._get_availability_index().get((int(fosnr), theme_code))
+        if availability is not None:
+            return availability.available
         return True
 
     @staticmethod
@@ -2050,9 +2211,11 @@ class Config(object):
             ConfigurationError: If no match was found
 
         """
-        for municipality in Config.municipalities:
-            if municipality.fosnr == fosnr:
-                return municipality
+        if Config.municipalities is None:
+            raise ConfigurationError("The municipalities have not been initialized")
+        municipality = Config._get_municipality_index().get(fosnr)
+        if municipality is not None:
+            return municipality
         raise ConfigurationError(
             'No municipalitiy with fosnr {} could be found in the configured municipalities ({}).'.format(
                 fosnr,
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+An optional cache for the rendered responses of `GetExtractById`. The same real estates are often requested
+again and again (e.g. when notary offices reprint or portals refresh an extract), with the cache the extract
+is processed and rendered only once.
+
+The cache is keyed by all the parameters of the extract
+(:class:`pyramid_oereb.core.views.webservice.Parameter`) and evicts the least recently used responses when it
+is full. The responses are kept by a backend, which can be configured by its class and parameters. Two
+backends are available: :class:`MemoryBackend` keeps the responses in the memory of the process,
+:class:`FileBackend` keeps them in a directory which can be shared by several processes.
+
+Streamed responses are still sent chunk by chunk, their chunks are written to a temporary file while they
+are sent, which stays in memory only up to 1 MB. The response is cached once it was sent completely, a
+response which was not sent completely (e.g. because the client disconnected) is not cached. The
+:class:`FileBackend` copies the body from the temporary file and delivers it in chunks from its file.
+
+After a data import the cached extracts of the imported themes or municipalities have to be invalidated,
+e.g. with the `invalidate_extract_cache` script. It can only reach the responses kept by the
+:class:`FileBackend`, the :class:`MemoryBackend` has to be cleared by restarting the application.
+
+.. code-block:: yaml
+
+    extract:
+      cache:
+        enabled: true
+        # Seconds a cached extract is delivered (default: no limit)
+        ttl: 86400
+        backend:
+          class: pyramid_oereb.core.extract_cache.FileBackend
+          params:
+            path: /var/cache/pyramid_oereb/extracts
+            max_entries: 10000
+            eviction_ratio: 0.9
+"""
+import functools
+import hashlib
+import logging
+import optparse
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+
+from pyramid.path import DottedNameResolver
+from pyramid.response import Response
+
+from pyramid_oereb.core.renderer.streaming import SPOOL_SIZE, iter_file
+from pyramid_oereb.core.tracing import trace
+
+log = logging.getLogger(__name__)
+
+
+class BaseBackend(object):
+    """
+    Base class for the backends of the extract cache. A backend keeps the cache entries by their key and
+    evicts the least recently used entries if there are more than `max_entries`.
+    """
+
+    def __init__(self, max_entries=1000):
+        """
+        Args:
+            max_entries (int): The maximum number of cached entries.
+        """
+        self._max_entries_ = max_entries
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the entry of the passed key and marks it as recently used. If a body was set with the entry,
+        it is the `body` of the entry, either as bytes or as a file opened for reading, which has to be
+        closed by the caller.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            dict or None: The entry or None if there is no entry for the key.
+        """
+        raise NotImplementedError
+
+    def set(self, key, entry, body=None):
+        """
+        Adds or replaces the entry of the passed key.
+
+        Args:
+            key (str): The key of the entry.
+            entry (dict): The entry.
+            body (file or None): A binary file, positioned at its start, whose content is kept as the
+                `body` of the entry.
+        """
+        raise NotImplementedError
+
+    def add(self, key, entry):
+        """
+        Adds the entry of the passed key if there is none yet. The check and the addition are atomic, so
+        of several processes or threads adding the same key only one succeeds.
+
+        Args:
+            key (str): The key of the entry.
+            entry (dict): The entry.
+
+        Returns:
+            bool: True if the entry was added.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Removes the entry of the passed key if there is one.
+
+        Args:
+            key (str): The key of the entry.
+        """
+        raise NotImplementedError
+
+    def tags(self):
+        """
+        Returns the tags of all entries.
+
+        Returns:
+            list of tuple: The key and the tags of all entries.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(BaseBackend):
+    """
+    Keeps the cache entries in the memory of the process.
+    """
+
+    def __init__(self, max_entries=1000):
+        super(MemoryBackend, self).__init__(max_entries)
+        self._entries_ = OrderedDict()
+        self._lock_ = threading.Lock()
+
+    def get(self, key):
+        with self._lock_:
+            entry = self._entries_.get(key)
+            if entry is not None:
+                self._entries_.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, body=None):
+        if body is not None:
+            entry = dict(entry, body=body.read())
+        with self._lock_:
+            self._set_(key, entry)
+
+    def add(self, key, entry):
+        with self._lock_:
+            if key in self._entries_:
+                return False
+            self._set_(key, entry)
+            return True
+
+    def _set_(self, key, entry):
+        self._entries_[key] = entry
+        self._entries_.move_to_end(key)
+        while len(self._entries_) > self._max_entries_:
+            self._entries_.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        with self._lock_:
+            self._entries_.pop(key, None)
+
+    def tags(self):
+        with self._lock_:
+            return [(key, entry['tags']) for key, entry in self._entries_.items()]
+
+    def __len__(self):
+        return len(self._entries_)
+
+
+class FileBackend(BaseBackend):
+    """
+    Keeps the cache entries as files in a directory. The modification time of the files is used to find the
+    least recently used entries. A body set with an entry is written to the file after the entry, it is
+    read from there only when it is delivered.
+
+    The entries added by the process are counted and the directory is only listed when there are more than
+    `max_entries`. The least recently used entries are then evicted until `eviction_ratio` of
+    `max_entries` are left, so the directory is listed once per batch of added entries. The entries added
+    by other processes sharing the directory are counted when the directory is listed, until then it may
+    hold more entries.
+    """
+
+    def __init__(self, path, max_entries=1000, eviction_ratio=0.9):
+        """
+        Args:
+            path (str): The directory of the cache files. It is created if it does not exist.
+            max_entries (int): The maximum number of cached entries.
+            eviction_ratio (float): The part of `max_entries` left after an eviction.
+        """
+        super(FileBackend, self).__init__(max_entries)
+        self._path_ = path
+        self._eviction_ratio_ = eviction_ratio
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._lock_ = threading.Lock()
+        self._count_ = len(self._get_files())
+
+    def _get_file(self, key):
+        return os.path.join(self._path_, '{0}.pickle'.format(hashlib.sha256(key.encode('utf-8')).hexdigest()))
+
+    def _get_files(self):
+        return [
+            os.path.join(self._path_, name) for name in os.listdir(self._path_) if name.endswith('.pickle')
+        ]
+
+    def _read(self, file_path, with_body=False):
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            return None
+        try:
+            entry = pickle.load(f)
+            if with_body and entry.get('file_body', False):
+                # The body follows the entry in the file
+                entry['body'] = f
+                return entry
+        except (OSError, EOFError, pickle.UnpicklingError):
+            entry = None
+        f.close()
+        return entry
+
+    def get(self, key):
+        file_path = self._get_file(key)
+        entry = self._read(file_path, with_body=True)
+        if entry is None:
+            return None
+        if entry.get('key') != key:
+            if entry.get('file_body', False):
+                entry['body'].close()
+            return None
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        return entry
+
+    def _write_temp_file_(self, key, entry, body=None):
+        temp_path = '{0}.{1}.{2}.tmp'.format(self._get_file(key), os.getpid(), threading.get_ident())
+        with open(temp_path, 'wb') as f:
+            pickle.dump(dict(entry, key=key, file_body=body is not None), f, protocol=pickle.HIGHEST_PROTOCOL)
+            if body is not None:
+                shutil.copyfileobj(body, f)
+        return temp_path
+
+    def set(self, key, entry, body=None):
+        file_path = self._get_file(key)
+        added = not os.path.exists(file_path)
+        os.replace(self._write_temp_file_(key, entry, body), file_path)
+        if added:
+            self._count_added_()
+
+    def add(self, key, entry):
+        temp_path = self._write_temp_file_(key, entry)
+        try:
+            # Linking fails if the file exists, unlike the replacement it never overwrites an entry
+            os.link(temp_path, self._get_file(key))
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(temp_path)
+        self._count_added_()
+        return True
+
+    def _count_added_(self):
+        with self._lock_:
+            self._count_ += 1
+            if self._count_ > self._max_entries_:
+                self._count_ = self._evict_()
+
+    def _evict_(self):
+        files = self._get_files()
+        if len(files) <= self._max_entries_:
+            return len(files)
+        remaining = int(self._max_entries_ * self._eviction_ratio_)
+        files.sort(key=lambda path: os.stat(path).st_mtime if os.path.exists(path) else 0)
+        for path in files[:len(files) - remaining]:
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+        return remaining
+
+    def delete(self, key):
+        try:
+            os.remove(self._get_file(key))
+        except OSError:
+            return
+        with self._lock_:
+            self._count_ = max(self._count_ - 1, 0)
+
+    def tags(self):
+        tags = []
+        for file_path in self._get_files():
+            entry = self._read(file_path)
+            if entry is not None:
+                tags.append((entry['key'], entry['tags']))
+        return tags
+
+    def __len__(self):
+        return len(self._get_files())
+
+
+class CollectingAppIter(object):
+    """
+    Passes the chunks of a response body through and writes them to a temporary file, which stays in memory
+    only up to `max_size` bytes. The file is passed to a callback once all chunks were sent.
+    """
+
+    def __init__(self, app_iter, callback, max_size=SPOOL_SIZE):
+        """
+        Args:
+            app_iter (iterable): The chunks (bytes) of the response body.
+            callback (callable): Called with the complete body, as a binary file positioned at its start,
+                once all chunks were sent. The file is closed after the call.
+            max_size (int): The size in bytes up to which the body is kept in memory.
+        """
+        self._app_iter_ = app_iter
+        self._callback_ = callback
+        self._max_size_ = max_size
+
+    def __iter__(self):
+        with tempfile.SpooledTemporaryFile(max_size=self._max_size_) as body:
+            for chunk in self._app_iter_:
+                body.write(chunk)
+                yield chunk
+            body.seek(0)
+            self._callback_(body)
+
+    def close(self):
+        close = getattr(self._app_iter_, 'close', None)
+        if close is not None:
+            close()
+
+
+class ExtractCache(object):
+    """
+    Caches the rendered extract responses. Only successful responses are cached.
+    """
+
+    def __init__(self, backend, ttl=None):
+        """
+        Args:
+            backend (BaseBackend): The backend keeping the cached responses.
+            ttl (int or None): The seconds a cached response is delivered, None for no limit.
+        """
+        self._backend_ = backend
+        self._ttl_ = ttl
+        self.hits = 0
+        self.misses = 0
+        self._statistics_lock_ = threading.Lock()
+
+    @staticmethod
+    def get_key(params):
+        """
+        Returns the cache key of an extract.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract.
+
+        Returns:
+            str: The cache key.
+        """
+        return repr((
+            params.egrid,
+            params.identdn,
+            params.number,
+            params.format,
+            params.with_geometry,
+            params.images,
+            params.signed,
+            params.language,
+            tuple(params.topics) if params.topics else None,
+            params.extract_url,
+            params.qr_code_ref
+        ))
+
+    def get_response(self, params):
+        """
+        Returns the cached response of an extract.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract.
+
+        Returns:
+            pyramid.response.Response or None: The cached response or None if it is not cached.
+        """
+        key = self.get_key(params)
+        entry = self._backend_.get(key)
+        if entry is not None and self._ttl_ is not None and time.time() - entry['created'] > self._ttl_:
+            if not isinstance(entry['body'], bytes):
+                entry['body'].close()
+            self._backend_.delete(key)
+            entry = None
+        with self._statistics_lock_:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        trace(log, 'Delivering cached extract', key=key)
+        if isinstance(entry['body'], bytes):
+            return Response(body=entry['body'], status=entry['status'], headerlist=list(entry['headerlist']))
+        return Response(
+            app_iter=iter_file(entry['body']),
+            status=entry['status'],
+            headerlist=list(entry['headerlist'])
+        )
+
+    def set_response(self, params, extract, response):
+        """
+        Caches the response of an extract. The body of the response is not read at once, the response is
+        cached when its body was sent completely.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract.
+            extract (pyramid_oereb.lib.records.extract.ExtractRecord): The extract, its themes and its
+                municipality are used to invalidate the response later.
+            response (pyramid.response.Response): The rendered response, its body is replaced by one
+                writing the chunks to a temporary file while they are sent.
+        """
+        if response.status_int != 200:
+            return
+        themes = set()
+        for theme_list in [extract.concerned_theme, extract.not_concerned_theme, extract.theme_without_data]:
+            themes.update(theme.code for theme in theme_list or [])
+        entry = {
+            'status': response.status,
+            'tags': {
+                'themes': themes,
+                'fosnr': extract.real_estate.fosnr
+            }
+        }
+        # Replacing the body resets the content length
+        content_length = response.content_length
+        response.app_iter = CollectingAppIter(
+            response.app_iter,
+            functools.partial(self._set_sent_response_, self.get_key(params), entry)
+        )
+        response.content_length = content_length
+        entry['headerlist'] = list(response.headerlist)
+
+    def _set_sent_response_(self, key, entry, body):
+        entry['created'] = time.time()
+        self._backend_.set(key, entry, body=body)
+
+    def invalidate(self, theme_code=None, fosnr=None):
+        """
+        Removes the cached responses of the passed theme and/or municipality. The responses matching one of
+        the passed arguments are removed. Without arguments all responses are removed.
+
+        Args:
+            theme_code (str or None): The code of the theme.
+            fosnr (int or None): The federal number of the municipality.
+
+        Returns:
+            int: The number of removed responses.
+        """
+        removed = 0
+        for key, tags in self._backend_.tags():
+            if (theme_code is None and fosnr is None) or theme_code in tags['themes'] or \
+                    (fosnr is not None and int(fosnr) == int(tags['fosnr'])):
+                self._backend_.delete(key)
+                removed += 1
+        log.info('Removed {0} extracts from the cache (theme: {1}, fosnr: {2})'.format(
+            removed,
+            theme_code,
+            fosnr
+        ))
+        return removed
+
+    def get_statistics(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: The number of `hits`, `misses`, `evictions` and cached `entries`.
+        """
+        with self._statistics_lock_:
+            hits, misses = self.hits, self.misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': self._backend_.evictions,
+            'entries': len(self._backend_)
+        }
+
+
+def create_extract_cache(cache_config):
+    """
+    Creates the extract cache from its configuration.
+
+    Args:
+        cache_config (dict): The `cache` settings of the `extract` section.
+
+    Returns:
+        ExtractCache: The extract cache.
+    """
+    backend_config = cache_config.get('backend') or {}
+    backend_class = DottedNameResolver().maybe_resolve(
+        backend_config.get('class', 'pyramid_oereb.core.extract_cache.MemoryBackend')
+    )
+    backend = backend_class(**(backend_config.get('params') or {}))
+    return ExtractCache(backend, ttl=cache_config.get('ttl'))
+
+
+_extract_cache = None
+_extract_cache_lock = threading.Lock()
+
+
+def get_extract_cache():
+    """
+    Returns the process wide extract cache.
+
+    Returns:
+        ExtractCache or None: The extract cache or None if it is not enabled.
+    """
+    global _extract_cache
+    if _extract_cache is None:
+        from pyramid_oereb.core.config import Config
+        cache_config = (Config.get('extract') or {}).get('cache') or {}
+        if not cache_config.get('enabled', False):
+            return None
+        with _extract_cache_lock:
+            if _extract_cache is None:
+                _extract_cache = create_extract_cache(cache_config)
+    return _extract_cache
+
+
+def run():
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options]',
+        description='Remove the cached extracts of a theme and/or municipality, e.g. after a data import.'
+    )
+    parser.add_option(
+        '-c', '--configuration',
+        dest='configuration',
+        metavar='YAML',
+        type='string',
+        help='The absolute path to the configuration yaml file.'
+    )
+    parser.add_option(
+        '-s', '--section',
+        dest='section',
+        metavar='SECTION',
+        type='string',
+        default='pyramid_oereb',
+        help='The section which contains configuration (default is: pyramid_oereb).'
+    )
+    parser.add_option(
+        '-t', '--theme',
+        dest='theme',
+        metavar='CODE',
+        type='string',
+        default=None,
+        help='The code of the theme to invalidate.'
+    )
+    parser.add_option(
+        '-m', '--municipality',
+        dest='fosnr',
+        metavar='FOSNR',
+        type='int',
+        default=None,
+        help='The federal number of the municipality to invalidate.'
+    )
+    parser.add_option(
+        '-a', '--all',
+        dest='all',
+        action='store_true',
+        default=False,
+        help='Invalidate all cached extracts.'
+    )
+    options, args = parser.parse_args()
+    if not options.configuration:
+        parser.error('No configuration file specified')
+    if options.theme is None and options.fosnr is None and not options.all:
+        parser.error('Specify a theme, a municipality or all')
+
+    from pyramid_oereb.core.config import Config
+    Config.init(options.configuration, options.section)
+    cache_config = (Config.get('extract') or {}).get('cache') or {}
+    if not cache_config.get('enabled', False):
+        parser.error('The extract cache is not enabled')
+    removed = create_extract_cache(cache_config).invalidate(theme_code=options.theme, fosnr=options.fosnr)
+    print('Removed {0} cached extracts'.format(removed))
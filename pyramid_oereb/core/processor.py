@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
 
 from operator import attrgetter
 
 from pyramid.path import DottedNameResolver
 
 from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.records.geometry import PreparedLimit
 from pyramid_oereb.core.records.plr import PlrRecord
 from pyramid_oereb.core.readers.extract import ExtractReader
 from pyramid_oereb.core.readers.real_estate import RealEstateReader
+from pyramid_oereb.core.tracing import span, trace
+from pyramid_oereb.core.wms import get_fetcher
 
 
 log = logging.getLogger(__name__)
@@ -50,7 +54,7 @@ class Processor(object):
                 if doc.published:
                     published_docs.append(doc)
                 else:
-                    log.debug("filtering out non-published document {}".format(doc))
+                    trace(log, 'filtering out non-published document', document=doc)
             record.documents = published_docs
         return record
 
@@ -70,7 +74,7 @@ class Processor(object):
                 if doc.only_in_municipality in [None, fosnr]:
                     relevant_docs.append(doc)
                 else:
-                    log.debug("filtering out document (not relevant for this municipality) {}".format(doc))
+                    trace(log, 'filtering out document (not relevant for this municipality)', document=doc)
             record.documents = relevant_docs
         return record
 
@@ -93,20 +97,23 @@ class Processor(object):
         real_estate = extract.real_estate
         inside_plrs = []
         outside_plrs = []
+        # The limit is prepared (and buffered per tolerance) once for all PLRs of the real estate
+        prepared_limit = PreparedLimit(real_estate.limit)
+        geometry_types = Config.get('geometry_types')
 
         for public_law_restriction in real_estate.public_law_restrictions:
             if isinstance(public_law_restriction, PlrRecord) and public_law_restriction.published:
                 # Test if the geometries list is now empty - if so remove plr from plr list
-                if public_law_restriction.calculate(real_estate, Config.get('geometry_types')):
-                    log.debug("plr_tolerance_check: keeping as potentially concerned plr {}".
-                              format(public_law_restriction))
+                if public_law_restriction.calculate(real_estate, geometry_types, prepared_limit):
+                    trace(log, 'plr_tolerance_check: keeping as potentially concerned plr',
+                          plr=public_law_restriction)
                     public_law_restriction = self.filter_documents_by_fosnr(public_law_restriction,
                                                                             real_estate.fosnr)
                     public_law_restriction = self.filter_published_documents(public_law_restriction)
                     inside_plrs.append(public_law_restriction)
                 else:
-                    log.debug("plr_tolerance_check: removing from the concerned plrs {}".
-                              format(public_law_restriction))
+                    trace(log, 'plr_tolerance_check: removing from the concerned plrs',
+                          plr=public_law_restriction)
                     outside_plrs.append(public_law_restriction)
 
         # Check if theme is concerned
@@ -126,9 +133,8 @@ class Processor(object):
             themes_to_move.reverse()
             for idx in themes_to_move:
                 new_not_concerned_theme = extract.concerned_theme.pop(idx)
-                log.debug("plr_tolerance_check() moving from concerned_theme to not_concerned_theme: {}"
-                          .format(new_not_concerned_theme)
-                          )
+                trace(log, 'plr_tolerance_check: moving from concerned_theme to not_concerned_theme',
+                      theme=new_not_concerned_theme)
                 extract.not_concerned_theme.append(new_not_concerned_theme)
             # Need to reorder, because order must stay exactly as defined in configuration
             extract.not_concerned_theme = sorted(extract.not_concerned_theme, key=attrgetter('extract_index'))
@@ -141,7 +147,8 @@ class Processor(object):
         """
         Handles all view service related stuff. In the moment this is:
             * construction of the correct url (reference_wms, multilingual) depending on the real estate
-            * downloading of the image (if parameter was set) for the requested or default language
+            * downloading of the images (if parameter was set) for the requested or default language, all
+              images are downloaded in parallel (see :mod:`pyramid_oereb.core.wms`)
 
         Args:
             real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord):
@@ -169,14 +176,15 @@ class Processor(object):
             map_size[1],
             bbox
         )
-        if images:
-            real_estate.plan_for_land_register.download_wms_content(language)
-            real_estate.plan_for_land_register_main_page.download_wms_content(language)
-
         for public_law_restriction in real_estate.public_law_restrictions:
             public_law_restriction.view_service.get_full_wms_url(language, map_size[0], map_size[1], bbox)
-            if images:
-                public_law_restriction.view_service.download_wms_content(language)
+
+        if images:
+            get_fetcher().download(
+                [real_estate.plan_for_land_register, real_estate.plan_for_land_register_main_page] +
+                [plr.view_service for plr in real_estate.public_law_restrictions],
+                language
+            )
         return real_estate
 
     @staticmethod
@@ -259,6 +267,22 @@ class Processor(object):
         """
         return self._extract_reader_
 
+    def copy_for_request(self):
+        """
+        Returns a processor which is bound to exactly one request. It reuses the readers and sources of
+        this processor (which are built only once per process) but has its own per request state. So the
+        returned processor must not be shared between requests.
+
+        Returns:
+            pyramid_oereb.lib.processor.Processor: The request bound processor.
+        """
+        plr_sources = [plr_source.copy_for_request() for plr_source in self._plr_sources_]
+        return Processor(
+            real_estate_reader=self._real_estate_reader_.copy_for_request(),
+            plr_sources=plr_sources,
+            extract_reader=self._extract_reader_.copy_for_request(plr_sources)
+        )
+
     def process(self, real_estate, params, sld_url):
         """
         Central processing method to hook in from webservice.
@@ -274,10 +298,11 @@ class Processor(object):
         Returns:
             pyramid_oereb.lib.records.extract.ExtractRecord: The generated extract record.
         """
-        log.debug("process() start")
         municipality = Config.municipality_by_fosnr(real_estate.fosnr)
-        extract_raw = self._extract_reader_.read(params, real_estate, municipality)
-        extract = self.plr_tolerance_check(extract_raw)
+        with span(log, 'read extract', egrid=real_estate.egrid):
+            extract_raw = self._extract_reader_.read(params, real_estate, municipality)
+        with span(log, 'plr tolerance check'):
+            extract = self.plr_tolerance_check(extract_raw)
 
         resolver = DottedNameResolver()
         sort_within_themes_method_string = Config.get('extract').get('sort_within_themes_method')
@@ -292,22 +317,25 @@ class Processor(object):
         # care about the circumstance that after tolerance check plrs will be dismissed which were
         # recognized as intersecting before. To avoid this the tolerance check is gathering all plrs
         # intersecting and not intersecting and starts the legend entry sorting after.
-        self.view_service_handling(extract.real_estate, params.images, params.format, params.language)
+        with span(log, 'view service handling'):
+            self.view_service_handling(extract.real_estate, params.images, params.format, params.language)
 
         extract.disclaimers = Config.disclaimers
         extract.glossaries = Config.glossaries
-        log.debug("process() done, returning extract.")
         return extract
 
 
-def create_processor():
+_processor = None
+_processor_config = None
+_processor_lock = threading.Lock()
+
+
+def _build_processor():
     """
-    Creates and returns a processor based on the application configuration.
-    You should use one (and only one) processor per request. Otherwise some results can be mixed or
-    missing.
+    Builds the readers and sources as configured in the application configuration.
 
     Returns:
-        pyramid_oereb.lib.processor.Processor: A processor.
+        pyramid_oereb.lib.processor.Processor: A processor which is not bound to a request.
     """
 
     real_estate_config = Config.get_real_estate_config()
@@ -334,3 +362,41 @@ def create_processor():
         plr_sources=plr_sources,
         extract_reader=extract_reader,
     )
+
+
+def init_processor():
+    """
+    Builds the process wide processor with all its readers and sources. This is done only once per
+    process (or again if the application configuration was re-initialized). It is called on application
+    startup by the `includeme` of pyramid_oereb but will be called implicitly on the first request
+    otherwise. This method is thread safe.
+
+    Returns:
+        pyramid_oereb.lib.processor.Processor: The process wide processor. It must not be used to serve
+        requests directly, use :func:`create_processor` instead.
+    """
+    global _processor, _processor_config
+    with _processor_lock:
+        if _processor is None or _processor_config is not Config.get_config():
+            log.debug("init_processor() building processor and sources")
+            _processor = _build_processor()
+            _processor_config = Config.get_config()
+        return _processor
+
+
+def create_processor():
+    """
+    Creates and returns a processor based on the application configuration.
+    You should use one (and only one) processor per request. Otherwise some results can be mixed or
+    missing.
+
+    The readers and sources are built only once per process (see :func:`init_processor`), the returned
+    processor only holds request bound copies of them.
+
+    Returns:
+        pyramid_oereb.lib.processor.Processor: A processor.
+    """
+    processor = _processor
+    if processor is None or _processor_config is not Config.get_config():
+        processor = init_processor()
+    return processor.copy_for_request()
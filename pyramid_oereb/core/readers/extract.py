@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import copy
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from operator import attrgetter
 from pyramid.path import DottedNameResolver
 
@@ -10,9 +13,33 @@ from pyramid_oereb.core.config import Config
 from pyramid_oereb.core.records.extract import ExtractRecord
 from pyramid_oereb.core.records.image import ImageRecord
 from pyramid_oereb.core.records.plr import PlrRecord, EmptyPlrRecord
+from pyramid_oereb.core.tracing import span
 
 log = logging.getLogger(__name__)
 
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the process wide pool of threads reading the PLR sources. Its size is the `max_workers` of the
+    `parallel_read` configuration.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The pool of threads.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                parallel_read = (Config.get('extract') or {}).get('parallel_read') or {}
+                _executor = ThreadPoolExecutor(
+                    max_workers=parallel_read.get('max_workers', 8),
+                    thread_name_prefix='pyramid_oereb_plr'
+                )
+    return _executor
+
 
 class ExtractReader(object):
     """
@@ -24,6 +51,28 @@ class ExtractReader(object):
         extract (pyramid_oereb.lib.records.extract.ExtractRecord or None): The extract as a record
             representation. On initialisation this is None. It will be set by calling the read method of the
             instance.
+
+    The PLR sources are read one after another by default. If `parallel_read` is enabled in the `extract`
+    section of the configuration, they are read concurrently by a bounded pool of threads shared by the
+    process (see :func:`get_executor`). Every thread uses its own database sessions. The result is the same
+    in both modes.
+
+    The pool bounds the PLR sources read at the same time by all requests of the process, the sources of
+    concurrent requests wait for a free thread. A theme which was not read within the timeout is listed
+    as theme without data and the error is logged, the rest of the extract is delivered. Reading it
+    continues in the background until it is finished, its thread and database connection are not
+    available to other requests until then.
+
+    .. code-block:: yaml
+
+        extract:
+          parallel_read:
+            enabled: true
+            # Maximum number of PLR sources read at the same time by all requests (default: 8)
+            max_workers: 8
+            # Seconds (counted from the start of reading) each PLR source may take before its theme is
+            # listed as theme without data (default: no timeout)
+            timeout: 30
     """
 
     def __init__(self, plr_sources, plr_cadastre_authority):
@@ -38,6 +87,26 @@ class ExtractReader(object):
         self._plr_sources_ = plr_sources
         self._plr_cadastre_authority_ = plr_cadastre_authority
         self.law_status = Config.get_law_status_codes()
+        parallel_read = (Config.get('extract') or {}).get('parallel_read') or {}
+        self._parallel_read_ = parallel_read.get('enabled', False)
+        self._timeout_ = parallel_read.get('timeout')
+        self._executor_ = get_executor() if self._parallel_read_ else None
+
+    def copy_for_request(self, plr_sources):
+        """
+        Returns a copy of this reader which is bound to exactly one request.
+
+        Args:
+            plr_sources (list of pyramid_oereb.lib.sources.plr.PlrBaseSource): The request bound
+                copies of the PLR sources.
+
+        Returns:
+            ExtractReader: The request bound copy of this reader.
+        """
+        reader = copy.copy(self)
+        reader._plr_sources_ = plr_sources
+        reader.extract = None
+        return reader
 
     @property
     def plr_cadastre_authority(self):
@@ -48,6 +117,71 @@ class ExtractReader(object):
         """
         return self._plr_cadastre_authority_
 
+    @staticmethod
+    def _read_plr_source(plr_source, params, real_estate, bbox):
+        """
+        Reads one PLR source and logs the time spent on it.
+
+        Args:
+            plr_source (pyramid_oereb.lib.sources.plr.PlrBaseSource): The PLR source to read.
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate for which the report should be generated
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+
+        Returns:
+            pyramid_oereb.lib.sources.plr.PlrBaseSource: The read PLR source.
+        """
+        with span(log, 'reading theme', code=plr_source.info.get('code')):
+            plr_source.read(params, real_estate, bbox)
+        return plr_source
+
+    def read_plr_sources(self, params, real_estate, bbox):
+        """
+        Reads all PLR sources which are not skipped by the topics parameter. Depending on the
+        configuration this happens one after another or concurrently.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate for which the report should be generated
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+
+        Returns:
+            list of list: The records of the read PLR sources in the configured order. A PLR source which
+            was not read within the configured timeout has an EmptyPlrRecord without data.
+        """
+        plr_sources = [
+            plr_source for plr_source in self._plr_sources_
+            if not params.skip_topic(plr_source.info.get('code'))
+        ]
+        if not self._parallel_read_ or len(plr_sources) < 2:
+            return [
+                self._read_plr_source(plr_source, params, real_estate, bbox).records
+                for plr_source in plr_sources
+            ]
+
+        futures = [
+            self._executor_.submit(self._read_plr_source, plr_source, params, real_estate, bbox)
+            for plr_source in plr_sources
+        ]
+        deadline = None if self._timeout_ is None else timer() + self._timeout_
+        records = []
+        try:
+            for plr_source, future in zip(plr_sources, futures):
+                timeout = None if deadline is None else max(deadline - timer(), 0)
+                try:
+                    records.append(future.result(timeout=timeout).records)
+                except TimeoutError:
+                    code = plr_source.info.get('code')
+                    log.error(f"Reading theme {code} exceeded the timeout of {self._timeout_} seconds, it is "
+                              f"listed as theme without data")
+                    records.append([EmptyPlrRecord(Config.get_theme_by_code_sub_code(code), has_data=False)])
+        finally:
+            for future in futures:
+                future.cancel()
+        return records
+
     def read(self, params, real_estate, municipality):
         """
         This method finally creates the extract.
@@ -80,11 +214,9 @@ class ExtractReader(object):
 
         if municipality.published:
 
-            for plr_source in self._plr_sources_:
-                if not params.skip_topic(plr_source.info.get('code')):
-                    plr_source.read(params, real_estate, bbox)
-
-                    real_estate.public_law_restrictions.extend(plr_source.records)
+            with span(log, 'reading plr sources'):
+                for records in self.read_plr_sources(params, real_estate, bbox):
+                    real_estate.public_law_restrictions.extend(records)
 
             for plr in real_estate.public_law_restrictions:
 
@@ -109,13 +241,10 @@ class ExtractReader(object):
         themes_without_data.sort(key=attrgetter('extract_index'))
 
         # sort plr according to theme, sub-theme and law-status
-        start_time = timer()
-        log.debug("sort plrs by theme and law status start")
-        real_estate.public_law_restrictions.sort(key=lambda element: (
-            self._sort_plr_theme(element), self._sort_plr_law_status(element)
-        ))
-        end_time = timer()
-        log.debug(f"DONE with sort plrs by theme and law status, time spent: {end_time-start_time} seconds")
+        with span(log, 'sort plrs by theme and law status'):
+            real_estate.public_law_restrictions.sort(key=lambda element: (
+                self._sort_plr_theme(element), self._sort_plr_law_status(element)
+            ))
 
         # Load base data form configuration
         resolver = DottedNameResolver()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copy
 
 from pyramid.path import DottedNameResolver
 
@@ -28,6 +29,25 @@ class RealEstateReader(object):
         source_class = DottedNameResolver().resolve(dotted_source_class_path)
         self._source_ = source_class(**params)
 
+    def copy_for_request(self):
+        """
+        Returns a copy of this reader which is bound to exactly one request. The underlying source is
+        not created again but copied by its ``copy_for_request`` method.
+
+        Returns:
+            RealEstateReader: The request bound copy of this reader.
+        """
+        reader = copy.copy(self)
+        reader._source_ = self._source_.copy_for_request()
+        return reader
+
+    def load_index(self):
+        """
+        Loads the in-memory index of the source, if it keeps one. This is called on the startup of the web
+        application, so the first requests do not wait for it.
+        """
+        self._source_.load_index()
+
     def read(self, params, nb_ident=None, number=None, egrid=None, geometry=None):
         """
         The central read accessor method to get all desired records from configured source.
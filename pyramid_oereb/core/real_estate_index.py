@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+An optional in-memory spatial index of the real estates. Map clients call GetEGRID by coordinate on every
+click and hover, with the index these requests are answered by the process without querying the database.
+
+The index keeps the attributes and the limit (as WKB) of every real estate and a packed R-tree
+(:class:`shapely.strtree.STRtree`) of their bounding boxes. A lookup selects the candidates by their bounding
+box and checks the intersection with the exact limit afterwards.
+
+The index is filled by the real estate source, which compares the versions of its entries with the ones in
+the database to load only the new and changed real estates on a refresh (see
+:class:`pyramid_oereb.contrib.data_sources.standard.sources.real_estate.DatabaseSource`). The source runs
+the periodic refresh in a background thread. The tree is built again on each update and replaces the former
+one at once, so lookups running in parallel are never blocked.
+"""
+import logging
+import threading
+import time
+import warnings
+
+from shapely import wkb
+from shapely.errors import ShapelyDeprecationWarning
+from shapely.geometry import box
+from shapely.strtree import STRtree
+
+log = logging.getLogger(__name__)
+
+
+class RealEstateIndex(object):
+    """
+    Keeps the real estates in memory and finds the ones intersecting a geometry.
+    """
+
+    def __init__(self, refresh_interval=None):
+        """
+        Args:
+            refresh_interval (int or None): The seconds after which the index has to be refreshed, None to
+                never refresh it after the initial load.
+        """
+        self._refresh_interval_ = refresh_interval
+        # The entries and the tree built of them
+        self._state_ = ({}, None)
+        self.updated = None
+        self.refresh_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._state_[0])
+
+    def get_versions(self):
+        """
+        Returns the versions of the indexed real estates.
+
+        Returns:
+            dict: The version by the key of every indexed real estate.
+        """
+        return {key: entry[0] for key, entry in self._state_[0].items()}
+
+    def is_outdated(self):
+        """
+        Returns:
+            bool: True if the index was never loaded or its refresh interval has passed.
+        """
+        if self.updated is None:
+            return True
+        if self._refresh_interval_ is None:
+            return False
+        return time.time() - self.updated > self._refresh_interval_
+
+    def update(self, entries, removed=None):
+        """
+        Adds or replaces the passed real estates, removes the passed keys and builds the tree again.
+
+        Args:
+            entries (dict): The version, the attributes and the limit as WKB (tuple) by the key of the new
+                and changed real estates.
+            removed (list or None): The keys of the removed real estates.
+        """
+        indexed = dict(self._state_[0])
+        for key in removed or []:
+            indexed.pop(key, None)
+        for key, (version, attributes, limit) in entries.items():
+            indexed[key] = (version, attributes, limit, box(*wkb.loads(limit).bounds))
+        keys = list(indexed.keys())
+        if len(keys) > 0:
+            with warnings.catch_warnings():
+                # The items of the tree are only deprecated for Shapely 2
+                warnings.simplefilter('ignore', ShapelyDeprecationWarning)
+                tree = STRtree([indexed[key][3] for key in keys], keys)
+        else:
+            tree = None
+        # Running lookups keep using the former entries and tree
+        self._state_ = (indexed, tree)
+        self.updated = time.time()
+        log.info('Updated real estate index: {0} changed, {1} removed, {2} indexed'.format(
+            len(entries), len(removed or []), len(indexed)
+        ))
+
+    def query(self, geometry):
+        """
+        Returns the real estates intersecting the passed geometry.
+
+        Args:
+            geometry (shapely.geometry.base.BaseGeometry): The geometry to check.
+
+        Returns:
+            list of tuple: The attributes and the limit (shapely.geometry.base.BaseGeometry) of the
+            intersecting real estates, ordered by their key.
+        """
+        entries, tree = self._state_
+        if tree is None:
+            return []
+        results = []
+        for key in sorted(tree.query_items(geometry)):
+            attributes, limit = entries[key][1:3]
+            limit = wkb.loads(limit)
+            if limit.intersects(geometry):
+                results.append((attributes, limit))
+        return results
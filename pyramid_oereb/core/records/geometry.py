@@ -3,6 +3,7 @@ import logging
 from datetime import datetime
 
 from shapely.ops import linemerge, cascaded_union
+from shapely.prepared import prep
 
 from shapely.geometry import Point, MultiPoint, LineString, Polygon, GeometryCollection, MultiLineString, \
     MultiPolygon
@@ -10,6 +11,39 @@ from shapely.geometry import Point, MultiPoint, LineString, Polygon, GeometryCol
 log = logging.getLogger(__name__)
 
 
+class PreparedLimit(object):
+    """
+    The limit of a real estate prepared for the tolerance check of many geometries. The limit is buffered
+    and prepared only once per tolerance, the prepared geometry answers the intersects and contains tests
+    without computing the intersection.
+    """
+
+    def __init__(self, limit):
+        """
+        Args:
+            limit (shapely.geometry.base.BaseGeometry): The limit of the real estate.
+        """
+        self._limit_ = limit
+        self._limits_ = dict()
+
+    def get(self, tolerance=None):
+        """
+        Returns the limit buffered by the tolerance.
+
+        Args:
+            tolerance (float or None): The tolerance, None for the limit itself.
+
+        Returns:
+            tuple: The limit (shapely.geometry.base.BaseGeometry) and its prepared geometry
+            (shapely.prepared.PreparedGeometry).
+        """
+        limit = self._limits_.get(tolerance)
+        if limit is None:
+            geom = self._limit_ if tolerance is None else self._limit_.buffer(tolerance)
+            limit = self._limits_[tolerance] = (geom, prep(geom))
+        return limit
+
+
 class GeometryRecord(object):
     """
     Geometry record
@@ -139,7 +173,7 @@ class GeometryRecord(object):
         self.calculated = False
 
     def calculate(self, real_estate, min_length, min_area, length_unit, area_unit, geometry_types,
-                  tolerance=None):
+                  tolerance=None, prepared_limit=None):
         """
         Entry method for calculation. It checks if the geometry type of this instance is a geometry
         collection which has to be unpacked first in case of collection.
@@ -152,19 +186,27 @@ class GeometryRecord(object):
             area_unit (unicode): The thresholds unit for area calculation.
             geometry_types (dict): The allowed geometry types for the to match the simple feature
                 types point, line, polygon
+            tolerance (float or None): The tolerance to buffer the limit of the real estate.
+            prepared_limit (PreparedLimit or None): The prepared limit of the real estate, to be shared by
+                all geometries checked against the same real estate.
 
         Returns:
             bool: True if intersection fits the limits.
         """
-        if tolerance is None:
-            re_limit = real_estate.limit
-        else:
-            re_limit = real_estate.limit.buffer(tolerance)
+        if prepared_limit is None:
+            prepared_limit = PreparedLimit(real_estate.limit)
+        re_limit, prepared_re_limit = prepared_limit.get(tolerance)
         line_types = geometry_types.get('line').get('types')
         polygon_types = geometry_types.get('polygon').get('types')
         point_types = geometry_types.get('point').get('types')
         if self.published:
-            intersection = self.geom.intersection(re_limit)
+            if not prepared_re_limit.intersects(self.geom):
+                intersection = GeometryCollection()
+            elif prepared_re_limit.contains(self.geom) and self.geom.is_valid:
+                # The intersection of a geometry inside the limit is the geometry itself
+                intersection = self.geom
+            else:
+                intersection = self.geom.intersection(re_limit)
             if not intersection.is_empty:
                 result = self._extract_collection(intersection)
                 if self.geom.type not in point_types + line_types + polygon_types:
@@ -239,3 +281,83 @@ class GeometryRecord(object):
         if not self.calculated:
             log.warning(u'There was an access on property "nr_of_points" before calculation was done.')
         return self._nr_of_points
+
+
+class MeasuredGeometryRecord(GeometryRecord):
+    """
+    Geometry record whose intersection with the real estate was already measured by the database (see
+    :mod:`pyramid_oereb.contrib.data_sources.measurement`). The calculation applies the thresholds to the
+    measured values instead of intersecting the geometry again.
+
+    If the geometry was not transferred from the database, `geom` is an empty geometry of the measured
+    dimension. It must not be rendered in this case.
+    """
+    def __init__(
+            self, law_status, published_from, published_until, geom, geo_metadata=None,
+            public_law_restriction=None, dimension=None, area=None, length=None, nr_of_points=None):
+        """
+        Args:
+            law_status (pyramid_oereb.lib.records.law_status.LawStatusRecord): The law status of this record.
+            published_from (datetime.date): Date from/since when the PLR record is published.
+            published_until (datetime.date): Date until the PLR record is published.
+            geom (Point or LineString or Polygon): The geometry or an empty geometry of the same type.
+            geo_metadata (uri): The metadata.
+            public_law_restriction (pyramid_oereb.lib.records.plr.PlrRecord): The public law
+                restriction
+            dimension (int): The topological dimension of the geometry.
+            area (float or None): The area of the intersection with the real estate.
+            length (float or None): The length of the intersection with the real estate.
+            nr_of_points (int or None): The number of parts of the intersection with the real estate, 0
+                if they do not intersect.
+        """
+        super(MeasuredGeometryRecord, self).__init__(
+            law_status, published_from, published_until, geom, geo_metadata, public_law_restriction
+        )
+        self._dimension = dimension
+        self._measured_area = area
+        self._measured_length = length
+        self._measured_nr_of_points = nr_of_points
+
+    @property
+    def dim(self):
+        """
+        Returns:
+            int: The topological dimension measured by the database.
+        """
+        return self._dimension
+
+    def calculate(self, real_estate, min_length, min_area, length_unit, area_unit, geometry_types,
+                  tolerance=None, prepared_limit=None):
+        """
+        Applies the thresholds to the measured intersection, like :meth:`GeometryRecord.calculate`.
+
+        Args:
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+            min_length (float): The threshold to consider or not a line element.
+            min_area (float): The threshold to consider or not a surface element.
+            length_unit (unicode): The thresholds unit for area calculation.
+            area_unit (unicode): The thresholds unit for area calculation.
+            geometry_types (dict): Not used, the geometry types were checked by the database.
+            tolerance (float or None): Not used, the tolerance was applied by the database.
+            prepared_limit (PreparedLimit or None): Not used.
+
+        Returns:
+            bool: True if intersection fits the limits.
+        """
+        if self.published and self._measured_nr_of_points:
+            if self._dimension == 0:
+                self._nr_of_points = self._measured_nr_of_points
+                self._test_passed = True
+            elif self._dimension == 1:
+                self._units = length_unit
+                if self._measured_length >= min_length:
+                    self._length_share = self._measured_length
+                    self._test_passed = True
+            elif self._dimension == 2:
+                self._units = area_unit
+                compensated_area = self._measured_area / real_estate.areas_ratio
+                if compensated_area >= min_area:
+                    self._area_share = compensated_area
+                    self._test_passed = True
+        self.calculated = True
+        return self._test_passed
@@ -4,6 +4,8 @@ import logging
 import warnings
 from datetime import datetime
 
+from pyramid_oereb.core.records.geometry import PreparedLimit
+
 
 log = logging.getLogger(__name__)
 
@@ -217,7 +219,7 @@ class PlrRecord(EmptyPlrRecord):
             float or None: the number of points of all related geometry records of this PLR."""
         return self._nr_of_points
 
-    def calculate(self, real_estate, geometry_types):
+    def calculate(self, real_estate, geometry_types, prepared_limit=None):
         """
         Entry method for calculation. It checks if the geometry type of this instance is a geometry
         collection which has to be unpacked first in case of collection.
@@ -226,10 +228,14 @@ class PlrRecord(EmptyPlrRecord):
             real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
             geometry_types (dict): The allowed geometry types for the to match the simple
             feature types point, line, polygon
+            prepared_limit (pyramid_oereb.core.records.geometry.PreparedLimit or None): The prepared limit
+                of the real estate, to be shared by all PLRs checked against the same real estate.
 
         Returns:
             bool: True if intersection fits the limits.
         """
+        if prepared_limit is None:
+            prepared_limit = PreparedLimit(real_estate.limit)
         tested_geometries = []
         inside = False
         for geometry in self.geometries:
@@ -238,7 +244,8 @@ class PlrRecord(EmptyPlrRecord):
                     self.min_length, self.min_area,
                     self.length_unit, self.area_unit,
                     geometry_types,
-                    self.tolerance
+                    self.tolerance,
+                    prepared_limit
             ):
                 tested_geometries.append(geometry)
                 inside = True
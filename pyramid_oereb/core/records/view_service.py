@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 import warnings
 import logging
-import requests
 
 from pyramid_oereb.core.records.image import ImageRecord
 from pyramid_oereb.core.url import add_url_params, parse_url
 from pyramid_oereb.core.url import uri_validator
+from pyramid_oereb.core.wms import get_fetcher
 from shapely.geometry.point import Point
 from pyramid_oereb.core import get_multilingual_element
 
@@ -219,51 +219,81 @@ class ViewServiceRecord(object):
 
         return self.reference_wms
 
-    def download_wms_content(self, language):
+    def get_image_language(self, language):
         """
-        Downloads the image found behind the URL stored in the instance attribute "reference_wms"
-        for the requested language
+        Returns the language of the image to download: the requested language if there is a WMS reference
+        for it, the default language otherwise.
 
         Args:
-            language (string): the language for which the image should be downloaded
+            language (string): the requested language.
 
-        Raises:
-            LookupError: Raised if the response is not code 200 or content-type
-                doesn't contains type "image".
-            AttributeError: Raised if the URL itself isn't valid at all.
+        Returns:
+            string: The language of the image.
         """
-        main_msg = "Image for WMS couldn't be retrieved."
-
         if language not in self.reference_wms:
             msg = f"No WMS reference found for the requested language ({language}), using default language"
             log.info(msg)
             language = self.default_language
+        return language
 
-        wms = self.reference_wms.get(language)
+    def get_image_url(self, language):
+        """
+        Returns the URL stored in the instance attribute "reference_wms" for the passed language.
 
-        if uri_validator(wms):
-            log.debug(f"Downloading image, url: {wms}")
-            try:
-                response = requests.get(wms, proxies=self.proxies)
-            except Exception as ex:
-                dedicated_msg = f"An image could not be downloaded. URL was: {wms}, error was {ex}"
-                log.error(dedicated_msg)
-                raise LookupError(dedicated_msg)
-
-            content_type = response.headers.get('content-type', '')
-            if response.status_code == 200 and content_type.find('image') > -1:
-                self.image[language] = ImageRecord(response.content)
-            else:
-                dedicated_msg = f"The image could not be downloaded. URL was: {wms}, " \
-                    f"Response was {response.content.decode('utf-8')}"
-                log.error(main_msg)
-                log.error(dedicated_msg)
-                raise LookupError(dedicated_msg)
-        else:
+        Args:
+            language (string): the language of the image.
+
+        Returns:
+            str: The URL of the image.
+
+        Raises:
+            AttributeError: Raised if the URL itself isn't valid at all.
+        """
+        wms = self.reference_wms.get(language)
+        if not uri_validator(wms):
             dedicated_msg = f"URL seems to be not valid. URL was: {wms}"
-            log.error(main_msg)
+            log.error("Image for WMS couldn't be retrieved.")
             log.error(dedicated_msg)
             raise AttributeError(dedicated_msg)
+        return wms
+
+    def set_image(self, language, wms, response):
+        """
+        Sets the image of the passed language from the response of the WMS.
+
+        Args:
+            language (string): the language of the image.
+            wms (str): The URL the image was downloaded from.
+            response (requests.Response): The response of the WMS.
+
+        Raises:
+            LookupError: Raised if the response is not code 200 or content-type
+                doesn't contains type "image".
+        """
+        content_type = response.headers.get('content-type', '')
+        if response.status_code == 200 and content_type.find('image') > -1:
+            self.image[language] = ImageRecord(response.content)
+        else:
+            dedicated_msg = f"The image could not be downloaded. URL was: {wms}, " \
+                f"Response was {response.content.decode('utf-8')}"
+            log.error("Image for WMS couldn't be retrieved.")
+            log.error(dedicated_msg)
+            raise LookupError(dedicated_msg)
+
+    def download_wms_content(self, language):
+        """
+        Downloads the image found behind the URL stored in the instance attribute "reference_wms"
+        for the requested language
+
+        Args:
+            language (string): the language for which the image should be downloaded
+
+        Raises:
+            LookupError: Raised if the response is not code 200 or content-type
+                doesn't contains type "image".
+            AttributeError: Raised if the URL itself isn't valid at all.
+        """
+        get_fetcher().download([self], language)
 
     def calculate_ns(self):
         self.min, self.max = self.get_bbox_from_url(self.reference_wms[list(self.reference_wms.keys())[0]])
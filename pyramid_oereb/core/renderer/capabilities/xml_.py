@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
-from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.template_lookup import get_template, get_template_dirs
 from mako import exceptions
 
 
@@ -17,11 +16,7 @@ class Renderer(Base):
         Args:
             info (pyramid.interfaces.IRendererInfo): Info object.
         """
-        a = AssetResolver('pyramid_oereb')
-        resolver = a.resolve('core/renderer/capabilities/templates/xml')
-        self.template_dirs = [resolver.abspath()]
-        resolver = a.resolve('core/renderer/extract/templates/xml')
-        self.template_dirs.append(resolver.abspath())
+        self.template_dirs = get_template_dirs('capabilities')
         super(Renderer, self).__init__(info)
 
     def __call__(self, value, system):
@@ -40,12 +35,7 @@ class Renderer(Base):
         if isinstance(response, Response) and response.content_type == response.default_content_type:
             response.content_type = 'application/xml'
 
-        templates = TemplateLookup(
-            directories=self.template_dirs,
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('capabilities.xml')
+        template = get_template(self.template_dirs, 'capabilities.xml')
         try:
             content = template.render(**{
                 'data': value,
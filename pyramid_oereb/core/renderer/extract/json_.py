@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
 
-from json import dumps
-
 from pyramid.request import Request
 from pyramid.response import Response
 from pyramid.testing import DummyRequest
@@ -14,6 +12,7 @@ from pyramid_oereb.core.records.theme import ThemeRecord
 from pyramid_oereb.core.sources.plr import PlrRecord
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.streaming import iter_chunks, iterencode_json
 from pyramid_oereb.core.views.webservice import Parameter
 
 log = logging.getLogger(__name__)
@@ -39,7 +38,7 @@ class Renderer(Base):
             system (dict): The available system properties.
 
         Returns:
-            str: The JSON encoded extract.
+            generator of bytes: The JSON encoded extract in chunks, used as `app_iter` of the response.
         """
         log.debug("__call__() start")
         self._request = self.get_request(system)
@@ -58,7 +57,8 @@ class Renderer(Base):
         }
         log.debug("__call__() done.")
         log.debug(result)
-        return dumps(result)
+        # The extract is encoded while it is sent, so the complete encoded text is never held in memory
+        return iter_chunks(iterencode_json(result))
 
     def _render(self, extract, param):
         """
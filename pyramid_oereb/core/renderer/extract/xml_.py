@@ -2,13 +2,13 @@
 import logging
 
 from pyramid.httpexceptions import HTTPInternalServerError
-from mako.lookup import TemplateLookup
-from pyramid.path import AssetResolver
-
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.streaming import SpooledOutput, iter_file
+from pyramid_oereb.core.renderer.template_lookup import get_template, get_template_dirs
 from mako import exceptions
+from mako.runtime import Context
 
 from pyramid_oereb.core.views.webservice import Parameter
 
@@ -24,9 +24,7 @@ class Renderer(Base):
         Args:
             info (pyramid.interfaces.IRendererInfo): Info object.
         """
-        a = AssetResolver('pyramid_oereb')
-        resolver = a.resolve('core/renderer/extract/templates/xml')
-        self.template_dir = resolver.abspath()
+        self.template_dirs = get_template_dirs('extract')
         self._gml_id = 0
         super(Renderer, self).__init__(info)
 
@@ -40,7 +38,7 @@ class Renderer(Base):
             system (dict): The available system properties.
 
         Returns:
-            str: The XML encoded extract.
+            generator of bytes: The XML encoded extract in chunks, used as `app_iter` of the response.
         """
         self._request = self.get_request(system)
         response = self.get_response(system)
@@ -58,8 +56,7 @@ class Renderer(Base):
 
         extract = value[0]
         try:
-            content = self._render(extract, self._params_)
-            return content
+            return iter_file(self._stream(extract, self._params_))
         except ValueError as e:
             log.error('The extract can not be rendered. ValueError is {0}'.format(e))
             raise HTTPInternalServerError()
@@ -67,14 +64,8 @@ class Renderer(Base):
             response.content_type = 'text/html'
             return exceptions.html_error_template().render()
 
-    def _render(self, extract, params):
-        templates = TemplateLookup(
-            directories=[self.template_dir],
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('extract.xml')
-        content = template.render(**{
+    def _get_template_data(self, extract, params):
+        return {
             'extract': extract,
             'params': params,
             'sort_by_localized_text': self.sort_by_localized_text,
@@ -84,5 +75,40 @@ class Renderer(Base):
             'request': self._request,
             'get_symbol_ref': self.get_symbol_ref,
             'date_format': '%Y-%m-%dT%H:%M:%S'
-        })
-        return content
+        }
+
+    def _render(self, extract, params):
+        """
+        Renders the extract.
+
+        Args:
+            extract (pyramid_oereb.lib.records.extract.ExtractRecord): The extract record.
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+
+        Returns:
+            bytes: The XML encoded extract.
+        """
+        template = get_template(self.template_dirs, 'extract.xml')
+        return template.render(**self._get_template_data(extract, params))
+
+    def _stream(self, extract, params):
+        """
+        Renders the extract incrementally into a temporary file, which is only kept in memory up to a
+        limited size. The content is identical to the one returned by :meth:`_render`.
+
+        Args:
+            extract (pyramid_oereb.lib.records.extract.ExtractRecord): The extract record.
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+
+        Returns:
+            tempfile.SpooledTemporaryFile: The XML encoded extract positioned at its start, to be closed by
+            the caller.
+        """
+        template = get_template(self.template_dirs, 'extract.xml')
+        output = SpooledOutput(encoding=template.output_encoding)
+        try:
+            template.render_context(Context(output, **self._get_template_data(extract, params)))
+        except Exception:
+            output.get_file().close()
+            raise
+        return output.get_file()
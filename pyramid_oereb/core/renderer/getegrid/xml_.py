@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
-from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.template_lookup import get_template, get_template_dirs
 from pyramid_oereb.core.views.webservice import Parameter
 from mako import exceptions
 
@@ -18,10 +17,7 @@ class Renderer(Base):
         Args:
             info (pyramid.interfaces.IRendererInfo): Info object.
         """
-        a = AssetResolver('pyramid_oereb')
-        resolver = a.resolve('core/renderer/getegrid/templates/xml')
-        geom_resolver = a.resolve('core/renderer/extract/templates/xml')
-        self.template_dirs = [resolver.abspath(), geom_resolver.abspath()]
+        self.template_dirs = get_template_dirs('getegrid')
         self._gml_id = 0
         super(Renderer, self).__init__(info)
 
@@ -49,12 +45,7 @@ class Renderer(Base):
                 self._params_.__class__
             ))
 
-        templates = TemplateLookup(
-            directories=self.template_dirs,
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('getegrid.xml')
+        template = get_template(self.template_dirs, 'getegrid.xml')
         try:
             content = template.render(**{
                 'data': value[0],
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental encoding of rendered documents, to be used as `app_iter` of a response or as body of an
+upload. The document is sent in chunks instead of holding the complete encoded text and its bytes in
+memory.
+"""
+import logging
+import os
+import tempfile
+import uuid
+
+from json import dumps
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+"""int: The minimal size of the chunks in bytes."""
+
+SPOOL_SIZE = 1024 * 1024
+"""int: The size in bytes up to which a spooled output is kept in memory."""
+
+
+def iterencode_json(value, depth=5):
+    """
+    Encodes the passed value to JSON incrementally. The output is identical to :func:`json.dumps` with its
+    default arguments.
+
+    The dicts and lists of the first levels are written item by item, the values below `depth` are
+    encoded at once by :func:`json.dumps`, which uses the C accelerated encoder of the standard library.
+    The incremental encoder of the standard library (:meth:`json.JSONEncoder.iterencode`) does not use it
+    and is several times slower.
+
+    Args:
+        value (object): The value to encode.
+        depth (int): The number of levels written item by item.
+
+    Returns:
+        generator of str: The parts of the encoded value.
+    """
+    if depth > 0 and isinstance(value, dict) and len(value) > 0 and \
+            all(isinstance(key, str) for key in value):
+        separator = '{'
+        for key, item in value.items():
+            yield separator + dumps(key) + ': '
+            yield from iterencode_json(item, depth - 1)
+            separator = ', '
+        yield '}'
+    elif depth > 0 and isinstance(value, (list, tuple)) and len(value) > 0:
+        separator = '['
+        for item in value:
+            yield separator
+            yield from iterencode_json(item, depth - 1)
+            separator = ', '
+        yield ']'
+    else:
+        yield dumps(value)
+
+
+def iter_chunks(parts, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """
+    Joins the passed text parts to encoded chunks of at least `chunk_size` bytes (except the last one).
+
+    Args:
+        parts (iterable of str): The text parts.
+        chunk_size (int): The minimal size of the chunks in bytes.
+        encoding (str): The encoding of the chunks.
+
+    Returns:
+        generator of bytes: The chunks.
+    """
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode(encoding)
+            buffer = []
+            size = 0
+    if len(buffer) > 0:
+        yield ''.join(buffer).encode(encoding)
+
+
+class SpooledOutput(object):
+    """
+    Output for incremental writers like Mako templates. The written text is encoded and collected in a
+    temporary file, which is kept in memory up to `max_size` bytes.
+    """
+
+    def __init__(self, encoding='utf-8', max_size=SPOOL_SIZE, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            encoding (str): The encoding of the output.
+            max_size (int): The size in bytes up to which the output is kept in memory.
+            chunk_size (int): The size of the text collected before it is encoded.
+        """
+        self._encoding_ = encoding
+        self._chunk_size_ = chunk_size
+        self._file_ = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self._buffer_ = []
+        self._size_ = 0
+
+    def write(self, text):
+        """
+        Writes the passed text to the output.
+
+        Args:
+            text (str): The text.
+        """
+        self._buffer_.append(text)
+        self._size_ += len(text)
+        if self._size_ >= self._chunk_size_:
+            self._flush_()
+
+    def _flush_(self):
+        self._file_.write(''.join(self._buffer_).encode(self._encoding_))
+        self._buffer_ = []
+        self._size_ = 0
+
+    def get_file(self):
+        """
+        Finishes the output.
+
+        Returns:
+            tempfile.SpooledTemporaryFile: The encoded output, positioned at its start. It has to be
+            closed by the caller, e.g. by :func:`iter_file`.
+        """
+        self._flush_()
+        self._file_.seek(0)
+        return self._file_
+
+
+def iter_file(output, chunk_size=CHUNK_SIZE):
+    """
+    Reads the passed file in chunks and closes it, also if the iteration is stopped early.
+
+    Args:
+        output (file): The file opened in binary mode.
+        chunk_size (int): The size of the chunks in bytes.
+
+    Returns:
+        generator of bytes: The chunks.
+    """
+    try:
+        chunk = output.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = output.read(chunk_size)
+    finally:
+        output.close()
+
+
+def get_file_size(output):
+    """
+    Returns the size of the passed file, without changing its position.
+
+    Args:
+        output (file): The file opened in binary mode.
+
+    Returns:
+        int: The size in bytes from the current position to the end.
+    """
+    position = output.tell()
+    size = output.seek(0, os.SEEK_END) - position
+    output.seek(position)
+    return size
+
+
+class MultipartBody(object):
+    """
+    A multipart/form-data request body with one file, which is read in chunks while it is sent. It can be
+    passed as `data` to :func:`requests.post` with the header returned by :meth:`get_content_type`, the
+    length is known in advance.
+    """
+
+    def __init__(self, fields, name, file_name, output, content_type):
+        """
+        Args:
+            fields (dict): The form fields sent before the file.
+            name (str): The name of the file field.
+            file_name (str): The file name.
+            output (file): The file opened in binary mode.
+            content_type (str): The content type of the file.
+        """
+        self.boundary = uuid.uuid4().hex
+        head = []
+        for key, value in fields.items():
+            head.append(
+                '--{0}\r\nContent-Disposition: form-data; name="{1}"\r\n\r\n{2}\r\n'.format(
+                    self.boundary, key, value
+                )
+            )
+        head.append(
+            '--{0}\r\nContent-Disposition: form-data; name="{1}"; filename="{2}"\r\n'
+            'Content-Type: {3}\r\n\r\n'.format(self.boundary, name, file_name, content_type)
+        )
+        self._parts_ = [
+            ''.join(head).encode('utf-8'),
+            output,
+            '\r\n--{0}--\r\n'.format(self.boundary).encode('utf-8')
+        ]
+        self.len = len(self._parts_[0]) + get_file_size(output) + len(self._parts_[2])
+
+    def get_content_type(self):
+        """
+        Returns:
+            str: The content type of the body including the boundary.
+        """
+        return 'multipart/form-data; boundary={0}'.format(self.boundary)
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size=-1):
+        """
+        Reads the next part of the body.
+
+        Args:
+            size (int): The maximal number of bytes to read, all if negative.
+
+        Returns:
+            bytes: The read bytes, empty at the end of the body.
+        """
+        result = []
+        while len(self._parts_) > 0 and size != 0:
+            part = self._parts_[0]
+            if isinstance(part, bytes):
+                chunk = part if size < 0 else part[:size]
+                rest = part[len(chunk):]
+                if len(rest) > 0:
+                    self._parts_[0] = rest
+                else:
+                    self._parts_.pop(0)
+            else:
+                chunk = part.read(size)
+                if size < 0 or len(chunk) < size:
+                    self._parts_.pop(0)
+            result.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(result)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Mako template lookups of the XML renderers. The renderers are created for every request, so the
+lookups and with them the compiled templates are kept per process. The templates are compiled when they
+are used the first time or by :func:`preload_templates` at startup.
+
+The compiled template modules can additionally be written to a directory, so they survive restarts of the
+application:
+
+.. code-block:: yaml
+
+    pyramid_oereb:
+      template_module_directory: /var/cache/pyramid_oereb/templates
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from mako.lookup import TemplateLookup
+from pyramid.path import AssetResolver
+
+from pyramid_oereb import Config
+from pyramid_oereb.core.tracing import span
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_DIRS = {
+    'extract': ['core/renderer/extract/templates/xml'],
+    'getegrid': ['core/renderer/getegrid/templates/xml', 'core/renderer/extract/templates/xml'],
+    'capabilities': ['core/renderer/capabilities/templates/xml', 'core/renderer/extract/templates/xml'],
+    'versions': ['core/renderer/versions/templates/xml']
+}
+"""dict: The template directories (relative to the package) of the XML renderers."""
+
+_lookups = dict()
+_lookups_lock = threading.Lock()
+
+
+def get_template_dirs(renderer):
+    """
+    Returns the absolute template directories of a renderer.
+
+    Args:
+        renderer (str): The name of the renderer, one of the keys of :attr:`TEMPLATE_DIRS`.
+
+    Returns:
+        list of str: The template directories.
+    """
+    resolver = AssetResolver('pyramid_oereb')
+    return [resolver.resolve(template_dir).abspath() for template_dir in TEMPLATE_DIRS[renderer]]
+
+
+def get_lookup(template_dirs):
+    """
+    Returns the shared template lookup for the passed template directories.
+
+    Args:
+        template_dirs (list of str): The template directories.
+
+    Returns:
+        mako.lookup.TemplateLookup: The template lookup.
+    """
+    key = tuple(template_dirs)
+    lookup = _lookups.get(key)
+    if lookup is None:
+        with _lookups_lock:
+            lookup = _lookups.get(key)
+            if lookup is None:
+                lookup = _lookups[key] = _create_lookup(template_dirs)
+    return lookup
+
+
+def _create_lookup(template_dirs):
+    module_directory = Config.get('template_module_directory') if Config.get_config() is not None else None
+    if module_directory is not None:
+        # The uris of the templates are only unique within one lookup
+        module_directory = os.path.join(
+            module_directory,
+            hashlib.md5('|'.join(template_dirs).encode('utf-8')).hexdigest()
+        )
+    return TemplateLookup(
+        directories=template_dirs,
+        output_encoding='utf-8',
+        input_encoding='utf-8',
+        module_directory=module_directory,
+        # The templates are part of the package and do not change while the application is running
+        filesystem_checks=False
+    )
+
+
+def get_template(template_dirs, name):
+    """
+    Returns the compiled template from the shared lookup for the passed template directories.
+
+    Args:
+        template_dirs (list of str): The template directories.
+        name (str): The name of the template, relative to the template directories.
+
+    Returns:
+        mako.template.Template: The template.
+    """
+    # The includes of the templates are looked up by absolute uris, use the same for the top level
+    return get_lookup(template_dirs).get_template('/' + name.lstrip('/'))
+
+
+def preload_templates():
+    """
+    Compiles all templates of the XML renderers, including the ones which are only included by other
+    templates, so no template is compiled while serving requests.
+    """
+    with span(log, 'preload templates'):
+        for renderer in TEMPLATE_DIRS:
+            template_dirs = get_template_dirs(renderer)
+            for template_dir in template_dirs:
+                for root, dirs, files in os.walk(template_dir):
+                    for file_name in sorted(files):
+                        name = os.path.relpath(os.path.join(root, file_name), template_dir)
+                        get_template(template_dirs, name.replace(os.sep, '/'))
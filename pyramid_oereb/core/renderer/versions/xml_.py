@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
-from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.template_lookup import get_template, get_template_dirs
 from mako import exceptions
 
 
@@ -17,9 +16,7 @@ class Renderer(Base):
         Args:
             info (pyramid.interfaces.IRendererInfo): Info object.
         """
-        a = AssetResolver('pyramid_oereb')
-        resolver = a.resolve('core/renderer/versions/templates/xml')
-        self.template_dir = resolver.abspath()
+        self.template_dirs = get_template_dirs('versions')
         super(Renderer, self).__init__(info)
 
     def __call__(self, value, system):
@@ -53,12 +50,7 @@ class Renderer(Base):
         Returns:
             str: The XML encoded versions data.
         """
-        templates = TemplateLookup(
-            directories=[self.template_dir],
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('versions.xml')
+        template = get_template(self.template_dirs, 'versions.xml')
         content = template.render(**{
             'data': value
         })
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from pyramid_oereb import route_prefix
-from pyramid_oereb.core.views.webservice import PlrWebservice, Symbol, Logo, Sld, QRcode
+from pyramid_oereb.core.views.webservice import PlrWebservice, Symbol, Logo, Sld, QRcode, Health
 from pyramid_oereb.contrib.stats.decorators import log_response
 
 
@@ -40,6 +40,12 @@ def includeme(config):  # pragma: no cover
                     request_method='GET',
                     decorator=log_response)
 
+    # Service for database health
+    config.add_route('{0}/health'.format(route_prefix), '/health')
+    config.add_view(Health, attr='get_health',
+                    route_name='{0}/health'.format(route_prefix),
+                    request_method='GET')
+
     # Get versions
     config.add_route('{0}/versions'.format(route_prefix), '/versions/{format}')
     config.add_view(
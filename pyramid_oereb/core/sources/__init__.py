@@ -2,8 +2,9 @@
 """
 This is package provides the minimum requirements on the classes which can be used as a source.
 """
-import time
+import copy
 import logging
+import threading
 from pyramid.config import ConfigurationError
 from pyramid.path import DottedNameResolver
 
@@ -20,6 +21,23 @@ class Base(object):
     """
     records = list()
 
+    def copy_for_request(self):
+        """
+        Returns a shallow copy of this source which can be used to serve exactly one request. The copy
+        shares all process wide state (configuration, models, database adapter) with this instance but
+        owns its own per request state like the records. This way a source needs to be built only once
+        per process and can safely be shared between the threads of a worker.
+
+        Sources holding additional per request state have to override this method and reset it on the
+        returned copy.
+
+        Returns:
+            Base: The request bound copy of this source.
+        """
+        source = copy.copy(self)
+        source.records = list()
+        return source
+
 
 class BaseDatabaseSource(Base):
     """
@@ -54,36 +72,45 @@ class BaseDatabaseSource(Base):
             self._model_ = DottedNameResolver().maybe_resolve(kwargs.get('model'))
         else:
             raise ConfigurationError('"model" for source has to be defined in used yaml configuration file')
-        # check if database is available and wait until it might be or raise error
-        timeout_target = time.time() + self.TIMEOUT
-        db_healthy = False
-        current_wait_position = 0
-        sleep_period = 1.0
-        while time.time() < timeout_target:
-            db_healthy = self.health_check()
-            if not db_healthy:
-                current_wait_position += int(sleep_period)
-                # 1.0 sets it to a second
-                log.info('Waiting for the database {} more seconds ({})'.format(
-                    self.TIMEOUT - current_wait_position,
-                    self._key_
-                ))
-                time.sleep(sleep_period)
-            else:
-                break
-        if not db_healthy:
+        # Shared by all request bound copies of this source
+        self._has_data_ = threading.Event()
+        # Wait for the database on the first use of the connection only, afterwards the cached
+        # health of the database adapter is used and the database is not touched anymore.
+        if not self.health_check():
             raise ConfigurationError('Database was not reached until timeout of {} seconds ({})'.format(
                 self.TIMEOUT,
-                self._key_
+                self._adapter_.mask_key(self._key_)
             ))
 
     def get_session(self):
         return self._adapter_.get_session(self._key_)
 
-    def health_check(self):
-        session = self._adapter_.get_session(self._key_)
-        try:
-            session.execute('SELECT 1')
-            return True
-        except Exception:
+    def is_empty(self, session):
+        """
+        Checks if the table of the model contains no rows at all. As soon as rows were found once, this is
+        remembered for the lifetime of the process and shared between all request bound copies of the
+        source, so the database is not asked again. An empty table is checked again on each call with a
+        cheap ``EXISTS`` query, so data imported later is taken into account.
+
+        Args:
+            session (sqlalchemy.orm.Session): The session to use for the check.
+
+        Returns:
+            bool: True if the table contains no rows, False otherwise.
+        """
+        if self._has_data_.is_set():
             return False
+        if session.query(session.query(self._model_).exists()).scalar():
+            self._has_data_.set()
+            return False
+        return True
+
+    def health_check(self):
+        """
+        Checks if the database of this source is available. Waits up to :attr:`TIMEOUT` seconds if it
+        was never reached before.
+
+        Returns:
+            bool: True if the database is available, False otherwise.
+        """
+        return self._adapter_.wait_until_healthy(self._key_, self.TIMEOUT)
@@ -70,6 +70,18 @@ class PlrBaseSource(Base):
         """
         return self._plr_info
 
+    def prefetch(self, real_estates):
+        """
+        Sources can read the data of several (neighbouring) real estates at once to share the work between
+        their extracts (see :mod:`pyramid_oereb.core.bulk_extract`). The following calls of :meth:`read` for
+        these real estates can then use the prefetched data. The default implementation does nothing.
+
+        Args:
+            real_estates (list of pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estates which will be read next.
+        """
+        pass
+
     def read(self, params, real_estate, bbox):
         """
         Every public law restriction source has to implement a read method. This method must accept the two
@@ -12,6 +12,13 @@ class RealEstateBaseSource(Base):
     """
     _record_class_ = RealEstateRecord
 
+    def load_index(self):
+        """
+        Hook to load an in-memory index of the real estates on the startup of the web application, for
+        sources keeping one. The default does nothing.
+        """
+        pass
+
     def read(self, params, nb_ident=None, number=None, egrid=None, geometry=None):
         """
         Every real estate source has to implement a read method. This method must accept the four key word
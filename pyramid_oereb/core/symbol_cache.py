@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+An optional cache for the legend entry images delivered by the `/image/symbol` route. A map client requests
+the same symbols for every extract, with the cache they are read from the database and decoded only once per
+process.
+
+The decoded images are kept in the memory of the process, keyed by the theme and the request parameters
+identifying the legend entry, and the least recently used images are evicted when the cache is full. The
+responses carry a strong `ETag` (the hash of the image) and a `Cache-Control` header, so clients and proxies
+keep the images and revalidate them with a conditional request, which is answered by `304 Not Modified`.
+
+The cache is not notified when the legend entries are changed in the database, e.g. by the
+`create_legend_entries` script. Each process delivers a cached image until its `ttl` expires and clients
+use it for `max_age` seconds more, so a changed symbol is delivered after at most the sum of both.
+
+.. code-block:: yaml
+
+    symbol_cache:
+      enabled: true
+      # Maximum number of cached images, the least recently used are removed first
+      max_entries: 1000
+      # Seconds a cached image is delivered before it is read again (default: 300)
+      ttl: 300
+      # Seconds clients may use an image without revalidating it (default: 300)
+      max_age: 300
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from pyramid_oereb.core.extract_cache import MemoryBackend
+from pyramid_oereb.core.tracing import trace
+
+log = logging.getLogger(__name__)
+
+
+class CachedSymbol(object):
+    """
+    A decoded legend entry image.
+    """
+
+    def __init__(self, body, mimetype):
+        """
+        Args:
+            body (bytes): The binary image content.
+            mimetype (str): The mimetype of the image.
+        """
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()
+
+
+class SymbolCache(object):
+    """
+    Caches the decoded legend entry images of the themes.
+    """
+
+    def __init__(self, max_entries=1000, ttl=300, max_age=300):
+        """
+        Args:
+            max_entries (int): The maximum number of cached images.
+            ttl (int or None): The seconds a cached image is delivered, None for no limit.
+            max_age (int): The seconds clients may use an image without revalidating it.
+        """
+        self._backend_ = MemoryBackend(max_entries)
+        self._ttl_ = ttl
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._statistics_lock_ = threading.Lock()
+
+    @staticmethod
+    def get_key(theme_code, params):
+        """
+        Returns the cache key of an image.
+
+        Args:
+            theme_code (str): The code of the theme.
+            params (dict): The request parameters identifying the legend entry.
+
+        Returns:
+            str: The cache key.
+        """
+        return repr((theme_code, tuple(sorted(params.items()))))
+
+    def get(self, theme_code, params):
+        """
+        Returns the cached image of a legend entry.
+
+        Args:
+            theme_code (str): The code of the theme.
+            params (dict): The request parameters identifying the legend entry.
+
+        Returns:
+            CachedSymbol or None: The cached image or None if it is not cached.
+        """
+        key = self.get_key(theme_code, params)
+        entry = self._backend_.get(key)
+        if entry is not None and self._ttl_ is not None and time.time() - entry['created'] > self._ttl_:
+            self._backend_.delete(key)
+            entry = None
+        with self._statistics_lock_:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        trace(log, 'Delivering cached symbol', key=key)
+        return entry['symbol']
+
+    def set(self, theme_code, params, body, mimetype):
+        """
+        Caches the image of a legend entry.
+
+        Args:
+            theme_code (str): The code of the theme.
+            params (dict): The request parameters identifying the legend entry.
+            body (bytes): The binary image content.
+            mimetype (str): The mimetype of the image.
+
+        Returns:
+            CachedSymbol: The cached image.
+        """
+        symbol = CachedSymbol(body, mimetype)
+        self._backend_.set(self.get_key(theme_code, params), {
+            'symbol': symbol,
+            'tags': {},
+            'created': time.time()
+        })
+        return symbol
+
+    def get_statistics(self):
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: The number of `hits`, `misses`, `evictions` and cached `entries`.
+        """
+        with self._statistics_lock_:
+            hits, misses = self.hits, self.misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': self._backend_.evictions,
+            'entries': len(self._backend_)
+        }
+
+
+_symbol_cache = None
+_symbol_cache_lock = threading.Lock()
+
+
+def get_symbol_cache():
+    """
+    Returns the process wide symbol cache.
+
+    Returns:
+        SymbolCache or None: The symbol cache or None if it is not enabled.
+    """
+    global _symbol_cache
+    if _symbol_cache is None:
+        from pyramid_oereb.core.config import Config
+        cache_config = Config.get('symbol_cache') or {}
+        if not cache_config.get('enabled', False):
+            return None
+        with _symbol_cache_lock:
+            if _symbol_cache is None:
+                _symbol_cache = SymbolCache(
+                    max_entries=cache_config.get('max_entries', 1000),
+                    ttl=cache_config.get('ttl', 300),
+                    max_age=cache_config.get('max_age', 300)
+                )
+    return _symbol_cache
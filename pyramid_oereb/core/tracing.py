@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy tracing for the hot paths of the application. The trace messages and spans are only built if the
+logger of the calling module is enabled for DEBUG, otherwise they cost a level check:
+
+.. code-block:: python
+
+    from pyramid_oereb.core.tracing import span, trace
+
+    log = logging.getLogger(__name__)
+
+    trace(log, 'removing plr', plr=plr)
+    with span(log, 'read plr sources', egrid=real_estate.egrid):
+        ...
+
+The fields are formatted as `key=value` pairs and passed as `trace` in the extra of the log record, so
+structured log handlers can use them. Fields which are expensive to compute can be passed as callables, they
+are only called if the message is logged. Spans log the time spent in seconds and nest, the name of a span
+is prefixed by the names of the enclosing spans of the same thread.
+"""
+import logging
+import threading
+
+from timeit import default_timer as timer
+
+_local = threading.local()
+
+
+def is_enabled(logger):
+    """
+    Checks if tracing is enabled for the passed logger.
+
+    Args:
+        logger (logging.Logger): The logger of the calling module.
+
+    Returns:
+        bool: True if the logger is enabled for DEBUG.
+    """
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def _get_stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(logger, message, fields):
+    fields = {key: value() if callable(value) else value for key, value in fields.items()}
+    if len(fields) > 0:
+        message = '{0} {1}'.format(message, ' '.join(
+            '{0}={1}'.format(key, value) for key, value in fields.items()
+        ))
+    stack = _get_stack()
+    if len(stack) > 0:
+        message = '[{0}] {1}'.format('/'.join(stack), message)
+    logger.debug(message, extra={'trace': fields})
+
+
+def trace(logger, message, **fields):
+    """
+    Logs a trace message if the logger is enabled for DEBUG.
+
+    Args:
+        logger (logging.Logger): The logger of the calling module.
+        message (str): The message.
+        **fields: The values to add to the message, callables are called to get the value.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        _emit(logger, message, fields)
+
+
+class _NullSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Span(object):
+    """
+    Measures the time spent in a stage and logs it when the stage is left.
+    """
+
+    def __init__(self, logger, name, fields):
+        """
+        Args:
+            logger (logging.Logger): The logger of the calling module.
+            name (str): The name of the stage.
+            fields (dict): The values to add to the message, callables are called to get the value.
+        """
+        self._logger_ = logger
+        self._name_ = name
+        self._fields_ = fields
+        self._start_time_ = None
+        self.duration = None
+
+    def __enter__(self):
+        _get_stack().append(self._name_)
+        self._start_time_ = timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = timer() - self._start_time_
+        _get_stack().pop()
+        fields = dict(self._fields_, seconds='{0:.6f}'.format(self.duration))
+        if exc_type is not None:
+            fields['error'] = exc_type.__name__
+        _emit(self._logger_, 'DONE with {0}'.format(self._name_), fields)
+        return False
+
+
+def span(logger, name, **fields):
+    """
+    Returns a context manager measuring the time spent in a stage if the logger is enabled for DEBUG.
+
+    Args:
+        logger (logging.Logger): The logger of the calling module.
+        name (str): The name of the stage.
+        **fields: The values to add to the message, callables are called to get the value.
+
+    Returns:
+        Span or object: The span, or a context manager doing nothing if tracing is disabled.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        return Span(logger, name, fields)
+    return _null_span
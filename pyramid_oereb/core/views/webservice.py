@@ -7,7 +7,7 @@ import io
 # import re
 
 from pyramid.httpexceptions import HTTPBadRequest, HTTPFound, HTTPInternalServerError, HTTPNoContent, \
-    HTTPNotFound
+    HTTPNotFound, HTTPNotModified
 from pyramid.path import DottedNameResolver
 from shapely.geometry import Point
 from pyramid.renderers import render_to_response
@@ -15,10 +15,14 @@ from pyramid.renderers import render_to_response
 from pyramid_oereb import route_prefix
 from pyramid_oereb import Config
 from pyreproj import Reprojector
+from webob.etag import ETagMatcher
 
+from pyramid_oereb.core.extract_cache import get_extract_cache
 from pyramid_oereb.core.processor import create_processor
 from pyramid_oereb.core.readers.address import AddressReader
 from pyramid_oereb.core.renderer import Base as Renderer
+from pyramid_oereb.core.symbol_cache import get_symbol_cache
+from pyramid_oereb.core.tracing import trace
 from timeit import default_timer as timer
 
 from pyramid_oereb.contrib.stats.decorators import OerebStats
@@ -267,63 +271,70 @@ class PlrWebservice(object):
         log.debug("get_extract_by_id() start")
         try:
             params = self.__validate_extract_params__()
-            processor = create_processor()
-            # read the real estate from configured source by the passed parameters
-            real_estate_reader = processor.real_estate_reader
-            if params.egrid:
-                real_estate_records = real_estate_reader.read(params, egrid=params.egrid)
-            elif params.identdn and params.number:
-                real_estate_records = real_estate_reader.read(
-                    params,
-                    nb_ident=params.identdn,
-                    number=params.number
-                )
+            extract_cache = None if params.format == 'url' else get_extract_cache()
+            response = None if extract_cache is None else extract_cache.get_response(params)
+            if response is not None:
+                log.debug("get_extract_by_id() delivering cached extract")
             else:
-                raise HTTPBadRequest("Missing required argument")
-            # check if result is strictly one (we queried with primary keys)
-            if len(real_estate_records) == 1:
-
-                # Redirect for format URL
-                if params.format == 'url':
-                    log.debug("get_extract_by_id() calling url")
-                    return self.__redirect_to_dynamic_client__(real_estate_records[0])
-                # yappi.set_clock_type("cpu")
-                # yappi.start()
-                extract = processor.process(
-                    real_estate_records[0],
-                    params,
-                    self._request.route_url('{0}/sld'.format(route_prefix))
-                )
-                # yappi.get_func_stats().save('/workspace/processor_function_stats.prof', "pstat")
-                # yappi.get_thread_stats().save('/workspace/processor_thread_stats.prof', "pstat")
-
-                if params.format == 'json':
-                    log.debug("get_extract_by_id() calling json")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_json',
-                        (extract, params),
-                        request=self._request
+                processor = create_processor()
+                # read the real estate from configured source by the passed parameters
+                real_estate_reader = processor.real_estate_reader
+                if params.egrid:
+                    real_estate_records = real_estate_reader.read(params, egrid=params.egrid)
+                elif params.identdn and params.number:
+                    real_estate_records = real_estate_reader.read(
+                        params,
+                        nb_ident=params.identdn,
+                        number=params.number
                     )
-                elif params.format == 'xml':
-                    log.debug("get_extract_by_id() calling xml")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_xml',
-                        (extract, params),
-                        request=self._request
-                    )
-                elif params.format == 'pdf':
-                    log.debug("get_extract_by_id() calling pdf")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_print',
-                        (extract, params),
-                        request=self._request
+                else:
+                    raise HTTPBadRequest("Missing required argument")
+                # check if result is strictly one (we queried with primary keys)
+                if len(real_estate_records) == 1:
+
+                    # Redirect for format URL
+                    if params.format == 'url':
+                        log.debug("get_extract_by_id() calling url")
+                        return self.__redirect_to_dynamic_client__(real_estate_records[0])
+                    # yappi.set_clock_type("cpu")
+                    # yappi.start()
+                    extract = processor.process(
+                        real_estate_records[0],
+                        params,
+                        self._request.route_url('{0}/sld'.format(route_prefix))
                     )
+                    # yappi.get_func_stats().save('/workspace/processor_function_stats.prof', "pstat")
+                    # yappi.get_thread_stats().save('/workspace/processor_thread_stats.prof', "pstat")
+
+                    if params.format == 'json':
+                        log.debug("get_extract_by_id() calling json")
+                        response = render_to_response(
+                            'pyramid_oereb_extract_json',
+                            (extract, params),
+                            request=self._request
+                        )
+                    elif params.format == 'xml':
+                        log.debug("get_extract_by_id() calling xml")
+                        response = render_to_response(
+                            'pyramid_oereb_extract_xml',
+                            (extract, params),
+                            request=self._request
+                        )
+                    elif params.format == 'pdf':
+                        log.debug("get_extract_by_id() calling pdf")
+                        response = render_to_response(
+                            'pyramid_oereb_extract_print',
+                            (extract, params),
+                            request=self._request
+                        )
+                    else:
+                        raise HTTPBadRequest("The format '{}' is wrong".format(params.format))
+                    if extract_cache is not None:
+                        extract_cache.set_response(params, extract, response)
+                    end_time = timer()
+                    trace(log, 'DONE with extract', seconds=end_time - start_time)
                 else:
-                    raise HTTPBadRequest("The format '{}' is wrong".format(params.format))
-                end_time = timer()
-                log.debug("DONE with extract, time spent: {} seconds".format(end_time - start_time))
-            else:
-                raise HTTPNoContent("No real estate found")
+                    raise HTTPNoContent("No real estate found")
         except HTTPNoContent as err:
             response = HTTPNoContent('{}'.format(err))
         except HTTPBadRequest as err:
@@ -451,15 +462,11 @@ class PlrWebservice(object):
             shapely.geometry.Point or shapely.geometry.Polygon: The transformed coordinates as
             Point.
         """
-        log.debug('----- Transforming Coordinates: -----')
-        log.debug('----- X/Y Coordinates: {0} -----'.format(coord))
         epsg = 'epsg:{0}'
         srid = Config.get('srid')
-        log.debug('----- srid from config (to_srs): {0} -----'.format(srid))
-        log.debug('----- srid from source (from_srs): {0} -----'.format(source_crs))
         rp = Reprojector()
         x, y = rp.transform(coord, from_srs=epsg.format(source_crs), to_srs=epsg.format(srid))
-        log.debug('----- X/Y coordinates after transformation: ({0}, {1}) -----'.format(x, y))
+        trace(log, 'Transformed coordinates', coord=coord, from_srs=source_crs, to_srs=srid, result=(x, y))
         return Point(x, y)
 
     def __get_egrid_response__(self, records, params):
@@ -866,22 +873,44 @@ class Symbol(object):
     def get_image(self):
         """
         Returns a response containing the binary image content using the configured "get_symbol_method".
+        If the symbol cache is enabled (see :mod:`pyramid_oereb.core.symbol_cache`), the image is only read
+        once and the response carries an ETag, conditional requests are answered with 304 Not Modified.
 
         Returns:
             pyramid.response.Response: Response containing the binary image content.
         """
         theme_code = self._request_.matchdict.get('theme_code')
-        method = self.get_method(theme_code)
-        theme_config = Config.get_theme_config_by_code(str(theme_code))
-        if method:
-            body, mimetype = method(dict(self._request_.params), theme_config)
+        params = dict(self._request_.params)
+        symbol_cache = get_symbol_cache()
+        symbol = None if symbol_cache is None else symbol_cache.get(theme_code, params)
+        if symbol is None:
+            method = self.get_method(theme_code)
+            theme_config = Config.get_theme_config_by_code(str(theme_code))
+            if not method:
+                log.error('"get_symbol_method" not found')
+                raise HTTPNotFound()
+            body, mimetype = method(params, theme_config)
+            if symbol_cache is None:
+                response = self._request_.response
+                response.status_int = 200
+                response.body = body
+                response.content_type = mimetype
+                return response
+            symbol = symbol_cache.set(theme_code, params, body, mimetype)
+        return self._get_cached_response(symbol, symbol_cache.max_age)
+
+    def _get_cached_response(self, symbol, max_age):
+        if_none_match = self._request_.headers.get('If-None-Match')
+        if if_none_match and symbol.etag in ETagMatcher.parse(if_none_match):
+            response = HTTPNotModified()
+        else:
             response = self._request_.response
             response.status_int = 200
-            response.body = body
-            response.content_type = mimetype
-            return response
-        log.error('"get_symbol_method" not found')
-        raise HTTPNotFound()
+            response.body = symbol.body
+            response.content_type = symbol.mimetype
+        response.etag = symbol.etag
+        response.cache_control = 'public, max-age={0}'.format(max_age)
+        return response
 
     @staticmethod
     def get_method(theme_code):
@@ -1006,3 +1035,50 @@ class QRcode(object):
         qr_img.save(buffered, format="PNG")
         qr_code = buffered.getvalue()
         return qr_code
+
+
+class Health(object):
+    """
+    Webservice to deliver the health of the database connections used by the application. It answers with
+    status 200 if all databases are available and with status 503 otherwise. The health of each connection
+    is cached by the database adapter, so calling this service frequently does not put load on the
+    databases.
+
+    The response only contains the `healthy` flag. The health of each connection (with masked passwords)
+    and the live statistics of the connection pools are added if enabled in the configuration, e.g. for
+    an application which is not reachable from the internet:
+
+    .. code-block:: yaml
+
+        health:
+          details: true
+    """
+
+    def __init__(self, request):
+        """
+        Args:
+            request (pyramid.request.Request or pyramid.testing.DummyRequest): The pyramid request instance.
+        """
+        self._request_ = request
+
+    def get_health(self):
+        """
+        Returns the health status of all database connections as JSON, with the details of the connections
+        if enabled.
+
+        Returns:
+            pyramid.response.Response: The response containing the health status.
+        """
+        from pyramid_oereb import database_adapter
+        connections = database_adapter.get_health_status()
+        healthy = all(status.get('healthy') for status in connections.values())
+        response = self._request_.response
+        response.status_int = 200 if healthy else 503
+        result = {
+            'healthy': healthy
+        }
+        if (Config.get('health') or {}).get('details', False):
+            result['connections'] = connections
+            result['pools'] = database_adapter.get_pool_statistics()
+        response.json_body = result
+        return response
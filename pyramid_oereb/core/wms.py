@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Downloads the WMS images of the extracts. All downloads of the application share one pooled HTTP session, so
+the connections to the WMS servers are reused. The images of one extract are downloaded in parallel and
+identical URLs (e.g. several PLRs shown by the same layer) are downloaded only once.
+
+The download can be configured in the `extract` section of the configuration:
+
+.. code-block:: yaml
+
+    extract:
+      wms_download:
+        # Maximum number of images downloaded at the same time (default: 8)
+        max_workers: 8
+        # Seconds to wait for the WMS to connect and to send data (default: 30)
+        timeout: 30
+        # Number of retries on connection errors and on the status codes 502, 503 and 504 (default: 2)
+        retries: 2
+"""
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer as timer
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pyramid_oereb.core.tracing import trace
+
+log = logging.getLogger(__name__)
+
+
+class WmsFetcher(object):
+    """
+    Downloads WMS images through a pooled HTTP session. The latency of every download is logged and
+    summed up per service (URL without query).
+
+    Attributes:
+        RETRY_STATUS_CODES (tuple of int): The HTTP status codes which are retried.
+    """
+
+    RETRY_STATUS_CODES = (502, 503, 504)
+
+    def __init__(self, max_workers=8, timeout=30, retries=2, backoff_factor=0.2):
+        """
+        Args:
+            max_workers (int): The maximum number of parallel downloads. It is also the size of the
+                connection pool per host.
+            timeout (float): The seconds to wait for the WMS to connect and to send data.
+            retries (int): The number of retries on connection errors and retried status codes.
+            backoff_factor (float): The factor of the exponential delay between the retries.
+        """
+        self._timeout_ = timeout
+        self._session_ = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=self.RETRY_STATUS_CODES,
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+        )
+        self._session_.mount('http://', adapter)
+        self._session_.mount('https://', adapter)
+        self._executor_ = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pyramid_oereb_wms')
+        self._statistics_ = dict()
+        self._statistics_lock_ = threading.Lock()
+
+    def fetch(self, url, proxies=None):
+        """
+        Downloads the passed URL.
+
+        Args:
+            url (str): The URL to download.
+            proxies (dict or None): The proxies to use.
+
+        Returns:
+            requests.Response: The response of the WMS.
+
+        Raises:
+            requests.exceptions.RequestException: If the download failed.
+        """
+        start_time = timer()
+        error = True
+        try:
+            response = self._session_.get(url, proxies=proxies, timeout=self._timeout_)
+            error = False
+            return response
+        finally:
+            latency = timer() - start_time
+            trace(log, 'Downloaded', url=url, seconds=latency, failed=error)
+            self._add_latency(url, latency, error)
+
+    def fetch_all(self, downloads):
+        """
+        Downloads the passed URLs in parallel. Every distinct URL is downloaded only once.
+
+        Args:
+            downloads (list of tuple): The URLs to download as pairs of URL and proxies.
+
+        Returns:
+            dict: The response (requests.Response) or the raised exception for every distinct URL.
+        """
+        proxies_by_url = dict()
+        for url, proxies in downloads:
+            proxies_by_url.setdefault(url, proxies)
+        if len(proxies_by_url) < 2:
+            futures = None
+        else:
+            futures = {
+                url: self._executor_.submit(self.fetch, url, proxies)
+                for url, proxies in proxies_by_url.items()
+            }
+        results = dict()
+        for url, proxies in proxies_by_url.items():
+            try:
+                if futures is None:
+                    results[url] = self.fetch(url, proxies)
+                else:
+                    results[url] = futures[url].result()
+            except Exception as ex:
+                results[url] = ex
+        return results
+
+    def download(self, view_services, language):
+        """
+        Downloads the images of the passed view services and sets them on the view services.
+
+        Args:
+            view_services (list of pyramid_oereb.core.records.view_service.ViewServiceRecord): The view
+                services to download the images for.
+            language (str): The language of the images.
+
+        Raises:
+            LookupError: Raised if a download failed, the response is not code 200 or the content-type
+                doesn't contain type "image".
+            AttributeError: Raised if an URL itself isn't valid at all.
+        """
+        downloads = []
+        for view_service in view_services:
+            image_language = view_service.get_image_language(language)
+            downloads.append((view_service, image_language, view_service.get_image_url(image_language)))
+        results = self.fetch_all([(url, view_service.proxies) for view_service, _, url in downloads])
+        for view_service, image_language, url in downloads:
+            result = results[url]
+            if isinstance(result, Exception):
+                dedicated_msg = f"An image could not be downloaded. URL was: {url}, error was {result}"
+                log.error(dedicated_msg)
+                raise LookupError(dedicated_msg)
+            view_service.set_image(image_language, url, result)
+
+    def _add_latency(self, url, latency, error):
+        parts = urlsplit(url)
+        service = urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+        with self._statistics_lock_:
+            statistics = self._statistics_.setdefault(service, {
+                'downloads': 0,
+                'errors': 0,
+                'time_total': 0.0,
+                'time_max': 0.0
+            })
+            statistics['downloads'] += 1
+            statistics['errors'] += int(error)
+            statistics['time_total'] += latency
+            statistics['time_max'] = max(statistics['time_max'], latency)
+
+    def get_statistics(self):
+        """
+        Returns the download statistics.
+
+        Returns:
+            dict: The statistics per service (URL without query). Every entry contains the number of
+            `downloads` and `errors`, the `time_total`, `time_average` and `time_max` in seconds.
+        """
+        with self._statistics_lock_:
+            statistics = {service: dict(values) for service, values in self._statistics_.items()}
+        for values in statistics.values():
+            values['time_average'] = values['time_total'] / values['downloads']
+        return statistics
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """
+    Returns the process wide WMS fetcher. It is created on the first call using the `wms_download` settings
+    of the `extract` section.
+
+    Returns:
+        WmsFetcher: The WMS fetcher.
+    """
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                from pyramid_oereb.core.config import Config
+                settings = (Config.get('extract') or {}).get('wms_download') or {}
+                _fetcher = WmsFetcher(
+                    max_workers=settings.get('max_workers', 8),
+                    timeout=settings.get('timeout', 30),
+                    retries=settings.get('retries', 2)
+                )
+    return _fetcher
@@ -60,7 +60,9 @@ setup(
             'create_example_yaml = dev.config.create_yaml:create_yaml',
             'create_theme_tables = pyramid_oereb.contrib.data_sources.create_tables:create_theme_tables',
             'create_legend_entries = pyramid_oereb.contrib.data_sources.standard.load_legend_entries:run',
-            'create_stats_tables = pyramid_oereb.contrib.stats.scripts.create_stats_tables:create_stats_tables'  # noqa: E501
+            'create_stats_tables = pyramid_oereb.contrib.stats.scripts.create_stats_tables:create_stats_tables',  # noqa: E501
+            'create_bulk_extracts = pyramid_oereb.core.bulk_extract:run',
+            'invalidate_extract_cache = pyramid_oereb.core.extract_cache:run'
         ]
     }
 )
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+from geolink_formatter import XML
+
+from pyramid_oereb.contrib.data_sources.oereblex import geolink_cache as geolink_cache_module
+from pyramid_oereb.contrib.data_sources.oereblex.geolink_cache import GeolinkCache, get_geolink_cache
+from pyramid_oereb.contrib.data_sources.oereblex.sources.document import OEREBlexSource
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.extract_cache import FileBackend, MemoryBackend
+from pyramid_oereb.core.records.document_types import DocumentTypeRecord
+from pyramid_oereb.core.records.law_status import LawStatusRecord
+from tests.mockrequest import MockParameter
+
+URL = 'http://oereblex.example.com/api/geolinks/100.xml'
+
+
+@pytest.fixture
+def geolink():
+    with open('./tests/resources/geolink_v1.2.2.xml', 'rb') as f:
+        yield f.read()
+
+
+@pytest.fixture
+def parser():
+    yield XML(host_url='http://oereblex.example.com')
+
+
+def test_get_documents(geolink, parser):
+    cache = GeolinkCache(MemoryBackend())
+    with requests_mock.mock() as m:
+        m.get(URL, content=geolink, headers={'ETag': '"v1"'})
+        documents = cache.get_documents(parser.from_string, URL, 'de')
+        assert cache.get_documents(parser.from_string, URL, 'de') is documents
+        assert m.call_count == 1
+        assert m.last_request.qs == {'locale': ['de']}
+        # other languages are requested separately
+        cache.get_documents(parser.from_string, URL, 'fr')
+        assert m.call_count == 2
+    assert [document.id for document in documents] == \
+        [document.id for document in parser.from_string(geolink)]
+    assert cache.get_statistics() == {
+        'hits': 1,
+        'revalidations': 0,
+        'misses': 2,
+        'hit_rate': 1 / 3,
+        'evictions': 0,
+        'entries': 2
+    }
+
+
+def test_revalidation(geolink, parser):
+    cache = GeolinkCache(MemoryBackend(), ttl=60)
+    with requests_mock.mock() as m:
+        m.get(URL, content=geolink, headers={
+            'ETag': '"v1"',
+            'Last-Modified': 'Wed, 21 Oct 2020 07:28:00 GMT'
+        })
+        with patch('time.time', return_value=1000.0):
+            documents = cache.get_documents(parser.from_string, URL, 'de')
+        m.get(URL, status_code=304)
+        with patch('time.time', return_value=1061.0):
+            assert cache.get_documents(parser.from_string, URL, 'de') is documents
+        assert m.call_count == 2
+        assert m.last_request.headers['If-None-Match'] == '"v1"'
+        assert m.last_request.headers['If-Modified-Since'] == 'Wed, 21 Oct 2020 07:28:00 GMT'
+        # the revalidated documents are delivered for another ttl
+        with patch('time.time', return_value=1120.0):
+            assert cache.get_documents(parser.from_string, URL, 'de') is documents
+        assert m.call_count == 2
+        m.get(URL, content=geolink, headers={'ETag': '"v2"'})
+        with patch('time.time', return_value=1200.0):
+            assert cache.get_documents(parser.from_string, URL, 'de') is not documents
+        assert m.last_request.headers['If-None-Match'] == '"v1"'
+    assert cache.get_statistics()['revalidations'] == 1
+    assert cache.get_statistics()['misses'] == 2
+
+
+def test_error(parser):
+    cache = GeolinkCache(MemoryBackend())
+    with requests_mock.mock() as m:
+        m.get(URL, status_code=500)
+        with pytest.raises(requests.HTTPError):
+            cache.get_documents(parser.from_string, URL, 'de')
+    assert len(cache._backend_) == 0
+
+
+def test_file_backend(tmpdir, geolink, parser):
+    with requests_mock.mock() as m:
+        m.get(URL, content=geolink)
+        documents = GeolinkCache(FileBackend(str(tmpdir))).get_documents(parser.from_string, URL, 'de')
+        # e.g. after a restart
+        cached = GeolinkCache(FileBackend(str(tmpdir))).get_documents(parser.from_string, URL, 'de')
+        assert m.call_count == 1
+    assert [document.id for document in cached] == [document.id for document in documents]
+    assert [document.files[0].href for document in cached] == \
+        [document.files[0].href for document in documents]
+
+
+def test_get_geolink_cache(tmpdir):
+    cache_config = {
+        'enabled': True,
+        'ttl': 60,
+        'backend': {
+            'class': 'pyramid_oereb.core.extract_cache.FileBackend',
+            'params': {
+                'path': str(tmpdir)
+            }
+        }
+    }
+    with patch.object(geolink_cache_module, '_geolink_cache', None):
+        assert get_geolink_cache(None) is None
+        assert get_geolink_cache({'enabled': False}) is None
+        cache = get_geolink_cache(cache_config)
+        assert isinstance(cache._backend_, FileBackend)
+        assert cache._ttl_ == 60
+        assert get_geolink_cache(cache_config) is cache
+
+
+def test_read_shared_by_sources(geolink):
+    law_status = LawStatusRecord('inForce', {'de': 'Rechtskräftig'})
+    document_type = DocumentTypeRecord('LegalProvision', {'de': 'Rechtsvorschrift'})
+    with patch.object(geolink_cache_module, '_geolink_cache', None), requests_mock.mock() as m, \
+            patch.object(Config, 'get_document_type_by_data_code', return_value=document_type), \
+            patch.object(Config, 'get_law_status_by_data_code', return_value=law_status):
+        m.get(URL, content=geolink)
+        records = []
+        for code in ['ch.Waldabstandslinien', 'ch.StatischeWaldgrenzen']:
+            source = OEREBlexSource(
+                host='http://oereblex.example.com',
+                language='de',
+                canton='BL',
+                code=code,
+                cache={'enabled': True}
+            )
+            for _ in range(15):
+                request_source = source.copy_for_request()
+                request_source.read(MockParameter(), 100, law_status)
+                records.append(request_source.records)
+        assert m.call_count == 1
+        assert geolink_cache_module._geolink_cache.get_statistics()['hits'] == 29
+    assert len(records[0]) == 9
+    assert all(len(source_records) == 9 for source_records in records)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+from geolink_formatter import XML
+
+from pyramid_oereb.contrib.data_sources.oereblex import geolink_fetcher as geolink_fetcher_module
+from pyramid_oereb.contrib.data_sources.oereblex.geolink_fetcher import GeolinkFetcher, get_fetcher
+from pyramid_oereb.contrib.data_sources.oereblex.sources.document import OEREBlexSource
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.records.document_types import DocumentTypeRecord
+from pyramid_oereb.core.records.law_status import LawStatusRecord
+from tests.mockrequest import MockParameter
+
+HOST = 'http://oereblex.example.com'
+
+
+@pytest.fixture
+def geolink():
+    with open('./tests/resources/geolink_v1.2.2.xml', 'rb') as f:
+        yield f.read()
+
+
+@pytest.fixture
+def law_status():
+    yield LawStatusRecord('inForce', {'de': 'Rechtskräftig'})
+
+
+@pytest.fixture
+def source(law_status):
+    document_type = DocumentTypeRecord('LegalProvision', {'de': 'Rechtsvorschrift'})
+    with patch.object(geolink_fetcher_module, '_fetcher', None), \
+            patch.object(Config, 'get_document_type_by_data_code', return_value=document_type), \
+            patch.object(Config, 'get_law_status_by_data_code', return_value=law_status):
+        yield OEREBlexSource(
+            host=HOST,
+            language='de',
+            canton='BL',
+            code='ch.Waldabstandslinien',
+            download={'max_workers': 4, 'timeout': 5}
+        ).copy_for_request()
+
+
+def test_get_fetcher():
+    with patch.object(geolink_fetcher_module, '_fetcher', None):
+        fetcher = get_fetcher({'max_workers': 2, 'timeout': 5, 'retries': 3})
+        assert fetcher._timeout_ == 5
+        adapter = fetcher._session_.get_adapter(HOST)
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.status_forcelist == (502, 503, 504)
+        assert fetcher._executor_._max_workers == 2
+        assert get_fetcher() is fetcher
+
+
+def test_get_documents(geolink):
+    parser = XML(host_url=HOST)
+    fetcher = GeolinkFetcher()
+    with requests_mock.mock() as m:
+        m.get(HOST + '/api/geolinks/100.xml', content=geolink)
+        documents = fetcher.get_documents(parser.from_string, HOST + '/api/geolinks/100.xml', 'fr')
+        assert m.last_request.qs == {'locale': ['fr']}
+        assert m.last_request.timeout == 30
+        fetcher.get(HOST + '/api/geolinks/100.xml', timeout=1)
+        assert m.last_request.timeout == 1
+        m.get(HOST + '/api/geolinks/200.xml', status_code=404)
+        with pytest.raises(requests.HTTPError):
+            fetcher.get_documents(parser.from_string, HOST + '/api/geolinks/200.xml', 'de')
+    assert [document.id for document in documents] == \
+        [document.id for document in parser.from_string(geolink)]
+
+
+def test_map():
+    fetcher = GeolinkFetcher(max_workers=4)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def function(item):
+        # fails if the items are not processed at the same time
+        barrier.wait()
+        if item == 3:
+            raise ValueError(item)
+        return item * 2
+
+    results = fetcher.map(function, [0, 1, 2, 3])
+    assert [results[item] for item in range(3)] == [0, 2, 4]
+    assert isinstance(results[3], ValueError)
+    assert fetcher.map(lambda item: item * 2, [5]) == {5: 10}
+
+
+def test_prefetch(source, geolink, law_status):
+    with requests_mock.mock() as m:
+        for geolink_id in range(10):
+            m.get('{0}/api/geolinks/{1}.xml'.format(HOST, geolink_id), content=geolink)
+        m.get(HOST + '/api/geolinks/10.xml', status_code=500)
+        source.prefetch(MockParameter(), [(geolink_id % 11, law_status, None) for geolink_id in range(22)])
+        # distinct geoLinks are downloaded once
+        assert m.call_count == 11
+        for geolink_id in range(10):
+            source.read(MockParameter(), geolink_id, law_status)
+            assert len(source.records) == 9
+        with pytest.raises(requests.HTTPError):
+            source.read(MockParameter(), 10, law_status)
+        assert m.call_count == 11
+        # not prefetched geoLinks are downloaded on reading
+        m.get(HOST + '/api/geolinks/11.xml', content=geolink)
+        source.read(MockParameter(), 11, law_status)
+        assert m.call_count == 12
+        # the prefetched documents are bound to the request
+        source.copy_for_request().read(MockParameter(), 0, law_status)
+        assert m.call_count == 13
@@ -1,14 +1,16 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from sqlalchemy import String
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base, Query, Session
 
 from shapely.geometry import Polygon, GeometryCollection
 
 from pyramid_oereb.contrib.data_sources.standard.models import get_view_service, get_legend_entry
 from pyramid_oereb.contrib.data_sources.standard.sources.plr import DatabaseSource
 from pyramid_oereb.core import b64
+from pyramid_oereb.core.records.law_status import LawStatusRecord
 from pyramid_oereb.core.records.theme import ThemeRecord
 from pyramid_oereb.core.records.view_service import LegendEntryRecord
 
@@ -179,25 +181,128 @@ def test_handle_collection(with_tolerance, with_collection, config, source_param
         query = source.handle_collection(all_result_session(), geom)
 
         # check results for 4 combinations of with_collection + with_tolerance
-        from sqlalchemy.sql.annotation import AnnotatedColumn
-        from sqlalchemy.sql.elements import BinaryExpression, BooleanClauseList, TextClause
-        from geoalchemy2.functions import ST_Intersects, ST_Distance, ST_GeomFromWKB
-        if with_collection:
-            assert type(query.received_clause) is BooleanClauseList
-            for clause in query.received_clause.clauses:
-                assert type(clause) is TextClause
-                if with_tolerance:
-                    assert 'ST_Distance' in clause.text
-                else:
-                    assert 'ST_Intersects' in clause.text
+        sql = str(query.received_clause.compile(dialect=postgresql.dialect()))
+        # the bbox prefilter is applied once and the geometry is bound once
+        assert sql.count('&&') == 1
+        assert sql.count('ST_GeomFromWKB(%(geometry)s') == (3 if with_collection else 1)
+        assert geom.wkt not in sql
+        if with_tolerance:
+            assert 'ST_DWithin(' in sql
+            assert 'ST_Intersects' not in sql
         else:
-            if with_tolerance:
-                assert type(query.received_clause) is BinaryExpression
-                test_clause = query.received_clause.left
-                assert type(test_clause) is ST_Distance
-            else:
-                test_clause = query.received_clause
-                assert type(test_clause) is ST_Intersects
-            assert {
-                type(el) for el in test_clause.clause_expr.element.clauses
-            } == {AnnotatedColumn, ST_GeomFromWKB}
+            assert 'ST_Intersects' in sql
+            assert 'ST_DWithin(' not in sql
+        assert ('ST_CollectionExtract' in sql) == with_collection
+
+
+def test_is_empty_cached(source_params, all_result_session):
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=all_result_session()):
+        source = DatabaseSource(**source_params)
+    copy = source.copy_for_request()
+    session = Session()
+    with patch.object(Query, 'scalar', return_value=False) as scalar:
+        assert source.is_empty(session)
+        assert copy.is_empty(session)
+        assert scalar.call_count == 2
+    with patch.object(Query, 'scalar', return_value=True) as scalar:
+        assert not copy.is_empty(session)
+        assert not source.is_empty(session)
+        assert scalar.call_count == 1
+
+
+def test_collect_legend_entries_by_bbox_and_law_status(source_params, all_result_session, legend_entry_model_class):  # noqa: E501
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=all_result_session()):
+        source = DatabaseSource(**source_params)
+    legend_entry_1 = legend_entry_model_class(id='1')
+    legend_entry_2 = legend_entry_model_class(id='2')
+    result = [
+        (legend_entry_1, 'inKraft'),
+        (legend_entry_2, 'inKraft'),
+        (legend_entry_1, 'AenderungMitVorwirkung')
+    ]
+    with patch.object(Query, 'all', autospec=True, return_value=result) as query_all:
+        legend_entries = source.collect_legend_entries_by_bbox_and_law_status(
+            Session(),
+            Polygon(((0, 0), (0, 1), (1, 1))),
+            ['inKraft', 'AenderungMitVorwirkung', 'AenderungOhneVorwirkung']
+        )
+        assert query_all.call_count == 1
+        statement = str(query_all.call_args[0][0].statement.compile(dialect=postgresql.dialect()))
+    assert legend_entries == {
+        'inKraft': [legend_entry_1, legend_entry_2],
+        'AenderungMitVorwirkung': [legend_entry_1],
+        'AenderungOhneVorwirkung': []
+    }
+    assert 'SELECT DISTINCT' in statement
+    assert 'JOIN land_use_plans.geometry' in statement
+    assert 'ST_Intersects' in statement
+
+
+@pytest.mark.parametrize('tolerance,expected', [
+    (None, ['1']),
+    (0.4, ['1']),
+    # at exactly the tolerance like ST_DWithin
+    (0.5, ['1', '2']),
+    (0.6, ['1', '2'])
+])
+def test_filter_prefetched_geometries(source_params, all_result_session, tolerance, expected):
+    if tolerance is not None:
+        source_params['tolerance'] = tolerance
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=all_result_session()):
+        source = DatabaseSource(**source_params)
+
+    class GeometryResult(object):
+        def __init__(self, plr_id):
+            self.public_law_restriction_id = plr_id
+
+    source._prefetched_ = {
+        'egrids': {'TEST'},
+        'geometries': [
+            (GeometryResult('1'), [Polygon(((0, 0), (0, 1), (1, 1))), Polygon(((5, 5), (5, 6), (6, 6)))]),
+            (GeometryResult('2'), [Polygon(((2.5, 0), (2.5, 1), (3.5, 1)))])
+        ]
+    }
+    real_estate = Mock(egrid='TEST', limit=Polygon(((0, 0), (0, 2), (2, 2), (2, 0))))
+    session = Mock()
+    result = source.collect_related_geometries_by_real_estate(session, real_estate)
+    assert [geometry_result.public_law_restriction_id for geometry_result in result] == expected
+    assert session.query.call_count == 0
+
+
+@pytest.mark.parametrize('tolerance,with_geometry', [
+    (None, False),
+    (0.5, True)
+])
+def test_collect_measured_public_law_restrictions(source_params, all_result_session, tolerance,
+                                                  with_geometry):
+    if tolerance is not None:
+        source_params['tolerance'] = tolerance
+    source_params['source']['params']['measure_in_database'] = True
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=all_result_session()):
+        source = DatabaseSource(**source_params)
+    rows = [
+        Mock(public_law_restriction_id='1', law_status='inKraft', published_from=None, published_until=None,
+             geo_metadata=None, dimension=2, area=4.0, length=8.0, nr_of_points=1,
+             geom=Polygon(((0, 0), (0, 2), (2, 2), (2, 0))).wkb if with_geometry else None),
+        Mock(public_law_restriction_id='1', law_status='inKraft', published_from=None, published_until=None,
+             geo_metadata=None, dimension=0, area=0.0, length=0.0, nr_of_points=1, geom=None)
+    ]
+    plrs = [Mock(id='1')]
+    real_estate = Mock(limit=Polygon(((0, 0), (0, 2), (2, 2), (2, 0))), areas_ratio=1.0)
+    with patch.object(Query, 'all', autospec=True, side_effect=[rows, plrs]) as query_all, patch(
+        'pyramid_oereb.core.config.Config.get_law_status_by_data_code',
+        return_value=LawStatusRecord('inKraft', {'de': 'Rechtskräftig'})
+    ):
+        public_law_restrictions, geometry_records = source.collect_measured_public_law_restrictions(
+            Session(),
+            real_estate,
+            with_geometry
+        )
+        statement = str(query_all.call_args_list[0][0][0].statement.compile(dialect=postgresql.dialect()))
+    assert public_law_restrictions == plrs
+    assert [record.dim for record in geometry_records['1']] == [2, 0]
+    assert geometry_records['1'][0].geom.area == (4.0 if with_geometry else 0.0)
+    for function in ['ST_Dump', 'ST_Intersection', 'ST_CollectionExtract', 'ST_Area', 'ST_Length']:
+        assert function in statement
+    assert ('ST_Buffer' in statement) == (tolerance is not None)
+    assert ('ST_AsBinary' in statement) == with_geometry
@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 from unittest.mock import patch
 
@@ -201,3 +203,98 @@ def test_read_all_missing_param(real_estate_source_params, all_real_estate_resul
     with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=all_real_estate_result_session()):  # noqa: E501
         with pytest.raises(AttributeError):
             source.read(Parameter('xml'))
+
+
+@pytest.fixture
+def indexed_real_estate_session(session, query, real_estates):
+
+    class Query(query):
+
+        def __init__(self, terms):
+            self.terms = terms
+
+        def filter(self, term):
+            if len(self.terms) == 1:
+                self.ids = term.right.value
+            return self
+
+        def all(self):
+            if len(self.terms) == 2:
+                # the versions of the real estates
+                return list(Session.versions.items())
+            Session.loaded.append(self.ids)
+            return [real_estate for real_estate in real_estates if real_estate.id in self.ids]
+
+    class Session(session):
+        versions = {1: 'a', 2: 'b'}
+        loaded = []
+
+        def query(self, *terms):
+            return Query(terms)
+
+    yield Session
+
+
+def test_read_by_index(real_estate_source_params, indexed_real_estate_session, wkb_multipolygons):
+    point = to_shape(wkb_multipolygons[0]).representative_point()
+    geometry = 'SRID=2056;{0}'.format(point.buffer(1.0).wkt)
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=indexed_real_estate_session()):  # noqa: E501
+        source = DatabaseSource(index={'enabled': True}, **real_estate_source_params)
+        # the index is loaded on the startup of the web application, not by creating the source
+        assert indexed_real_estate_session.loaded == []
+        source.load_index()
+        source.load_index()
+    assert indexed_real_estate_session.loaded == [[1, 2]]
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', side_effect=AssertionError):
+        request_source = source.copy_for_request()
+        request_source.read(Parameter('xml'), geometry=geometry)
+        assert [record.egrid for record in request_source.records] == ['CH113928077734', 'CH113928077735']
+        record = request_source.records[0]
+        assert isinstance(record, RealEstateRecord)
+        assert record.municipality == 'Oberwil (BL)'
+        assert record.land_registry_area == 35121
+        assert record.limit.equals(to_shape(wkb_multipolygons[0]))
+        assert record.subunit_of_land_register_designation == 'TEST'
+        request_source.read(Parameter('xml'), geometry='SRID=2056;POINT(2600000 1200000)')
+        assert request_source.records == []
+
+
+def test_refresh_index(real_estate_source_params, indexed_real_estate_session, wkb_multipolygons):
+    geometry = 'SRID=2056;{0}'.format(to_shape(wkb_multipolygons[0]).representative_point().wkt)
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=indexed_real_estate_session()):  # noqa: E501
+        source = DatabaseSource(index={'enabled': True, 'refresh_interval': 60}, **real_estate_source_params)
+        # the first lookup loads the index if it was not loaded on startup
+        source.read(Parameter('xml'), geometry=geometry)
+        assert indexed_real_estate_session.loaded == [[1, 2]]
+        indexed_real_estate_session.versions = {1: 'c'}
+        refresh = threading.Event()
+        load_index = source._load_index_
+
+        def load_index_later():
+            refresh.wait(5)
+            load_index()
+
+        with patch.object(source, '_load_index_', side_effect=load_index_later), \
+                patch('time.time', return_value=source._index_.updated + 61):
+            source.read(Parameter('xml'), geometry=geometry)
+            source.read(Parameter('xml'), geometry=geometry)
+            # the current index is used while it is refreshed in the background
+            assert [record.egrid for record in source.records] == ['CH113928077734', 'CH113928077735']
+            refresh.set()
+            with source._index_.refresh_lock:
+                pass
+        source.read(Parameter('xml'), geometry=geometry)
+    # only the changed real estate is loaded again, once, the removed one is not found anymore
+    assert indexed_real_estate_session.loaded == [[1, 2], [1]]
+    assert [record.egrid for record in source.records] == ['CH113928077734']
+
+
+def test_refresh_index_failed(real_estate_source_params, indexed_real_estate_session):
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session', return_value=indexed_real_estate_session()):  # noqa: E501
+        source = DatabaseSource(index={'enabled': True, 'refresh_interval': 60}, **real_estate_source_params)
+        source.load_index()
+    with patch.object(source, '_load_index_', side_effect=RuntimeError):
+        source.refresh_index_in_background().join(5)
+    # the former index is kept and refreshed again on the next lookup
+    assert source._index_.get_versions() == {1: 'a', 2: 'b'}
+    assert source._index_.refresh_lock.acquire(False)
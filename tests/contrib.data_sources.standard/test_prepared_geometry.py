@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+from geoalchemy2 import Geometry
+from shapely.geometry import Polygon
+from sqlalchemy import Column, Integer, MetaData, Table, or_
+from sqlalchemy.dialects import postgresql
+
+from pyramid_oereb.contrib.data_sources.prepared_geometry import PreparedGeometry, get_prepared_geometry
+
+table = Table(
+    'geometry', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('geom', Geometry('POLYGON', srid=2056))
+)
+
+
+def get_parcel(vertices):
+    angles = [2 * math.pi * i / vertices for i in range(vertices)]
+    return Polygon([(2600000 + math.cos(a) * 500, 1200000 + math.sin(a) * 500) for a in angles])
+
+
+def compile_filter(clause):
+    return clause.compile(dialect=postgresql.dialect())
+
+
+@pytest.mark.parametrize('tolerance', [None, 0.5])
+def test_statement_size(tolerance):
+    statements = [
+        str(compile_filter(PreparedGeometry(get_parcel(vertices), 2056).get_filter(table.c.geom, tolerance)))
+        for vertices in [10, 50000]
+    ]
+    assert statements[0] == statements[1]
+    assert 'geometry.geom && ST_MakeEnvelope(' in statements[0]
+
+
+def test_filter_params():
+    parcel = get_parcel(100)
+    prepared = PreparedGeometry(parcel, 2056)
+    compiled = compile_filter(or_(
+        prepared.get_filter(table.c.geom),
+        prepared.get_filter(table.c.geom, 0.5)
+    ))
+    # the geometry is bound once as WKB for all clauses of the statement
+    assert compiled.params['geometry'] == parcel.wkb
+    assert str(compiled).count('%(geometry)s') == 2
+    envelope = [value for key, value in compiled.params.items() if key.startswith('ST_MakeEnvelope')]
+    min_x, min_y, max_x, max_y = parcel.bounds
+    assert envelope[:4] == [min_x, min_y, max_x, max_y]
+    assert envelope[5:9] == [min_x - 0.5, min_y - 0.5, max_x + 0.5, max_y + 0.5]
+
+
+def test_get_prepared_geometry():
+    parcel = get_parcel(100)
+    prepared = get_prepared_geometry(parcel, 2056)
+    assert get_prepared_geometry(parcel, 2056) is prepared
+    assert get_prepared_geometry(prepared) is prepared
+    assert get_prepared_geometry(parcel, 2056).wkb == parcel.wkb
+    assert get_prepared_geometry(get_parcel(100), 2056) is not prepared
+    assert get_prepared_geometry(parcel, 21781).srid == 21781
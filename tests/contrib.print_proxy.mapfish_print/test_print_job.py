@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import json
+from unittest.mock import patch
+
+import pytest
+import responses
+from pyramid.httpexceptions import HTTPNotFound
+
+from pyramid_oereb.contrib.print_proxy.mapfish_print import print_job
+from pyramid_oereb.contrib.print_proxy.mapfish_print.mapfish_print import Renderer
+from pyramid_oereb.contrib.print_proxy.mapfish_print.print_job import PrintJob, submit_print_job
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.extract_cache import MemoryBackend
+from tests.mockrequest import MockRequest
+
+PRINT_URL = 'http://oereb-print:8080/print/oereb'
+
+
+@pytest.fixture
+def print_config():
+    config = {
+        'print': {
+            'base_url': PRINT_URL,
+            'headers': {'Content-Type': 'application/json; charset=UTF-8'},
+            'compute_toc_pages': True,
+            'async': {'enabled': True}
+        }
+    }
+    with patch.object(Config, '_config', config), \
+            patch.object(print_job, '_backend', MemoryBackend()), \
+            patch.object(print_job, 'route_prefix', 'oereb'), \
+            patch.object(MockRequest, 'route_url', lambda self, name, ref: '{0}/{1}'.format(name, ref)):
+        yield config
+
+
+def get_request(ref=None):
+    request = MockRequest()
+    request.matchdict['ref'] = ref
+    return request
+
+
+def submit(rsps, nb_toc_pages=1):
+    rsps.add(responses.POST, PRINT_URL + '/report.pdf', json={'ref': 'job-1'})
+    spec = {'attributes': {'nbTocPages': nb_toc_pages, 'RealEstate_EGRID': 'CH1'}}
+    return submit_print_job(get_request(), spec, spec['attributes'])
+
+
+def test_submit_print_job(print_config):
+    with responses.RequestsMock() as rsps:
+        result = submit(rsps)
+        assert json.loads(rsps.calls[0].request.body)['attributes']['nbTocPages'] == 1
+    assert result == {
+        'ref': 'job-1',
+        'statusURL': 'oereb/print/status/job-1',
+        'downloadURL': 'oereb/print/report/job-1'
+    }
+    assert print_job.get_print_job_backend().get('job-1')['archive']['RealEstate_EGRID'] == 'CH1'
+
+
+def test_get_status_running(print_config):
+    with responses.RequestsMock() as rsps:
+        submit(rsps)
+        rsps.add(responses.GET, PRINT_URL + '/status/job-1.json', json={'done': False, 'status': 'running'})
+        status = PrintJob(get_request('job-1')).get_status().json_body
+    assert status == {
+        'ref': 'job-1',
+        'done': False,
+        'status': 'running',
+        'error': None,
+        'downloadURL': None
+    }
+
+
+@pytest.mark.parametrize('true_nb_of_toc,reprinted', [
+    (1, False),
+    (2, True)
+])
+def test_get_status_finished(print_config, true_nb_of_toc, reprinted):
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps, \
+            patch.object(Renderer, 'get_nb_toc_pages', return_value=true_nb_of_toc):
+        submit(rsps)
+        rsps.add(responses.GET, PRINT_URL + '/status/job-1.json', json={'done': True, 'status': 'finished'})
+        rsps.add(responses.GET, PRINT_URL + '/report/job-1', body=b'%PDF')
+        rsps.add(responses.POST, PRINT_URL + '/report.pdf', json={'ref': 'job-2'})
+        status = PrintJob(get_request('job-1')).get_status().json_body
+        assert status['done'] is not reprinted
+        if reprinted:
+            assert json.loads(rsps.calls[-1].request.body)['attributes']['nbTocPages'] == 2
+        else:
+            assert status['downloadURL'] == 'oereb/print/report/job-1'
+    job = print_job.get_print_job_backend().get('job-1')
+    assert job['ref'] == ('job-2' if reprinted else 'job-1')
+    assert job['spec'] is None
+
+
+@pytest.mark.parametrize('created,checked', [
+    (1000.0, False),
+    # the lock of a failed request expires
+    (1000.0 - PrintJob.REPRINT_TIMEOUT - 1, True)
+])
+def test_get_status_checked_by_other_request(print_config, created, checked):
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps, \
+            patch.object(Renderer, 'get_nb_toc_pages', return_value=1), \
+            patch('time.time', return_value=1000.0):
+        submit(rsps)
+        rsps.add(responses.GET, PRINT_URL + '/status/job-1.json', json={'done': True, 'status': 'finished'})
+        rsps.add(responses.GET, PRINT_URL + '/report/job-1', body=b'%PDF')
+        backend = print_job.get_print_job_backend()
+        backend.add('job-1.reprint', {'created': created, 'tags': {}})
+        status = PrintJob(get_request('job-1')).get_status().json_body
+        # the pdf is only downloaded by the request checking the job
+        assert len(rsps.calls) == (3 if checked else 2)
+    assert status['done'] is checked
+    assert (backend.get('job-1')['spec'] is None) == checked
+
+
+def test_get_status_reprinted_by_other_request(print_config):
+    with responses.RequestsMock() as rsps:
+        submit(rsps)
+        rsps.add(responses.GET, PRINT_URL + '/status/job-1.json', json={'done': True, 'status': 'finished'})
+        backend = print_job.get_print_job_backend()
+        job = backend.get('job-1')
+        # another request printed the job again after this one has read it
+        backend.set('job-1', dict(job, ref='job-2', spec=None))
+        with patch.object(PrintJob, '_get_job', return_value=('job-1', job)):
+            status = PrintJob(get_request('job-1')).get_status().json_body
+    assert status['done'] is False
+    assert status['status'] == 'running'
+    assert backend.get('job-1.reprint') is None
+
+
+def test_get_report(print_config, tmpdir):
+    print_config['print']['pdf_archive_path'] = str(tmpdir)
+    with responses.RequestsMock() as rsps:
+        submit(rsps)
+        rsps.add(responses.GET, PRINT_URL + '/report/job-1', body=b'%PDF', content_type='application/pdf',
+                 headers={'Content-Disposition': 'attachment; filename=extract.pdf', 'X-Print-Server': '1'})
+        response = PrintJob(get_request('job-1')).get_report()
+        assert response.status_code == 200
+        assert response.body == b'%PDF'
+        assert response.content_type == 'application/pdf'
+        assert response.headers['Content-Disposition'] == 'attachment; filename=extract.pdf'
+        assert 'X-Print-Server' not in response.headers
+        assert len(tmpdir.listdir()) == 1
+        assert print_job.get_print_job_backend().get('job-1')['archived'] is True
+        # the pdf is archived only once per job
+        with patch.object(Renderer, 'archive_pdf_file') as archive_pdf_file:
+            PrintJob(get_request('job-1')).get_report()
+            # a concurrent download which read the job before it was archived
+            with patch.object(PrintJob, '_get_job', return_value=('job-1', {'ref': 'job-1'})):
+                PrintJob(get_request('job-1')).get_report()
+        assert archive_pdf_file.call_count == 0
+
+
+def test_unknown_job(print_config):
+    with pytest.raises(HTTPNotFound):
+        PrintJob(get_request('unknown')).get_status()
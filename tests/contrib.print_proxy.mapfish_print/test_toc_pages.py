@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from pyramid_oereb.contrib.print_proxy.mapfish_print import toc_pages
+from pyramid_oereb.contrib.print_proxy.mapfish_print.toc_pages import get_statistics, record_prediction
+
+
+def test_statistics():
+    with patch.object(toc_pages, '_statistics', {'predictions': 0, 'mispredictions': 0}):
+        assert get_statistics()['misprediction_rate'] == 0.0
+        record_prediction(1, 1)
+        record_prediction(1, 2)
+        assert get_statistics() == {'predictions': 2, 'mispredictions': 1, 'misprediction_rate': 0.5}
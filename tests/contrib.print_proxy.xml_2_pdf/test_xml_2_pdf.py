@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import email
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from pyramid_oereb import Config
+from pyramid_oereb.contrib.print_proxy.xml_2_pdf.xml_2_pdf import Renderer
+
+
+def get_parts(request):
+    body = request.body.read() if hasattr(request.body, 'read') else request.body
+    message = email.message_from_bytes(
+        'Content-Type: {0}\r\n\r\n'.format(request.headers['Content-Type']).encode('ascii') + body
+    )
+    return {
+        part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+        for part in message.get_payload()
+    }
+
+
+@pytest.mark.parametrize('data_extract', [
+    BytesIO(u'<extract>ä</extract>'.encode('utf-8')),
+    u'<extract>ä</extract>'.encode('utf-8')
+])
+@patch.object(Config, '_config', {})
+@responses.activate
+def test_request_pdf(data_extract):
+    received = []
+
+    def callback(request):
+        received.append((request.headers, get_parts(request)))
+        return 200, {'Content-Type': 'application/pdf'}, b'%PDF'
+
+    responses.add_callback(responses.POST, 'http://print.example.com/', callback=callback)
+    result = Renderer.request_pdf(
+        'http://print.example.com/',
+        data_extract,
+        {'token': 'secret'},
+        {'validate': 'false', 'language': 'de'},
+        True
+    )
+    assert result.content == b'%PDF'
+    headers, parts = received[0]
+    assert headers['token'] == 'secret'
+    assert parts == {
+        'validate': b'false',
+        'language': b'de',
+        'file': u'<extract>ä</extract>'.encode('utf-8')
+    }
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
+import copy
+import time
 import pytest
+from unittest.mock import patch
 from pyramid.path import DottedNameResolver
 from shapely.geometry import MultiPolygon, Polygon
 
 from pyramid_oereb.core.records.extract import ExtractRecord
-from pyramid_oereb.core.records.plr import PlrRecord
+from pyramid_oereb.core.records.plr import EmptyPlrRecord, PlrRecord
 from pyramid_oereb.core.records.real_estate import RealEstateRecord
 from pyramid_oereb.core.records.view_service import ViewServiceRecord
 from pyramid_oereb.core.records.municipality import MunicipalityRecord
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.readers import extract as extract_module
 from tests.mockrequest import MockParameter
 
 
@@ -72,3 +77,84 @@ def test_read(main_schema, land_use_plans, contaminated_sites, plr_sources, plr_
     assert isinstance(plrs[0], PlrRecord)
     assert plrs[3].theme.code == 'ch.BelasteteStandorte'
     assert plrs[3].law_status.code == 'inForce'
+
+
+@pytest.mark.run(order=2)
+def test_read_parallel(main_schema, land_use_plans, contaminated_sites, plr_sources, plr_cadastre_authority,
+                       real_estate, municipality):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    del main_schema, land_use_plans, contaminated_sites
+
+    reader = ExtractReader([s.copy_for_request() for s in plr_sources], plr_cadastre_authority)
+    expected = reader.read(MockParameter(), copy.deepcopy(real_estate), municipality)
+
+    # the test database session is shared, so the pool must not use more than one thread at once
+    parallel_read = {'enabled': True, 'max_workers': 1}
+    with patch.dict(Config.get('extract'), {'parallel_read': parallel_read}), \
+            patch.object(extract_module, '_executor', None):
+        reader = ExtractReader([s.copy_for_request() for s in plr_sources], plr_cadastre_authority)
+    extract = reader.read(MockParameter(), copy.deepcopy(real_estate), municipality)
+
+    def summary(result):
+        return [
+            (plr.theme.code, getattr(plr, 'law_status', None) and plr.law_status.code)
+            for plr in result.real_estate.public_law_restrictions
+        ]
+
+    assert summary(extract) == summary(expected)
+    assert [t.code for t in extract.concerned_theme] == [t.code for t in expected.concerned_theme]
+
+
+class DummyPlrSource(object):
+
+    def __init__(self, code, delay=0.0):
+        self.info = {'code': code}
+        self.delay = delay
+        self.records = []
+
+    def read(self, params, real_estate, bbox):
+        time.sleep(self.delay)
+        self.records = [self.info['code']]
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_read_plr_sources_keeps_order(enabled):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    sources = [DummyPlrSource('a', 0.05), DummyPlrSource('b', 0.0), DummyPlrSource('c', 0.02)]
+    with patch.object(Config, 'get_law_status_codes', return_value=[]), \
+            patch.object(Config, 'get', return_value={'parallel_read': {'enabled': enabled}}):
+        reader = ExtractReader(sources, None)
+    assert reader.read_plr_sources(MockParameter(), None, None) == [['a'], ['b'], ['c']]
+
+
+def test_read_plr_sources_timeout():
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    sources = [DummyPlrSource('a', 0.5), DummyPlrSource('b')]
+    parallel_read = {'enabled': True, 'timeout': 0.1}
+    with patch.object(Config, 'get_law_status_codes', return_value=[]), \
+            patch.object(Config, 'get', return_value={'parallel_read': parallel_read}):
+        reader = ExtractReader(sources, None)
+    with patch.object(Config, 'get_theme_by_code_sub_code', side_effect=lambda code: code):
+        records = reader.read_plr_sources(MockParameter(), None, None)
+    # the theme which was not read in time is delivered without data
+    assert isinstance(records[0][0], EmptyPlrRecord)
+    assert records[0][0].theme == 'a'
+    assert records[0][0].has_data is False
+    assert records[1] == ['b']
+
+
+def test_get_executor():
+    from pyramid_oereb.core.readers.extract import ExtractReader, get_executor
+
+    with patch.object(extract_module, '_executor', None), \
+            patch.object(Config, 'get_law_status_codes', return_value=[]), \
+            patch.object(Config, 'get', return_value={'parallel_read': {'enabled': True, 'max_workers': 2}}):
+        executor = get_executor()
+        assert executor._max_workers == 2
+        assert get_executor() is executor
+        # the readers of all processors use the same pool
+        assert ExtractReader([], None)._executor_ is executor
+        assert ExtractReader([], None)._executor_ is executor
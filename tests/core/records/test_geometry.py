@@ -4,6 +4,7 @@ import datetime
 from datetime import date, timedelta
 import math
 import os
+import timeit
 
 from shapely.geometry import Polygon, MultiPolygon, LineString, Point, \
     MultiPoint, MultiLineString, GeometryCollection
@@ -11,7 +12,7 @@ import shapely.wkt
 
 import pytest
 
-from pyramid_oereb.core.records.geometry import GeometryRecord
+from pyramid_oereb.core.records.geometry import GeometryRecord, MeasuredGeometryRecord, PreparedLimit
 from pyramid_oereb.core.records.law_status import LawStatusRecord
 from pyramid_oereb.core.records.real_estate import RealEstateRecord
 
@@ -366,3 +367,125 @@ def test_published(published_from, published_until, published):
         'test'
     )
     assert geometry_record.published == published
+
+
+def test_prepared_limit():
+    limit = Polygon(((0, 0), (0, 10), (10, 10), (10, 0)))
+    prepared_limit = PreparedLimit(limit)
+    assert prepared_limit.get()[0] is limit
+    buffered, prepared = prepared_limit.get(1)
+    assert buffered.area > limit.area
+    assert prepared_limit.get(1)[0] is buffered
+    assert prepared_limit.get(1)[1] is prepared
+
+
+def get_grid(count, size, offset=0):
+    # squares, lines and points across a real estate of 100 x 100 reaching from 0 to 100
+    geometries = []
+    for i in range(count):
+        x = offset + (i % 50) * 2.5 - 10
+        y = offset + (i // 50) * 2.5 - 10
+        geometries.append(Polygon(((x, y), (x, y + size), (x + size, y + size), (x + size, y))))
+        geometries.append(LineString(((x, y), (x + size, y + size))))
+        geometries.append(Point(x, y))
+    return geometries
+
+
+def get_real_estate(limit):
+    return RealEstateRecord('Liegenschaft', 'BL', 'Aesch BL', 2761, round(limit.area), limit)
+
+
+def get_geometry_record(geom):
+    law_status_record = LawStatusRecord("AenderungMitVorwirkung", {u'de': u'BlaBla'})
+    return GeometryRecord(law_status_record, datetime.date(1985, 8, 29), None, geom, 'test')
+
+
+@pytest.mark.parametrize('tolerance', [None, 0.5])
+def test_calculate_prepared_limit(geometry_types, tolerance):
+    limit = MultiPolygon([Polygon(((0, 0), (0, 100), (100, 100), (100, 0)))])
+    real_estate = get_real_estate(limit)
+    prepared_limit = PreparedLimit(limit)
+    re_limit = limit if tolerance is None else limit.buffer(tolerance)
+    for geom in get_grid(2000, 2):
+        record = get_geometry_record(geom)
+        passed = record.calculate(real_estate, 0.1, 0.1, 'm', 'm2', geometry_types, tolerance, prepared_limit)
+        intersection = geom.intersection(re_limit)
+        if geom.type == 'Polygon':
+            expected = intersection.area if intersection.area >= 0.1 else None
+            assert record._area_share == pytest.approx(expected)
+        elif geom.type == 'LineString':
+            expected = intersection.length if intersection.length >= 0.1 else None
+            assert record._length_share == pytest.approx(expected)
+        else:
+            expected = None if intersection.is_empty else 1
+            assert record._nr_of_points == expected
+        assert passed == (expected is not None)
+
+
+@pytest.mark.benchmark
+def test_calculate_benchmark(geometry_types):
+    # A large real estate crossing thousands of small geometries, e.g. noise sensitivity areas
+    limit = Polygon([(math.cos(a / 100.0) * 100 + 50, math.sin(a / 100.0) * 100 + 50) for a in range(629)])
+    real_estate = get_real_estate(limit)
+    geometries = [geom for geom in get_grid(2500, 2) if geom.type == 'Polygon']
+    tolerance = 0.5
+
+    def per_geometry():
+        for geom in geometries:
+            geom.intersection(limit.buffer(tolerance))
+
+    def prepared():
+        prepared_limit = PreparedLimit(limit)
+        for geom in geometries:
+            get_geometry_record(geom).calculate(
+                real_estate, 0.1, 0.1, 'm', 'm2', geometry_types, tolerance, prepared_limit
+            )
+
+    per_geometry_duration = timeit.timeit(per_geometry, number=1)
+    prepared_duration = timeit.timeit(prepared, number=1)
+    print('Tolerance check of {} geometries: per geometry {:.3f} s, prepared {:.3f} s'.format(
+        len(geometries),
+        per_geometry_duration,
+        prepared_duration
+    ))
+
+
+@pytest.mark.parametrize('tolerance', [None, 0.5])
+def test_calculate_measured(geometry_types, tolerance):
+    # The measurement of the database is simulated with Shapely
+    limit = MultiPolygon([Polygon(((0, 0), (0, 100), (100, 100), (100, 0)))])
+    real_estate = get_real_estate(limit)
+    re_limit = limit if tolerance is None else limit.buffer(tolerance, 16)
+    law_status_record = LawStatusRecord("AenderungMitVorwirkung", {u'de': u'BlaBla'})
+    for geom in get_grid(500, 2):
+        record = get_geometry_record(geom)
+        record.calculate(real_estate, 0.1, 0.1, 'm', 'm2', geometry_types, tolerance)
+        # like ST_CollectionExtract, only the parts with the dimension of the geometry are measured
+        intersection = geom.intersection(re_limit)
+        parts = [part for part in getattr(intersection, 'geoms', [intersection])
+                 if not part.is_empty and GeometryRecord.geom_dim(part) == record.dim]
+        measured = MeasuredGeometryRecord(
+            law_status_record, datetime.date(1985, 8, 29), None, type(geom)(), 'test',
+            dimension=record.dim,
+            area=sum(part.area for part in parts),
+            length=sum(part.length for part in parts),
+            nr_of_points=len(parts)
+        )
+        passed = measured.calculate(real_estate, 0.1, 0.1, 'm', 'm2', geometry_types)
+        assert measured.calculated
+        assert passed == record._test_passed
+        assert measured._area_share == pytest.approx(record._area_share)
+        assert measured._length_share == pytest.approx(record._length_share)
+        assert measured._nr_of_points == record._nr_of_points
+        assert measured._units == record._units
+
+
+def test_calculate_measured_not_published(geometry_types):
+    law_status_record = LawStatusRecord("AenderungMitVorwirkung", {u'de': u'BlaBla'})
+    limit = Polygon(((0, 0), (0, 10), (10, 10), (10, 0)))
+    measured = MeasuredGeometryRecord(
+        law_status_record, date.today() + timedelta(days=1), None, Polygon(), 'test',
+        dimension=2, area=100.0, length=40.0, nr_of_points=1
+    )
+    assert not measured.calculate(get_real_estate(limit), 0.1, 0.1, 'm', 'm2', geometry_types)
+    assert measured._area_share is None
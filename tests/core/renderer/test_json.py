@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import datetime
+import json
 
 import pytest
 from unittest.mock import patch
@@ -544,3 +545,21 @@ def test_format_legend_entry(DummyRenderInfo, parameter):
         })
     assert isinstance(result, dict)
     assert result == expected
+
+
+@patch.object(Config, '_config', {'default_language': 'de'})
+def test_call_streams_extract(DummyRenderInfo, params):
+    extract_dict = {
+        'ExtractIdentifier': 'ä-1',
+        'RealEstate': {'RestrictionOnLandownership': [{'AreaShare': 1.5, 'Geometry': []}]}
+    }
+    renderer = Renderer(DummyRenderInfo())
+    with patch.object(Renderer, '_render', return_value=extract_dict):
+        chunks = renderer((None, params), {'request': MockRequest()})
+        body = b''.join(chunks)
+    assert body == json.dumps({
+        '$schema': 'https://raw.githubusercontent.com/openoereb/schemas/ea4fe8e696b84b923cb9aa9fb27c3ba4e2d8eb5b/extract.json',  # noqa: E501
+        u'GetExtractByIdResponse': {
+            u'extract': extract_dict
+        }
+    }).encode('utf-8')
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import base64
+import email
+import json
+import timeit
+import tracemalloc
+from io import BytesIO
+
+import pytest
+import requests
+from mako.runtime import Context
+from mako.template import Template
+
+from pyramid_oereb.core.renderer.streaming import MultipartBody, SpooledOutput, iter_chunks, iter_file, \
+    iterencode_json
+
+
+@pytest.mark.parametrize('value', [
+    {},
+    [],
+    {'a': {}, 'b': [], 'c': [{}], 'd': ({'x': (1, 2)},)},
+    {'Text': u'Rechtskräftig – "quoted" \\ \n', 'Value': 1.5, 'Flag': True, 'None': None},
+    {1: 'integer key', None: 'null key', 'text': 'text key'},
+    {'a': {'b': {'c': {'d': {'e': {'f': {'g': [1, [2, [3]]]}}}}}}},
+    [float('nan'), float('inf'), 10 ** 20, -0.0],
+    'text',
+    None
+])
+@pytest.mark.parametrize('depth', [0, 1, 5, 10])
+def test_iterencode_json(value, depth):
+    assert ''.join(iterencode_json(value, depth)) == json.dumps(value)
+
+
+def test_iter_chunks():
+    assert list(iter_chunks([])) == []
+    assert list(iter_chunks(['ab', 'cd', 'e'], chunk_size=3)) == [b'abcd', b'e']
+    assert list(iter_chunks(['ä'], chunk_size=3)) == [u'ä'.encode('utf-8')]
+
+
+def get_large_extract(plr_count, vertex_count):
+    symbol = base64.b64encode(bytes(range(256)) * 40).decode('ascii')
+    coordinates = [[[2600000.0 + i * 0.5, 1200000.0 + (i % 7) * 0.25] for i in range(vertex_count)]]
+    plrs = [{
+        'LegendText': [{'Language': 'de', 'Text': 'Wohnzone {0}'.format(i)}],
+        'Symbol': symbol,
+        'Geometry': [{'Surface': {'type': 'Polygon', 'coordinates': coordinates}}],
+        'AreaShare': i
+    } for i in range(plr_count)]
+    return {
+        '$schema': 'https://raw.githubusercontent.com/openoereb/schemas/extract.json',
+        'GetExtractByIdResponse': {
+            'extract': {
+                'RealEstate': {'EGRID': 'CH113928077734', 'RestrictionOnLandownership': plrs},
+                'QRCode': symbol
+            }
+        }
+    }
+
+
+@pytest.mark.benchmark
+def test_streaming_benchmark():
+    # An extract with geometries and images of several megabytes
+    result = get_large_extract(100, 2000)
+
+    def eager():
+        # what the response did with the returned text
+        return json.dumps(result).encode('utf-8')
+
+    def streaming():
+        return iter_chunks(iterencode_json(result))
+
+    def first_byte(get_body):
+        body = get_body()
+        return body if isinstance(body, bytes) else next(body)
+
+    def peak_memory(consume):
+        tracemalloc.start()
+        try:
+            consume()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    expected = eager()
+    assert b''.join(streaming()) == expected
+
+    number = 2
+    eager_first_byte = timeit.timeit(lambda: first_byte(eager), number=number) / number
+    streaming_first_byte = timeit.timeit(lambda: first_byte(streaming), number=number) / number
+    eager_total = timeit.timeit(eager, number=number) / number
+    streaming_total = timeit.timeit(lambda: sum(len(chunk) for chunk in streaming()), number=number) / number
+    eager_peak = peak_memory(eager)
+    streaming_peak = peak_memory(lambda: [len(chunk) for chunk in streaming()])
+    print(
+        'JSON extract of {0:.1f} MB: first byte eager {1:.1f} ms, streaming {2:.1f} ms; '
+        'total eager {3:.1f} ms, streaming {4:.1f} ms; peak memory eager {5:.1f} MB, streaming {6:.1f} MB'
+        .format(
+            len(expected) / 1e6,
+            eager_first_byte * 1000,
+            streaming_first_byte * 1000,
+            eager_total * 1000,
+            streaming_total * 1000,
+            eager_peak / 1e6,
+            streaming_peak / 1e6
+        )
+    )
+    assert streaming_peak < eager_peak / 4
+
+
+def test_spooled_output():
+    template = Template(
+        u'<a>\n% for i in items:\n<b>${i}</b>\n% endfor\n</a>',
+        output_encoding='utf-8'
+    )
+    items = [u'ä{0}'.format(i) for i in range(5000)]
+    output = SpooledOutput(max_size=1024, chunk_size=100)
+    template.render_context(Context(output, items=items))
+    output_file = output.get_file()
+    # the output was written to disk
+    assert output_file._rolled
+    assert b''.join(iter_file(output_file, chunk_size=1000)) == template.render(items=items)
+    assert output_file.closed
+
+
+def test_iter_file_closes_on_stop():
+    output_file = BytesIO(b'a' * 100)
+    chunks = iter_file(output_file, chunk_size=10)
+    assert next(chunks) == b'a' * 10
+    chunks.close()
+    assert output_file.closed
+
+
+def parse_multipart(content_type, body):
+    message = email.message_from_bytes(
+        'Content-Type: {0}\r\n\r\n'.format(content_type).encode('ascii') + body
+    )
+    return [(part.get_param('name', header='content-disposition'), part.get_filename(),
+             part.get_content_type(), part.get_payload(decode=True)) for part in message.get_payload()]
+
+
+@pytest.mark.parametrize('read_size', [-1, 1, 7, 8192])
+def test_multipart_body(read_size):
+    content = u'<extract>ä</extract>'.encode('utf-8') * 1000
+    fields = {'validate': 'false', 'language': 'de'}
+    body = MultipartBody(fields, 'file', 'xml', BytesIO(content), 'text/xml')
+    length = len(body)
+    chunks = []
+    chunk = body.read(read_size)
+    while chunk:
+        chunks.append(chunk)
+        chunk = body.read(read_size)
+    data = b''.join(chunks)
+    assert len(data) == length
+    # same parts as encoded by requests
+    expected = requests.Request('POST', 'http://example.com', data=fields, files={
+        'file': ('xml', content, 'text/xml')
+    }).prepare()
+    assert parse_multipart(body.get_content_type(), data) == \
+        parse_multipart(expected.headers['Content-Type'], expected.body)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+from unittest.mock import patch
+
+import mako.template
+
+from pyramid_oereb import Config
+from pyramid_oereb.core.renderer import template_lookup
+from pyramid_oereb.core.renderer.extract.xml_ import Renderer
+from pyramid_oereb.core.renderer.template_lookup import TEMPLATE_DIRS, get_lookup, get_template, \
+    get_template_dirs, preload_templates
+from pyramid_oereb.core.renderer.versions.xml_ import Renderer as VersionsRenderer
+
+versions = {
+    u'GetVersionsResponse': {
+        u'supportedVersion': [{u'version': u'1.0', u'serviceEndpointBase': u'https://example.com'}]
+    }
+}
+
+
+def count_compilations():
+    return patch.object(mako.template, '_compile', wraps=mako.template._compile)
+
+
+@patch.object(template_lookup, '_lookups', {})
+@patch.object(Config, '_config', {'default_language': 'de'})
+def test_no_compilation_after_preload(DummyRenderInfo):
+    with count_compilations() as compile_template:
+        preload_templates()
+        assert compile_template.call_count > len(TEMPLATE_DIRS)
+    with count_compilations() as compile_template:
+        for renderer in TEMPLATE_DIRS:
+            get_template(get_template_dirs(renderer), '{0}.xml'.format(renderer))
+        # the includes are looked up with absolute uris
+        get_template(get_template_dirs('extract'), '/geometry/polygon.xml')
+        assert b'https://example.com' in VersionsRenderer(DummyRenderInfo())._render(versions)
+        assert compile_template.call_count == 0
+
+
+@patch.object(template_lookup, '_lookups', {})
+@patch.object(Config, '_config', {'default_language': 'de'})
+def test_shared_lookup(DummyRenderInfo):
+    renderer_1 = Renderer(DummyRenderInfo())
+    renderer_2 = Renderer(DummyRenderInfo())
+    assert get_lookup(renderer_1.template_dirs) is get_lookup(renderer_2.template_dirs)
+    assert get_lookup(get_template_dirs('getegrid')) is not get_lookup(renderer_1.template_dirs)
+
+
+def test_module_directory(tmp_path, DummyRenderInfo):
+    config = {'default_language': 'de', 'template_module_directory': str(tmp_path)}
+    with patch.object(Config, '_config', config), patch.object(template_lookup, '_lookups', {}):
+        preload_templates()
+    compiled = [file_name for root, dirs, files in os.walk(str(tmp_path)) for file_name in files]
+    assert 'extract.xml.py' in compiled
+    assert len(set(os.listdir(str(tmp_path)))) == len(TEMPLATE_DIRS)
+    # after a restart the compiled modules are loaded
+    with patch.object(Config, '_config', config), patch.object(template_lookup, '_lookups', {}):
+        with count_compilations() as compile_template:
+            preload_templates()
+            assert b'https://example.com' in VersionsRenderer(DummyRenderInfo())._render(versions)
+            assert compile_template.call_count == 0
@@ -4,8 +4,10 @@ import pytest
 from io import BytesIO
 from lxml import etree
 
+from pyramid import testing
 from pyramid.path import DottedNameResolver
 from shapely.geometry import MultiPolygon, Polygon
+from pyramid_oereb.core.bulk_extract import BulkExtract
 from pyramid_oereb.core.records.disclaimer import DisclaimerRecord
 from pyramid_oereb.core.records.extract import ExtractRecord
 from pyramid_oereb.core.records.glossary import GlossaryRecord
@@ -14,6 +16,7 @@ from pyramid_oereb.core.records.real_estate import RealEstateRecord
 from pyramid_oereb.core.records.view_service import ViewServiceRecord
 
 from pyramid_oereb.core.renderer.extract.xml_ import Renderer
+from pyramid_oereb.core.renderer.streaming import iter_file
 from pyramid_oereb.core.renderer.versions.xml_ import Renderer as VersionsRenderer
 from pyramid_oereb.core.views.webservice import Parameter
 from tests.mockrequest import MockRequest
@@ -108,6 +111,7 @@ def test_extract_against_schema(real_estate_test_data, logo_test_data, schema_xm
     renderer._request = MockRequest()
     renderer._request.route_url = lambda url, **kwargs: "http://example.com/current/view"
     rendered = renderer._render(extract, parameter)
+    assert b''.join(iter_file(renderer._stream(extract, parameter))) == rendered
 
     # TODO: fix schema validiation -- slown and cannot resolve online resources
     # xmlschema_doc = etree.parse(schema_xml_extract)
@@ -116,3 +120,18 @@ def test_extract_against_schema(real_estate_test_data, logo_test_data, schema_xm
     assert buffer.seek(0, 2) == buf_len  # temporary check assert buffer length == 4775
     # doc = etree.parse(buffer)
     # xmlschema.assertValid(doc)
+
+
+def test_bulk_extract_write(real_estate_test_data, logo_test_data, DummyRenderInfo, tmpdir):
+    from pyramid_oereb.core.config import Config
+    extract = _get_test_extract(Config, [])
+    parameter = Parameter('reduced', 'xml', False, False, 'BL0200002829', '1000', 'CH775979211712', 'de')
+    request = MockRequest()
+    request.route_url = lambda url, **kwargs: "http://example.com/current/view"
+    renderer = Renderer(DummyRenderInfo())
+    renderer._request = request
+    with testing.testConfig() as config:
+        config.add_renderer('pyramid_oereb_extract_xml', 'pyramid_oereb.core.renderer.extract.xml_.Renderer')
+        path = BulkExtract(request, str(tmpdir), response_format='xml').write(extract, parameter)
+    with open(path, 'rb') as f:
+        assert f.read() == renderer._render(extract, parameter)
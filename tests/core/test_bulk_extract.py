@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+from unittest.mock import MagicMock, patch
+from mako.template import Template
+from pyramid import testing
+from shapely.geometry import box
+
+from pyramid_oereb.core.bulk_extract import BulkExtract, group_real_estates, morton_code
+from pyramid_oereb.core.records.real_estate import RealEstateRecord
+from pyramid_oereb.core.renderer.extract.json_ import Renderer as JsonRenderer
+from pyramid_oereb.core.views.webservice import Parameter
+from tests.mockrequest import MockRequest
+
+
+def real_estate(egrid, x, y):
+    return RealEstateRecord('test_type', 'BL', 'Liestal', 1234, 100, box(x, y, x + 1, y + 1), egrid=egrid)
+
+
+@pytest.fixture
+def real_estates():
+    yield [
+        real_estate('FAR_1', 1000, 1000),
+        real_estate('NEAR_1', 0, 0),
+        real_estate('FAR_2', 1001, 1001),
+        real_estate('NEAR_2', 1, 1)
+    ]
+
+
+def test_morton_code():
+    assert morton_code(0, 0) == 0
+    assert morton_code(1, 0) == 1
+    assert morton_code(0, 1) == 2
+    assert morton_code(1, 1) == 3
+    assert morton_code(2, 0) == 4
+
+
+def test_group_real_estates(real_estates):
+    groups = group_real_estates(real_estates, 2)
+    assert [[record.egrid for record in group] for group in groups] == [
+        ['NEAR_1', 'NEAR_2'],
+        ['FAR_1', 'FAR_2']
+    ]
+    assert group_real_estates(real_estates[:1], 2) == [real_estates[:1]]
+    assert group_real_estates([], 2) == []
+
+
+def test_invalid_format(tmpdir):
+    with pytest.raises(ValueError):
+        BulkExtract(MockRequest(), str(tmpdir), response_format='pdf')
+
+
+@pytest.mark.parametrize('render_content', [
+    lambda text: text.encode('utf-8'),
+    lambda text: text,
+    # the streamed content of the extract renderers
+    lambda text: (text[i:i + 4].encode('utf-8') for i in range(0, len(text), 4)),
+    lambda text: iter([text])
+])
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: 'http://example.com')
+def test_run(tmpdir, real_estates, render_content):
+    records = dict([(record.egrid, record) for record in real_estates])
+    processor = MagicMock()
+    processor.real_estate_reader.read.side_effect = \
+        lambda params, egrid: [records[egrid]] if egrid in records else []
+    plr_source = MagicMock()
+    processor.plr_sources = [plr_source]
+    processor.copy_for_request.return_value.process.side_effect = \
+        lambda record, params, sld_url: record.egrid
+    output_path = os.path.join(str(tmpdir), 'extracts')
+    with patch('pyramid_oereb.core.bulk_extract.create_processor', return_value=processor), \
+            patch('pyramid_oereb.core.bulk_extract.render',
+                  side_effect=lambda renderer, value, request:
+                  render_content(u'{"extract": "%s ä"}' % value[0])):
+        bulk_extract = BulkExtract(MockRequest(), output_path, group_size=2, language='de')
+        statistics = bulk_extract.run(['NEAR_1', 'FAR_1', 'MISSING', 'NEAR_2', 'FAR_2'])
+    assert statistics['requested'] == 5
+    assert statistics['written'] == 4
+    assert statistics['failed'] == 0
+    assert statistics['extracts_per_second'] > 0
+    assert [
+        sorted([record.egrid for record in call.args[0]]) for call in plr_source.prefetch.call_args_list
+    ] == [['NEAR_1', 'NEAR_2'], ['FAR_1', 'FAR_2']]
+    assert sorted(os.listdir(output_path)) == ['FAR_1.json', 'FAR_2.json', 'NEAR_1.json', 'NEAR_2.json']
+    with open(os.path.join(output_path, 'NEAR_1.json'), 'rb') as f:
+        assert f.read().decode('utf-8') == u'{"extract": "NEAR_1 ä"}'
+    params = bulk_extract.get_params('NEAR_1')
+    assert params.egrid == 'NEAR_1'
+    assert params.language == 'de'
+    assert params.format == 'json'
+
+
+@pytest.fixture
+def extract_renderers():
+    with testing.testConfig() as config, \
+            patch('pyramid_oereb.core.config.Config._config', {'default_language': 'de'}):
+        for response_format in BulkExtract.FORMATS:
+            config.add_renderer(
+                'pyramid_oereb_extract_{0}'.format(response_format),
+                'pyramid_oereb.core.renderer.extract.{0}_.Renderer'.format(response_format)
+            )
+        yield config
+
+
+def test_write_json(tmpdir, extract_renderers):
+    params = Parameter('json')
+    params.set_egrid('CH113928077734')
+    with patch.object(JsonRenderer, '_render', return_value={u'RealEstate': {u'Municipality': u'Zürich'}}):
+        path = BulkExtract(MockRequest(), str(tmpdir)).write(MagicMock(), params)
+    assert path == os.path.join(str(tmpdir), 'CH113928077734.json')
+    with open(path, 'rb') as f:
+        assert json.loads(f.read().decode('utf-8'))[u'GetExtractByIdResponse'] == {
+            u'extract': {u'RealEstate': {u'Municipality': u'Zürich'}}
+        }
+
+
+def test_write_xml(tmpdir, extract_renderers):
+    params = Parameter('xml')
+    params.set_egrid('CH113928077734')
+    template = Template(
+        u'<extract egrid="${params.egrid}">\n% for i in range(5000):\n<item>Zürich ${i}</item>\n% endfor\n'
+        u'</extract>',
+        output_encoding='utf-8'
+    )
+    with patch('pyramid_oereb.core.renderer.extract.xml_.get_template', return_value=template):
+        path = BulkExtract(MockRequest(), str(tmpdir), response_format='xml').write(MagicMock(), params)
+    assert path == os.path.join(str(tmpdir), 'CH113928077734.xml')
+    with open(path, 'rb') as f:
+        assert f.read() == template.render(params=params)
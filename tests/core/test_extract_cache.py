@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+from pyramid.response import Response
+
+from pyramid_oereb.core import extract_cache as extract_cache_module
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.extract_cache import ExtractCache, FileBackend, MemoryBackend, get_extract_cache
+from pyramid_oereb.core.records.extract import ExtractRecord
+from pyramid_oereb.core.records.theme import ThemeRecord
+from pyramid_oereb.core.views.webservice import Parameter
+
+
+class MockRealEstate(object):
+    def __init__(self, fosnr):
+        self.fosnr = fosnr
+
+
+def get_extract(fosnr=2829, concerned=('ch.Nutzungsplanung',), not_concerned=('ch.BelasteteStandorte',)):
+    extract = ExtractRecord.__new__(ExtractRecord)
+    extract.real_estate = MockRealEstate(fosnr)
+    extract.concerned_theme = [ThemeRecord(code, {'de': code}, 10) for code in concerned]
+    extract.not_concerned_theme = [ThemeRecord(code, {'de': code}, 20) for code in not_concerned]
+    extract.theme_without_data = []
+    return extract
+
+
+def get_params(egrid, response_format='json', **kwargs):
+    params = Parameter(response_format, extract_url='http://example.com/extract', **kwargs)
+    params.set_egrid(egrid)
+    return params
+
+
+def get_response(body):
+    return Response(body=body, content_type='application/json', charset='UTF-8')
+
+
+def set_response(cache, params, extract, response):
+    cache.set_response(params, extract, response)
+    # the response is cached once it was sent
+    return b''.join(response.app_iter)
+
+
+@pytest.fixture(params=['memory', 'file'])
+def backend(request, tmpdir):
+    if request.param == 'memory':
+        return MemoryBackend(max_entries=2)
+    return FileBackend(str(tmpdir.join('cache')), max_entries=2, eviction_ratio=1.0)
+
+
+def test_get_key():
+    params = get_params('CH1', with_geometry=True)
+    assert ExtractCache.get_key(params) == ExtractCache.get_key(get_params('CH1', with_geometry=True))
+    assert ExtractCache.get_key(params) != ExtractCache.get_key(get_params('CH1'))
+    assert ExtractCache.get_key(params) != ExtractCache.get_key(get_params('CH2', with_geometry=True))
+    assert ExtractCache.get_key(params) != ExtractCache.get_key(get_params('CH1', 'xml', with_geometry=True))
+    other_language = get_params('CH1', with_geometry=True)
+    other_language.set_language('fr')
+    assert ExtractCache.get_key(params) != ExtractCache.get_key(other_language)
+    other_topics = get_params('CH1', with_geometry=True)
+    other_topics.set_topics(['ch.Nutzungsplanung'])
+    assert ExtractCache.get_key(params) != ExtractCache.get_key(other_topics)
+
+
+def test_get_set_response(backend):
+    cache = ExtractCache(backend)
+    params = get_params('CH1')
+    assert cache.get_response(params) is None
+    set_response(cache, params, get_extract(), get_response(b'{"extract": 1}'))
+    response = cache.get_response(params)
+    assert response.body == b'{"extract": 1}'
+    assert response.content_type == 'application/json'
+    assert response.status_int == 200
+    assert cache.get_statistics() == {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1}
+
+
+def test_set_streamed_response(backend):
+    cache = ExtractCache(backend)
+    params = get_params('CH1')
+    closed = []
+
+    class AppIter(object):
+        def __iter__(self):
+            yield b'{"extract": '
+            yield b'1}'
+
+        def close(self):
+            closed.append(True)
+
+    response = Response(app_iter=AppIter(), content_type='application/json', charset='UTF-8')
+    cache.set_response(params, get_extract(), response)
+    chunks = iter(response.app_iter)
+    assert next(chunks) == b'{"extract": '
+    # nothing is cached before the response was sent completely
+    assert cache.get_response(params) is None
+    assert list(chunks) == [b'1}']
+    response.app_iter.close()
+    assert closed == [True]
+    assert cache.get_response(params).body == b'{"extract": 1}'
+
+
+def test_aborted_response_is_not_cached(backend):
+    cache = ExtractCache(backend)
+    params = get_params('CH1')
+    response = get_response(b'{"extract": 1}')
+    cache.set_response(params, get_extract(), response)
+    assert response.content_length == 14
+    chunks = iter(response.app_iter)
+    next(chunks)
+    response.app_iter.close()
+    assert cache.get_response(params) is None
+
+
+def test_only_successful_responses_are_cached(backend):
+    cache = ExtractCache(backend)
+    params = get_params('CH1')
+    set_response(cache, params, get_extract(), Response(body=b'error', status=500))
+    assert cache.get_response(params) is None
+
+
+def test_lru_eviction(backend):
+    cache = ExtractCache(backend)
+    for egrid in ['CH1', 'CH2']:
+        set_response(cache, get_params(egrid), get_extract(), get_response(egrid.encode('utf-8')))
+    # CH1 is used recently, CH2 gets evicted
+    assert cache.get_response(get_params('CH1')) is not None
+    if isinstance(backend, FileBackend):
+        # make sure the modification times differ on coarse file systems
+        os.utime(backend._get_file(cache.get_key(get_params('CH2'))), (0, 0))
+    set_response(cache, get_params('CH3'), get_extract(), get_response(b'CH3'))
+    assert cache.get_response(get_params('CH2')) is None
+    assert cache.get_response(get_params('CH1')) is not None
+    assert cache.get_response(get_params('CH3')) is not None
+    assert cache.get_statistics()['evictions'] == 1
+    assert cache.get_statistics()['entries'] == 2
+
+
+def test_file_backend_evicts_in_batches(tmpdir):
+    backend = FileBackend(str(tmpdir.join('cache')), max_entries=10, eviction_ratio=0.5)
+    with patch.object(backend, '_get_files', wraps=backend._get_files) as get_files:
+        for index in range(11):
+            backend.set(str(index), {'tags': {}})
+            os.utime(backend._get_file(str(index)), (index, index))
+        # the directory is listed only when the entries are exceeded
+        assert get_files.call_count == 1
+        assert backend.evictions == 6
+        assert [backend.get(str(index)) is not None for index in range(11)] == [False] * 6 + [True] * 5
+        for index in range(11, 16):
+            backend.set(str(index), {'tags': {}})
+        assert get_files.call_count == 1
+    assert len(backend) == 10
+
+
+def test_file_backend_body(tmpdir):
+    backend = FileBackend(str(tmpdir.join('cache')))
+    backend.set('CH1', {'tags': {}}, body=io.BytesIO(b'{"extract": 1}'))
+    entry = backend.get('CH1')
+    with entry['body'] as body:
+        assert body.read() == b'{"extract": 1}'
+    # the body is only read from the file when it is delivered
+    assert backend.tags() == [('CH1', {})]
+
+
+def test_ttl(backend):
+    cache = ExtractCache(backend, ttl=60)
+    params = get_params('CH1')
+    with patch('time.time', return_value=1000):
+        set_response(cache, params, get_extract(), get_response(b'CH1'))
+    with patch('time.time', return_value=1059):
+        assert cache.get_response(params) is not None
+    with patch('time.time', return_value=1061):
+        assert cache.get_response(params) is None
+    assert len(backend) == 0
+
+
+def test_add(backend):
+    assert backend.add('lock', {'owner': 1, 'tags': {}})
+    assert not backend.add('lock', {'owner': 2, 'tags': {}})
+    assert backend.get('lock')['owner'] == 1
+    backend.delete('lock')
+    assert backend.add('lock', {'owner': 2, 'tags': {}})
+    assert backend.get('lock')['owner'] == 2
+    assert len(backend) == 1
+
+
+@pytest.mark.parametrize('theme_code,fosnr,remaining', [
+    ('ch.Nutzungsplanung', None, ['CH2']),
+    ('ch.BelasteteStandorte', None, []),
+    ('ch.Laermempfindlichkeitsstufen', None, ['CH1', 'CH2']),
+    (None, 2829, ['CH2']),
+    (None, '2830', ['CH1']),
+    (None, None, [])
+])
+def test_invalidate(backend, theme_code, fosnr, remaining):
+    cache = ExtractCache(backend)
+    set_response(cache, get_params('CH1'), get_extract(fosnr=2829), get_response(b'CH1'))
+    set_response(cache, get_params('CH2'), get_extract(fosnr=2830, concerned=()), get_response(b'CH2'))
+    cache.invalidate(theme_code=theme_code, fosnr=fosnr)
+    for egrid in ['CH1', 'CH2']:
+        assert (cache.get_response(get_params(egrid)) is not None) == (egrid in remaining)
+
+
+def test_get_extract_cache(tmpdir):
+    config = {
+        'extract': {
+            'cache': {
+                'enabled': True,
+                'ttl': 60,
+                'backend': {
+                    'class': 'pyramid_oereb.core.extract_cache.FileBackend',
+                    'params': {
+                        'path': str(tmpdir.join('cache')),
+                        'max_entries': 10
+                    }
+                }
+            }
+        }
+    }
+    with patch.object(extract_cache_module, '_extract_cache', None):
+        with patch.object(Config, '_config', {'extract': {}}):
+            assert get_extract_cache() is None
+        with patch.object(Config, '_config', config):
+            cache = get_extract_cache()
+            assert isinstance(cache._backend_, FileBackend)
+            assert cache._ttl_ == 60
+            assert get_extract_cache() is cache
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 import datetime
 import pytest
-from shapely.geometry import Point
+from shapely.geometry import Point, box
+from sqlalchemy import event
 from unittest.mock import patch
 
+from pyramid_oereb.core.config import Config
 from pyramid_oereb.core.processor import Processor, create_processor
 from pyramid_oereb.core.records.extract import ExtractRecord
 from pyramid_oereb.core.records.geometry import GeometryRecord
@@ -52,6 +54,18 @@ def test_properties(pyramid_oereb_test_config):
     assert isinstance(processor.real_estate_reader, RealEstateReader)
 
 
+def test_create_processor_shares_sources(pyramid_oereb_test_config):
+    processor_1 = create_processor()
+    processor_2 = create_processor()
+    assert processor_1 is not processor_2
+    assert processor_1.extract_reader is not processor_2.extract_reader
+    assert len(processor_1.plr_sources) == len(processor_2.plr_sources)
+    for source_1, source_2 in zip(processor_1.plr_sources, processor_2.plr_sources):
+        assert source_1 is not source_2
+        assert source_1.records is not source_2.records
+        assert source_1.models is source_2.models
+
+
 @patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
 def test_process(processor_data, real_estate_data):
     request = MockRequest()
@@ -82,6 +96,121 @@ def test_process_geometry_testing(processor_data, real_estate_data, land_use_pla
             assert g._test_passed
 
 
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
+def test_plr_source_round_trips(processor_data, real_estate_data, land_use_plans, dbsession):
+    request = MockRequest()
+    request.matchdict.update(request_matchdict)
+    request.params.update(request_params)
+    processor = create_processor()
+    webservice = PlrWebservice(request)
+    params = webservice.__validate_extract_params__()
+    real_estate = processor.real_estate_reader.read(params, egrid=u'TEST')[0]
+    bbox = box(*Config.get_bbox(real_estate.limit))
+    source = next(
+        plr_source for plr_source in processor.plr_sources
+        if plr_source.info.get('code') == 'ch.Nutzungsplanung'
+    )
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(dbsession.bind, 'before_cursor_execute', before_cursor_execute)
+    try:
+        source.copy_for_request().read(params, real_estate, bbox)
+        first_read = list(statements)
+        del statements[:]
+        source.copy_for_request().read(params, real_estate, bbox)
+        second_read = list(statements)
+    finally:
+        event.remove(dbsession.bind, 'before_cursor_execute', before_cursor_execute)
+    log.info('Round trips of the land use plans source: {} on first read, {} on following reads'.format(
+        len(first_read),
+        len(second_read)
+    ))
+
+    for statements_of_read in [first_read, second_read]:
+        assert not [statement for statement in statements_of_read if 'count(' in statement]
+        # legend entries of all law status are fetched with one single query
+        legend_statements = [
+            statement for statement in statements_of_read if 'JOIN (SELECT DISTINCT' in statement
+        ]
+        assert len(legend_statements) == 1
+    # the emptiness of the table is not checked again
+    assert len(second_read) == len(first_read) - 1
+
+
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
+def test_plr_source_prefetch(processor_data, real_estate_data, land_use_plans):
+    request = MockRequest()
+    request.matchdict.update(request_matchdict)
+    request.params.update(request_params)
+    processor = create_processor()
+    webservice = PlrWebservice(request)
+    params = webservice.__validate_extract_params__()
+    real_estates = [
+        processor.real_estate_reader.read(params, egrid=egrid)[0] for egrid in [u'TEST', u'TEST2']
+    ]
+    for source in processor.plr_sources:
+        if not hasattr(source, 'collect_related_geometries_by_limit'):
+            continue
+        session = source.get_session()
+        expected = [
+            sorted([
+                geometry.public_law_restriction_id
+                for geometry in source.collect_related_geometries_by_real_estate(session, real_estate)
+            ])
+            for real_estate in real_estates
+        ]
+        source.prefetch(real_estates)
+        assert [
+            sorted([
+                geometry.public_law_restriction_id
+                for geometry in source.collect_related_geometries_by_real_estate(session, real_estate)
+            ])
+            for real_estate in real_estates
+        ] == expected
+
+
+@pytest.mark.parametrize('with_geometry', [False, True])
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
+def test_measure_in_database_equivalence(processor_data, real_estate_data, land_use_plans, with_geometry):
+    request = MockRequest()
+    request.matchdict.update(request_matchdict)
+    request.params.update(request_params)
+    if with_geometry:
+        request.params.update({'GEOMETRY': 'true'})
+    processor = create_processor()
+    webservice = PlrWebservice(request)
+    params = webservice.__validate_extract_params__()
+    real_estate = processor.real_estate_reader.read(params, egrid=u'TEST')[0]
+    geometry_types = Config.get('geometry_types')
+
+    def measure(source, measure_in_database):
+        source = source.copy_for_request()
+        source._measure_in_database_ = measure_in_database
+        source.read(params, real_estate, real_estate.limit)
+        measured = []
+        for plr in source.records:
+            if isinstance(plr, PlrRecord) and plr.calculate(real_estate, geometry_types):
+                geometries = sorted([g.geom.wkt for g in plr.geometries]) if with_geometry else None
+                measured.append((plr.area_share, plr.length_share, plr.nr_of_points, geometries))
+        return measured
+
+    for source in processor.plr_sources:
+        if not hasattr(source, 'collect_measured_public_law_restrictions'):
+            continue
+        expected = measure(source, False)
+        actual = measure(source, True)
+        assert len(actual) == len(expected)
+        for (area, length, points, geometries), expected_values in zip(actual, expected):
+            assert area == pytest.approx(expected_values[0])
+            assert length == pytest.approx(expected_values[1])
+            assert points == expected_values[2]
+            assert geometries == expected_values[3]
+
+
 @patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
 def test_filter_documents(processor_data, real_estate_data, main_schema, land_use_plans):
     request = MockRequest()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import random
+import timeit
+import tracemalloc
+from collections import namedtuple
+from unittest.mock import patch
+
+import pytest
+from shapely.geometry import MultiPolygon, Point, Polygon, box
+
+from pyramid_oereb.core.real_estate_index import RealEstateIndex
+
+Attributes = namedtuple('Attributes', ['egrid', 'municipality'])
+
+
+def get_entry(egrid, polygon, version='1'):
+    return version, Attributes(egrid, 'Liestal'), MultiPolygon([polygon]).wkb
+
+
+def test_query():
+    index = RealEstateIndex()
+    assert index.query(Point(1, 1)) == []
+    index.update({
+        1: get_entry('CH1', box(0, 0, 2, 2)),
+        # an L-shaped real estate, its bounding box covers (3.5, 1.5)
+        2: get_entry('CH2', Polygon([(2, 0), (4, 0), (4, 1), (3, 1), (3, 2), (2, 2)])),
+        3: get_entry('CH3', box(10, 10, 12, 12))
+    })
+    assert len(index) == 3
+    assert [attributes.egrid for attributes, _ in index.query(Point(1, 1))] == ['CH1']
+    assert [attributes.egrid for attributes, _ in index.query(Point(2, 1).buffer(0.5))] == ['CH1', 'CH2']
+    assert index.query(Point(3.5, 1.5)) == []
+    attributes, limit = index.query(Point(11, 11))[0]
+    assert attributes == Attributes('CH3', 'Liestal')
+    assert limit.equals(MultiPolygon([box(10, 10, 12, 12)]))
+
+
+def test_update():
+    index = RealEstateIndex()
+    index.update({
+        1: get_entry('CH1', box(0, 0, 2, 2)),
+        2: get_entry('CH2', box(2, 0, 4, 2))
+    })
+    index.update({
+        1: get_entry('CH1', box(0, 0, 1, 1), version='2'),
+        3: get_entry('CH3', box(10, 10, 12, 12))
+    }, removed=[2])
+    assert index.get_versions() == {1: '2', 3: '1'}
+    assert index.query(Point(1.5, 1.5)) == []
+    assert index.query(Point(3, 1)) == []
+    assert [attributes.egrid for attributes, _ in index.query(Point(11, 11))] == ['CH3']
+    index.update({}, removed=[1, 3])
+    assert len(index) == 0
+    assert index.query(Point(11, 11)) == []
+
+
+def test_is_outdated():
+    index = RealEstateIndex(refresh_interval=60)
+    assert index.is_outdated()
+    with patch('time.time', return_value=1000.0):
+        index.update({})
+    with patch('time.time', return_value=1060.0):
+        assert not index.is_outdated()
+    with patch('time.time', return_value=1061.0):
+        assert index.is_outdated()
+    index = RealEstateIndex()
+    index.update({})
+    with patch('time.time', return_value=10 ** 10):
+        assert not index.is_outdated()
+
+
+@pytest.mark.benchmark
+def test_query_benchmark():
+    # A cadastre of 20 000 real estates with 20 vertices each, in a grid of 50 m
+    size = 142
+    count = size * size
+    polygon = Point(25, 25).buffer(25, resolution=5)
+
+    def load():
+        index = RealEstateIndex()
+        index.update({
+            i: (
+                'version',
+                Attributes('CH{0:012d}'.format(i), 'Liestal'),
+                MultiPolygon([Polygon([
+                    (x + (i % size) * 50, y + (i // size) * 50) for x, y in polygon.exterior.coords
+                ])]).wkb
+            )
+            for i in range(count)
+        })
+        return index
+
+    tracemalloc.start()
+    try:
+        index = load()
+        # without the bounding boxes of the tree, which are allocated by GEOS
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    random.seed(0)
+    points = [
+        Point(random.uniform(0, size * 50), random.uniform(0, size * 50)).buffer(1.0)
+        for _ in range(2000)
+    ]
+    found = [len(index.query(point)) for point in points]
+    duration = timeit.timeit(lambda: [index.query(point) for point in points], number=1)
+    print(
+        'Real estate index: {0:.0f} lookups per second, {1:.0f} MB per million real estates'.format(
+            len(points) / duration,
+            memory / count
+        )
+    )
+    assert max(found) > 0
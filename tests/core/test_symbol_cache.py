@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from pyramid_oereb.core import symbol_cache as symbol_cache_module
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.symbol_cache import SymbolCache, get_symbol_cache
+
+
+def test_get_set():
+    cache = SymbolCache()
+    assert cache.get('ch.Nutzungsplanung', {'identifier': '1'}) is None
+    symbol = cache.set('ch.Nutzungsplanung', {'identifier': '1'}, b'png', 'image/png')
+    assert cache.get('ch.Nutzungsplanung', {'identifier': '1'}) is symbol
+    assert cache.get('ch.Nutzungsplanung', {'identifier': '2'}) is None
+    assert cache.get('ch.BelasteteStandorte', {'identifier': '1'}) is None
+    assert symbol.body == b'png'
+    assert symbol.mimetype == 'image/png'
+    assert cache.get_statistics() == {'hits': 1, 'misses': 3, 'evictions': 0, 'entries': 1}
+
+
+def test_etag():
+    cache = SymbolCache()
+    etag = cache.set('ch.Nutzungsplanung', {'identifier': '1'}, b'png', 'image/png').etag
+    assert cache.set('ch.Nutzungsplanung', {'identifier': '2'}, b'png', 'image/png').etag == etag
+    assert cache.set('ch.Nutzungsplanung', {'identifier': '1'}, b'svg', 'image/svg+xml').etag != etag
+
+
+def test_parameter_order():
+    cache = SymbolCache()
+    symbol = cache.set('ch.Nutzungsplanung', {'a': '1', 'b': '2'}, b'png', 'image/png')
+    assert cache.get('ch.Nutzungsplanung', {'b': '2', 'a': '1'}) is symbol
+
+
+def test_eviction():
+    cache = SymbolCache(max_entries=2)
+    for identifier in ['1', '2', '3']:
+        cache.set('ch.Nutzungsplanung', {'identifier': identifier}, b'png', 'image/png')
+    assert cache.get('ch.Nutzungsplanung', {'identifier': '1'}) is None
+    assert cache.get_statistics()['evictions'] == 1
+
+
+def test_ttl():
+    cache = SymbolCache(ttl=60)
+    with patch('time.time', return_value=1000.0):
+        cache.set('ch.Nutzungsplanung', {'identifier': '1'}, b'png', 'image/png')
+    with patch('time.time', return_value=1059.0):
+        assert cache.get('ch.Nutzungsplanung', {'identifier': '1'}) is not None
+    with patch('time.time', return_value=1061.0):
+        assert cache.get('ch.Nutzungsplanung', {'identifier': '1'}) is None
+
+
+def test_get_symbol_cache():
+    config = {'symbol_cache': {'enabled': True, 'max_entries': 10, 'ttl': 60, 'max_age': 600}}
+    with patch.object(symbol_cache_module, '_symbol_cache', None):
+        with patch.object(Config, '_config', {}):
+            assert get_symbol_cache() is None
+        with patch.object(Config, '_config', config):
+            cache = get_symbol_cache()
+            assert cache._ttl_ == 60
+            assert cache.max_age == 600
+            assert get_symbol_cache() is cache
+    with patch.object(symbol_cache_module, '_symbol_cache', None):
+        with patch.object(Config, '_config', {'symbol_cache': {'enabled': True}}):
+            cache = get_symbol_cache()
+            # changed legend entries are delivered after a limited time by default
+            assert cache._ttl_ == 300
+            assert cache.max_age == 300
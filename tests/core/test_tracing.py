@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import timeit
+
+import pytest
+
+from pyramid_oereb.core.tracing import is_enabled, span, trace
+
+log = logging.getLogger('tests.core.test_tracing')
+
+EXTRACT = os.path.join(
+    os.path.dirname(__file__), '..', 'contrib.print_proxy.mapfish_print', 'resources', 'test_extract.json'
+)
+
+
+def test_trace(caplog):
+    with caplog.at_level(logging.DEBUG, logger=log.name):
+        trace(log, 'removing plr', code='ch.Nutzungsplanung', count=lambda: 2)
+    assert caplog.records[0].getMessage() == 'removing plr code=ch.Nutzungsplanung count=2'
+    assert caplog.records[0].trace == {'code': 'ch.Nutzungsplanung', 'count': 2}
+
+
+def test_trace_disabled(caplog):
+    def fail():
+        raise AssertionError('The field must not be computed')
+
+    with caplog.at_level(logging.INFO, logger=log.name):
+        assert not is_enabled(log)
+        trace(log, 'removing plr', plr=fail)
+        with span(log, 'reading', plr=fail) as s:
+            pass
+    assert not hasattr(s, 'duration')
+    assert len(caplog.records) == 0
+
+
+def test_span(caplog):
+    with caplog.at_level(logging.DEBUG, logger=log.name):
+        with span(log, 'process'):
+            with span(log, 'reading theme', code='ch.Nutzungsplanung') as s:
+                trace(log, 'reading')
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == '[process/reading theme] reading'
+    assert messages[1].startswith('[process] DONE with reading theme code=ch.Nutzungsplanung seconds=')
+    assert messages[2].startswith('DONE with process seconds=')
+    assert s.duration >= 0
+
+
+def test_span_error(caplog):
+    with caplog.at_level(logging.DEBUG, logger=log.name):
+        with pytest.raises(ValueError):
+            with span(log, 'process'):
+                raise ValueError()
+        trace(log, 'after')
+    assert caplog.records[0].trace['error'] == 'ValueError'
+    assert caplog.records[1].getMessage() == 'after'
+
+
+@pytest.mark.benchmark
+def test_trace_benchmark(caplog):
+    # One extract logs the extract dict of the print twice and every PLR once
+    with open(EXTRACT, encoding='utf-8') as f:
+        extract = json.load(f)
+    plrs = extract['RealEstate']['RestrictionOnLandownership']
+
+    def eager():
+        log.debug('Starting transformation, extract_dict is {}'.format(extract))
+        log.debug('After transformation, extract_dict is {}'.format(json.dumps(extract, indent=4)))
+        for plr in plrs:
+            log.debug('plr_tolerance_check: keeping as potentially concerned plr {}'.format(plr))
+
+    def lazy():
+        trace(log, 'Starting transformation', extract_dict=extract)
+        trace(log, 'After transformation', extract_dict=lambda: json.dumps(extract, indent=4))
+        for plr in plrs:
+            trace(log, 'plr_tolerance_check: keeping as potentially concerned plr', plr=plr)
+
+    with caplog.at_level(logging.INFO, logger=log.name):
+        number = 20
+        eager_duration = timeit.timeit(eager, number=number) / number
+        lazy_duration = timeit.timeit(lazy, number=number) / number
+    print('Debug logging per extract with DEBUG disabled: eager {:.1f} µs, lazy {:.1f} µs'.format(
+        eager_duration * 1000000,
+        lazy_duration * 1000000
+    ))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pytest
+import requests_mock
+from unittest.mock import patch
+
+from pyramid_oereb.core import wms
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.records.view_service import ViewServiceRecord
+from pyramid_oereb.core.wms import WmsFetcher
+
+
+WMS_URL = 'https://wms.example.com/wms?SERVICE=WMS&REQUEST=GetMap&LAYERS={0}&BBOX=0,0,10,10'
+
+
+def view_service(layer):
+    return ViewServiceRecord({'de': WMS_URL.format(layer)}, 1, 1.0, 'de', 2056)
+
+
+@pytest.fixture
+def fetcher():
+    return WmsFetcher(max_workers=4, timeout=5, retries=0)
+
+
+def test_download_deduplicates_urls(fetcher):
+    view_services = [view_service('plan'), view_service('plr'), view_service('plr')]
+    with requests_mock.mock() as m:
+        m.get(WMS_URL.format('plan'), content=b'plan', headers={'content-type': 'image/png'})
+        m.get(WMS_URL.format('plr'), content=b'plr', headers={'content-type': 'image/png'})
+        fetcher.download(view_services, 'fr')
+        assert m.call_count == 2
+    for record, content in zip(view_services, [b'plan', b'plr', b'plr']):
+        assert isinstance(record.image['de'], ImageRecord)
+        assert record.image['de'].content == content
+    statistics = fetcher.get_statistics()
+    assert statistics['https://wms.example.com/wms']['downloads'] == 2
+    assert statistics['https://wms.example.com/wms']['errors'] == 0
+    assert statistics['https://wms.example.com/wms']['time_average'] >= 0
+
+
+@pytest.mark.parametrize('status_code,content_type', [
+    (200, 'text/xml'),
+    (500, 'image/png')
+])
+def test_download_invalid_response(fetcher, status_code, content_type):
+    with requests_mock.mock() as m:
+        m.get(WMS_URL.format('plr'), content=b'error', status_code=status_code,
+              headers={'content-type': content_type})
+        with pytest.raises(LookupError):
+            fetcher.download([view_service('plr')], 'de')
+
+
+def test_download_failed(fetcher):
+    with requests_mock.mock() as m:
+        m.get(WMS_URL.format('plan'), content=b'plan', headers={'content-type': 'image/png'})
+        m.get(WMS_URL.format('plr'), exc=ConnectionError)
+        with pytest.raises(LookupError):
+            fetcher.download([view_service('plan'), view_service('plr')], 'de')
+    assert fetcher.get_statistics()['https://wms.example.com/wms']['errors'] == 1
+
+
+def test_download_invalid_url(fetcher):
+    record = ViewServiceRecord({'de': 'not a url'}, 1, 1.0, 'de', 2056)
+    with pytest.raises(AttributeError):
+        fetcher.download([record], 'de')
+
+
+def test_download_wms_content():
+    record = view_service('plr')
+    config = {'extract': {'wms_download': {'max_workers': 2, 'timeout': 5}}}
+    with patch.object(Config, '_config', config), patch.object(wms, '_fetcher', None), \
+            requests_mock.mock() as m:
+        m.get(WMS_URL.format('plr'), content=b'plr', headers={'content-type': 'image/png'})
+        record.download_wms_content('de')
+        assert wms.get_fetcher()._timeout_ == 5
+    assert record.image['de'].content == b'plr'
@@ -7,6 +7,7 @@ from jsonschema import Draft4Validator
 from pyramid.httpexceptions import HTTPBadRequest, HTTPFound, HTTPNoContent
 
 from tests.mockrequest import MockRequest
+from pyramid_oereb.core.extract_cache import ExtractCache, MemoryBackend
 from pyramid_oereb.core.views.webservice import PlrWebservice
 
 import pyramid_oereb.core.renderer.extract.json_
@@ -240,3 +241,34 @@ def test_format_url(real_estate_data):
     response = service.get_extract_by_id()
     assert isinstance(response, HTTPFound)
     assert response.location == 'https://geoview.bl.ch/oereb/?egrid=TEST'
+
+
+@patch.object(pyramid_oereb.core.hook_methods, 'route_prefix', 'oereb')
+@patch.object(pyramid_oereb.core.renderer.extract.json_, 'route_prefix', 'oereb')
+@patch.object(pyramid_oereb.core.views.webservice, 'route_prefix', 'oereb')
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
+def test_return_cached_json(pyramid_oereb_test_config, pyramid_test_config, extract_real_estate_data,
+                            main_schema, land_use_plans, contaminated_sites):
+    pyramid_test_config.add_renderer('pyramid_oereb_extract_json',
+                                     'pyramid_oereb.core.renderer.extract.json_.Renderer')
+    extract_cache = ExtractCache(MemoryBackend())
+
+    def get_extract():
+        request = MockRequest()
+        request.matchdict.update({
+            'format': 'JSON'
+        })
+        request.params.update({
+            'EGRID': 'TEST'
+        })
+        return PlrWebservice(request).get_extract_by_id()
+
+    with patch.object(pyramid_oereb.core.views.webservice, 'get_extract_cache', return_value=extract_cache):
+        response = get_extract()
+        with patch.object(pyramid_oereb.core.views.webservice, 'create_processor') as create_processor:
+            cached_response = get_extract()
+            create_processor.assert_not_called()
+    assert cached_response.body == response.body
+    assert cached_response.content_type == response.content_type
+    assert extract_cache.get_statistics()['hits'] == 1
+    assert extract_cache.get_statistics()['misses'] == 1
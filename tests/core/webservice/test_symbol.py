@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import pytest
 import io
 from PIL import Image
-from pyramid.httpexceptions import HTTPNotFound
+from pyramid.httpexceptions import HTTPNotFound, HTTPNotModified
 from pyramid.response import Response
 from pyramid_oereb.core.records.image import ImageRecord
 from tests.mockrequest import MockRequest
 from pyramid_oereb.core.views.webservice import Symbol
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+
+import pyramid_oereb.core.views.webservice
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.symbol_cache import SymbolCache
 from pyramid_oereb.contrib.data_sources.standard.hook_methods import get_symbol
 
 
@@ -82,3 +87,62 @@ def mock_get_theme_config_by_code():
 def test_get_method(mock_get_theme_config_by_code):
     with patch('pyramid_oereb.core.config.Config.get_theme_config_by_code', mock_get_theme_config_by_code):
         assert Symbol.get_method('abc.xyz') == get_symbol
+
+
+@pytest.fixture
+def symbol_cache():
+    cache = SymbolCache(max_age=600)
+    with patch.object(pyramid_oereb.core.views.webservice, 'get_symbol_cache', return_value=cache):
+        yield cache
+
+
+def get_symbol_request(**headers):
+    request = MockRequest()
+    request.headers.update(headers)
+    request.matchdict.update({
+        'theme_code': 'ch.BelasteteStandorte'
+    })
+    request.params.update({'identifier': '1'})
+    return request
+
+
+def test_get_image_cached(symbol_cache, png_binary):
+    hook = Mock(return_value=(png_binary, 'image/png'))
+    with patch.object(Symbol, 'get_method', return_value=hook), \
+            patch.object(Config, 'get_theme_config_by_code', return_value={}):
+        for _ in range(3):
+            result = Symbol(get_symbol_request()).get_image()
+            assert result.status_int == 200
+            assert result.body == png_binary
+            assert result.content_type == 'image/png'
+            assert result.etag == hashlib.sha256(png_binary).hexdigest()
+            assert result.cache_control.public
+            assert result.cache_control.max_age == 600
+    hook.assert_called_once_with({'identifier': '1'}, {})
+    assert symbol_cache.get_statistics()['hits'] == 2
+
+
+def test_get_image_not_modified(symbol_cache, png_binary):
+    symbol = symbol_cache.set('ch.BelasteteStandorte', {'identifier': '1'}, png_binary, 'image/png')
+    for if_none_match in ['"{0}"'.format(symbol.etag), '"other", "{0}"'.format(symbol.etag), '*']:
+        result = Symbol(get_symbol_request(**{'If-None-Match': if_none_match})).get_image()
+        assert isinstance(result, HTTPNotModified)
+        assert result.body == b''
+        assert result.etag == symbol.etag
+        assert result.cache_control.max_age == 600
+    result = Symbol(get_symbol_request(**{'If-None-Match': '"other"'})).get_image()
+    assert result.status_int == 200
+    assert result.body == png_binary
+
+
+def test_get_image_expired(symbol_cache, png_binary):
+    with patch('time.time', return_value=1000.0):
+        symbol_cache.set('ch.BelasteteStandorte', {'identifier': '1'}, b'old', 'image/png')
+        etag = Symbol(get_symbol_request()).get_image().etag
+    hook = Mock(return_value=(png_binary, 'image/png'))
+    with patch.object(Symbol, 'get_method', return_value=hook), \
+            patch.object(Config, 'get_theme_config_by_code', return_value={}):
+        result = Symbol(get_symbol_request(**{'If-None-Match': '"{0}"'.format(etag)})).get_image()
+    assert result.status_int == 200
+    assert result.body == png_binary
+    assert result.etag != etag